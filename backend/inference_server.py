@@ -0,0 +1,13 @@
+"""Inference service entrypoint (uvicorn backend.inference_server:app)."""
+
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).resolve().parent
+SRC_DIR = BASE_DIR / "src"
+if SRC_DIR.exists() and str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from backend_app.inference_server import app
+
+__all__ = ["app"]
@@ -1,5 +1,7 @@
 """Application factory for Email Smart Reply."""
 
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -7,29 +9,86 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from .config.settings import get_settings
-from .controllers import api, batch, web
+from .controllers import admin, api, assets, batch, metrics, reports, web
+from .middlewares.admission import AdmissionMiddleware
+from .middlewares.body_limit import BodyLimitMiddleware
+from .middlewares.compression import CompressionMiddleware
+from .middlewares.profiling import ProfilingMiddleware
+from .services import pdf
+from .services.assets import AssetCatalog
+from .services.model_manager import get_model_manager
+from .services.report_store import get_report_store
+from .services.shadow import get_shadow_evaluator
 
 PACKAGE_DIR = Path(__file__).resolve().parent
 BACKEND_DIR = PACKAGE_DIR.parent.parent
 PROJECT_DIR = BACKEND_DIR.parent
 FRONTEND_DIR = PROJECT_DIR / "frontend" / "src"
+STATIC_DIRECTORIES = ("styles", "assets")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    tasks = []
+    if settings.report_cleanup_interval_seconds > 0:
+        tasks.append(
+            asyncio.create_task(
+                get_report_store().run_retention(settings.report_cleanup_interval_seconds)
+            )
+        )
+    if settings.enable_transformers and not settings.inference_url:
+        manager = get_model_manager()
+        if settings.zero_shot_warmup:
+            manager.warm_up()
+        if settings.zero_shot_idle_unload_seconds > 0 or settings.zero_shot_rss_budget_mb > 0:
+            tasks.append(
+                asyncio.create_task(
+                    manager.run_governor(settings.zero_shot_governor_interval_seconds)
+                )
+            )
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        shadow = get_shadow_evaluator()
+        if shadow is not None:
+            shadow.save()
+        pdf.shutdown()
+        get_report_store().shutdown()
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
     settings.reports_dir.mkdir(parents=True, exist_ok=True)
-    app = FastAPI(title=settings.app_name, version=settings.app_version)
+    app = FastAPI(title=settings.app_name, version=settings.app_version, lifespan=lifespan)
 
+    app.state.assets = AssetCatalog(FRONTEND_DIR, STATIC_DIRECTORIES)
     templates = Jinja2Templates(directory=str(FRONTEND_DIR / "pages"))
+    templates.env.globals["asset_url"] = app.state.assets.url
     app.state.templates = templates
 
-    app.mount("/styles", StaticFiles(directory=str(FRONTEND_DIR / "styles")), name="styles")
-    app.mount("/assets", StaticFiles(directory=str(FRONTEND_DIR / "assets")), name="assets")
-    app.mount("/reports", StaticFiles(directory=str(settings.reports_dir)), name="reports")
+    if settings.compression_enabled:
+        app.add_middleware(CompressionMiddleware)
+    if settings.admin_token:
+        app.add_middleware(ProfilingMiddleware)
+    if settings.admission_enabled:
+        app.add_middleware(AdmissionMiddleware)
+    # Added last so it runs first: oversized bodies never reach the other layers.
+    app.add_middleware(BodyLimitMiddleware)
+
+    # Unversioned paths stay available for old links; pages use asset_url().
+    for directory in STATIC_DIRECTORIES:
+        app.mount(f"/{directory}", StaticFiles(directory=str(FRONTEND_DIR / directory)), name=directory)
 
     app.include_router(web.router)
     app.include_router(api.router, prefix="/api")
+    app.include_router(metrics.router, prefix="/api")
     app.include_router(batch.router)
+    app.include_router(reports.router)
+    app.include_router(admin.router)
+    app.include_router(assets.router)
 
     return app
 
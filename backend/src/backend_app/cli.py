@@ -0,0 +1,470 @@
+"""Offline bulk classification without the web server.
+
+Usage:
+    python -m backend.cli classify INPUT --output results.jsonl [--workers N]
+    python -m backend.cli prepare-model --output models/bart-large-mnli [--revision REV]
+    python -m backend.cli verify-model models/bart-large-mnli
+
+INPUT may be a directory (walked recursively), a .zip file or a .jsonl file
+with one ``{"id": ..., "text": ...}`` object per line. Directories and ZIPs
+may contain .txt, .pdf, .eml and .mbox files; mailboxes are split into
+messages as they are read. Inputs are read lazily
+in a deterministic order, sharded in chunks across a process pool and written
+in input order. After every chunk the output is fsynced and a checkpoint is
+stored next to it, so rerunning the same command resumes where it stopped.
+With ``--replies bulk`` GPT replies come from provider batch jobs of
+``--bulk-size`` emails, submitted as soon as each group fills while earlier
+jobs run (up to ``--bulk-max-jobs`` at a time); rows are written in input
+order once their job has been merged. Submitted batch ids are checkpointed,
+so a resumed run polls those jobs again instead of resubmitting them.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .config.settings import get_settings
+from .models.records import ClassificationResult
+from .services.bulk_replies import BulkReplyJob, get_bulk_reply_client
+from .services.mailbox import iter_mbox_messages
+from .services.model_manager import get_model_manager
+from .services.nlp import REPLY_PROMPT_CHARS, classify_and_respond, extract_text_from_bytes, preprocess
+from .services.processing import hash_text
+from .services.reports import REPORT_WRITERS
+from .services.scheduler import PRIORITY_BACKGROUND, request_priority
+
+logger = logging.getLogger("backend_app.cli")
+
+SUPPORTED_SUFFIXES = (".txt", ".pdf", ".eml", ".mbox")
+CLI_FORMATS = ("jsonl", "csv", "txt")
+# Resident memory of one worker with bart-large-mnli loaded (weights plus
+# tokenizer and torch runtime), used to size the default --workers.
+WORKER_MODEL_BYTES = 2 * 1024 ** 3
+
+# (source id, file name used to pick the extractor, payload). The payload is a
+# path for directory inputs so the worker, not the parent, reads the file, and a
+# deferred reader for ZIP members so skipped members are never decompressed.
+InputItem = Tuple[str, str, Union[bytes, str, Path, Callable[[], bytes]]]
+
+
+def _iter_mbox(source: str, stream: BinaryIO) -> Iterator[InputItem]:
+    # Only the cheap mbox split happens here; workers parse the MIME messages.
+    for index, raw in enumerate(iter_mbox_messages(stream), start=1):
+        yield f"{source}#{index}", "message.eml", raw
+
+
+def _iter_mbox_file(path: Path) -> Iterator[InputItem]:
+    with path.open("rb") as stream:
+        yield from _iter_mbox(path.name, stream)
+
+
+def _iter_directory(root: Path) -> Iterator[InputItem]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not filename.lower().endswith(SUPPORTED_SUFFIXES):
+                continue
+            path = Path(dirpath) / filename
+            source = str(path.relative_to(root))
+            if filename.lower().endswith(".mbox"):
+                with path.open("rb") as stream:
+                    yield from _iter_mbox(source, stream)
+            else:
+                yield source, filename, path
+
+
+def _iter_zip(path: Path) -> Iterator[InputItem]:
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(SUPPORTED_SUFFIXES):
+                continue
+            if info.filename.lower().endswith(".mbox"):
+                with zf.open(info) as stream:
+                    yield from _iter_mbox(info.filename, stream)
+            else:
+                yield info.filename, info.filename, partial(zf.read, info)
+
+
+def _iter_jsonl(path: Path) -> Iterator[InputItem]:
+    with path.open("r", encoding="utf-8") as handle:
+        for lineno, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Invalid JSON at %s:%d, classified as empty text", path, lineno)
+                record = {}
+            source = str(record.get("id") or f"{path.name}:{lineno}")
+            yield source, "", str(record.get("text") or "")
+
+
+def iter_inputs(path: Path, skip: int = 0) -> Iterator[InputItem]:
+    """Yield inputs in a stable order; the first ``skip`` ones are never read."""
+    suffix = path.suffix.lower()
+    if path.is_dir():
+        items = _iter_directory(path)
+    elif suffix == ".zip":
+        items = _iter_zip(path)
+    elif suffix == ".jsonl":
+        items = _iter_jsonl(path)
+    elif suffix == ".mbox":
+        items = _iter_mbox_file(path)
+    elif suffix == ".eml":
+        items = iter([(path.name, path.name, path)])
+    else:
+        raise ValueError(
+            f"Unsupported input: {path} (expected a directory, .zip, .jsonl, .mbox or .eml)"
+        )
+    for source, filename, payload in islice(items, skip, None):
+        if callable(payload):
+            payload = payload()
+        yield source, filename, payload
+
+
+def _available_memory() -> Optional[int]:
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def default_workers() -> int:
+    """One worker per core, capped by memory when each worker loads the model."""
+    cores = os.cpu_count() or 1
+    settings = get_settings()
+    if not settings.enable_transformers or settings.inference_url:
+        return cores
+    available = _available_memory()
+    if available is None:
+        return 1
+    return max(1, min(cores, available // WORKER_MODEL_BYTES))
+
+
+def _init_worker() -> None:
+    # Every worker owns one core; keep torch from spawning a thread per core each.
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+
+async def _classify_items(
+    items: Sequence[InputItem], use_gpt: bool
+) -> List[Tuple[ClassificationResult, str]]:
+    results = []
+    for source, filename, payload in items:
+        if isinstance(payload, Path):
+            payload = payload.read_bytes()
+        text = extract_text_from_bytes(filename, payload) if isinstance(payload, bytes) else payload
+        result = await classify_and_respond(text or "", text_hash=hash_text(text or ""), use_gpt=use_gpt)
+        result.arquivo = source
+        results.append((result, text or ""))
+    return results
+
+
+def _run_chunk(items: Sequence[InputItem], use_gpt: bool) -> List[Tuple[ClassificationResult, str]]:
+    settings = get_settings()
+    if settings.enable_transformers and not settings.inference_url:
+        # Offline runs wait for the model instead of falling back to the heuristic.
+        get_model_manager().get(wait=True)
+    with request_priority(PRIORITY_BACKGROUND):
+        return asyncio.run(_classify_items(items, use_gpt))
+
+
+def classify_chunk(items: Sequence[InputItem], use_gpt: bool) -> List[ClassificationResult]:
+    """Process-pool entry point: classify one chunk of inputs in order."""
+    return [result for result, _ in _run_chunk(items, use_gpt)]
+
+
+def classify_chunk_for_bulk(items: Sequence[InputItem]) -> List[Tuple[ClassificationResult, str]]:
+    """Like ``classify_chunk`` with template replies, plus the text each bulk prompt needs."""
+    return [
+        (result, preprocess(text)[:REPLY_PROMPT_CHARS])
+        for result, text in _run_chunk(items, use_gpt=False)
+    ]
+
+
+class Checkpoint:
+    """Number of inputs already written, the output size at that point and the
+    bulk reply jobs (``count`` rows each, in input order) submitted for the
+    inputs after it."""
+
+    def __init__(self, path: Path, source: Path) -> None:
+        self.path = path
+        self.source = str(source.resolve())
+        self.done = 0
+        self.output_bytes = 0
+        self.bulk_jobs: List[Dict[str, Any]] = []
+
+    def load(self) -> bool:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        if data.get("source") != self.source:
+            return False
+        self.done = int(data.get("done", 0))
+        self.output_bytes = int(data.get("output_bytes", 0))
+        self.bulk_jobs = list(data.get("bulk_jobs") or [])
+        return True
+
+    def save(
+        self, done: int, output_bytes: int, bulk_jobs: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        self.done, self.output_bytes = done, output_bytes
+        if bulk_jobs is not None:
+            self.bulk_jobs = bulk_jobs
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "source": self.source,
+                    "done": done,
+                    "output_bytes": output_bytes,
+                    "bulk_jobs": self.bulk_jobs,
+                }
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+
+
+def _chunks(items: Iterator[InputItem], size: int) -> Iterator[List[InputItem]]:
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_classify(args: argparse.Namespace) -> int:
+    source = Path(args.input)
+    output = Path(args.output)
+    checkpoint = Checkpoint(Path(args.checkpoint or f"{output}.checkpoint.json"), source)
+    resumed = not args.restart and output.exists() and checkpoint.load()
+    if resumed:
+        # Drop rows written after the last checkpoint; they are classified again.
+        with output.open("ab") as handle:
+            handle.truncate(checkpoint.output_bytes)
+        print(f"Resuming after {checkpoint.done} emails", file=sys.stderr)
+    elif output.exists():
+        output.unlink()
+
+    items = iter_inputs(source, skip=checkpoint.done)
+
+    writer = REPORT_WRITERS[args.format](output, append=True).open()
+
+    workers = max(args.workers or default_workers(), 1)
+    use_gpt = args.replies == "gpt"
+    bulk_client = None
+    if args.replies == "bulk":
+        bulk_client = get_bulk_reply_client()
+        if bulk_client is None:
+            print("OPENAI_API_KEY is not set; using template replies", file=sys.stderr)
+    bulk_rows: List[Tuple[ClassificationResult, str]] = []
+    bulk_jobs: "deque[BulkReplyJob]" = deque()
+    # Jobs a previous run submitted for the inputs being classified again.
+    resumed_jobs = deque(checkpoint.bulk_jobs if bulk_client is not None else [])
+    if resumed_jobs:
+        print(f"Resuming {len(resumed_jobs)} submitted bulk reply job(s)", file=sys.stderr)
+    max_jobs = max(args.bulk_max_jobs, 1)
+    last_poll = 0.0
+    done = checkpoint.done
+    processed = 0
+    started = last_report = time.monotonic()
+    pending: "deque[Future]" = deque()
+
+    def _bulk_state() -> List[Dict[str, Any]]:
+        jobs = [{"count": len(job.rows), "batch_ids": job.batch_ids} for job in bulk_jobs]
+        return jobs + list(resumed_jobs)
+
+    def _start_jobs(final: bool = False) -> None:
+        # Each group is submitted as soon as it fills; resumed groups keep their size.
+        while bulk_rows:
+            size = int(resumed_jobs[0]["count"]) if resumed_jobs else args.bulk_size
+            if len(bulk_rows) < size and not final:
+                return
+            rows = bulk_rows[:size]
+            del bulk_rows[:size]
+            if resumed_jobs:
+                job = BulkReplyJob(bulk_client, rows, batch_ids=resumed_jobs.popleft()["batch_ids"])
+            else:
+                job = BulkReplyJob(bulk_client, rows)
+            bulk_jobs.append(job)
+            checkpoint.save(done, writer.flush(), _bulk_state())
+
+    def _collect(keep: int) -> None:
+        """Write finished jobs from the head of the queue, waiting while more than
+        ``keep`` are outstanding. Rows are written (and checkpointed) only once
+        their job is merged."""
+        nonlocal last_poll
+        while bulk_jobs:
+            must_wait = len(bulk_jobs) > keep
+            if not must_wait and time.monotonic() - last_poll < bulk_client.poll_interval:
+                return
+            last_poll = time.monotonic()
+            if bulk_jobs[0].poll():
+                job = bulk_jobs.popleft()
+                answered = job.merge()
+                print(f"Bulk replies: {answered}/{len(job.rows)} from the batch job", file=sys.stderr)
+                _write([result for result, _ in job.rows])
+                last_poll = 0.0
+                continue
+            if not must_wait:
+                return
+            bulk_client.sleep(bulk_client.poll_interval)
+
+    def _drain_one() -> None:
+        results = pending.popleft().result()
+        if bulk_client is None:
+            _write(results)
+            return
+        bulk_rows.extend(results)
+        _start_jobs()
+        _collect(keep=max_jobs - 1)
+
+    def _write(results: List[ClassificationResult]) -> None:
+        nonlocal done, processed, last_report
+        for result in results:
+            writer.write_row(result)
+        done += len(results)
+        processed += len(results)
+        checkpoint.save(done, writer.flush(), _bulk_state())
+        now = time.monotonic()
+        if now - last_report >= args.progress_interval:
+            rate = processed / max(now - started, 1e-9)
+            print(f"{done} emails processed ({rate:.1f} emails/s)", file=sys.stderr)
+            last_report = now
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for chunk in _chunks(items, args.chunk_size):
+                if bulk_client is not None:
+                    pending.append(pool.submit(classify_chunk_for_bulk, chunk))
+                else:
+                    pending.append(pool.submit(classify_chunk, chunk, use_gpt))
+                if len(pending) >= workers * 2:
+                    _drain_one()
+            while pending:
+                _drain_one()
+            if bulk_client is not None:
+                _start_jobs(final=True)
+                _collect(keep=0)
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        writer.commit()
+        raise
+    writer.commit()
+
+    elapsed = max(time.monotonic() - started, 1e-9)
+    print(
+        f"Done: {done} emails in {output} ({processed / elapsed:.1f} emails/s)",
+        file=sys.stderr,
+    )
+    checkpoint.path.unlink(missing_ok=True)
+    return 0
+
+
+def run_prepare_model(args: argparse.Namespace) -> int:
+    from .services.model_store import prepare_artifact
+
+    started = time.monotonic()
+    manifest = prepare_artifact(args.model, args.revision, Path(args.output))
+    size = sum(meta["size"] for meta in manifest["files"].values())
+    print(
+        f"Stored {manifest['model']}@{manifest['revision']} in {args.output} "
+        f"({size / 1024 / 1024:.0f} MB, {time.monotonic() - started:.1f}s). "
+        f"Set MODEL_DIR={args.output} to load it offline.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def run_verify_model(args: argparse.Namespace) -> int:
+    from .services.model_store import ArtifactError, verify_artifact
+
+    try:
+        manifest = verify_artifact(Path(args.path), full=True)
+    except ArtifactError as exc:
+        print(f"Invalid artifact: {exc}", file=sys.stderr)
+        return 1
+    print(f"OK: {manifest['model']}@{manifest['revision']} ({len(manifest['files'])} files)", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m backend.cli", description="Email Smart Reply CLI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    classify = commands.add_parser("classify", help="Classify a directory, ZIP or JSONL file offline")
+    classify.add_argument("input", help="Directory, .zip or .jsonl with the emails")
+    classify.add_argument("--output", "-o", required=True, help="Output file")
+    classify.add_argument("--format", choices=CLI_FORMATS, default="jsonl")
+    classify.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=(
+            "Worker processes. With ENABLE_TRANSFORMERS each one loads its own copy of the "
+            "model (about 2 GB RSS), so the default is one per core capped by available memory"
+        ),
+    )
+    classify.add_argument("--chunk-size", type=int, default=64, help="Emails per worker task")
+    classify.add_argument(
+        "--replies",
+        choices=("template", "gpt", "bulk"),
+        default="template",
+        help="Reply generation: local templates (default), OpenAI per email, or OpenAI batch jobs",
+    )
+    classify.add_argument(
+        "--bulk-size",
+        type=int,
+        default=5000,
+        help="Emails per batch job with --replies bulk (rows are written as each job finishes)",
+    )
+    classify.add_argument(
+        "--bulk-max-jobs",
+        type=int,
+        default=20,
+        help="Batch jobs in flight at once with --replies bulk; classification pauses at the limit",
+    )
+    classify.add_argument("--checkpoint", help="Checkpoint path (default: <output>.checkpoint.json)")
+    classify.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    classify.add_argument("--progress-interval", type=float, default=5.0, help="Seconds between progress lines")
+    classify.set_defaults(handler=run_classify)
+
+    settings = get_settings()
+    prepare = commands.add_parser(
+        "prepare-model", help="Store a pinned safetensors snapshot of the zero-shot model"
+    )
+    prepare.add_argument("--output", "-o", required=True, help="Artifact directory (use as MODEL_DIR)")
+    prepare.add_argument("--model", default=settings.zero_shot_model)
+    prepare.add_argument(
+        "--revision",
+        default=settings.zero_shot_model_revision,
+        help="Branch, tag or commit; stored resolved to a commit hash",
+    )
+    prepare.set_defaults(handler=run_prepare_model)
+
+    verify = commands.add_parser("verify-model", help="Check an artifact against its manifest")
+    verify.add_argument("path", help="Artifact directory")
+    verify.set_defaults(handler=run_verify_model)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
@@ -29,6 +29,15 @@ class Settings(BaseSettings):
     openai_api_key: Optional[str] = Field(
         default=None, validation_alias="OPENAI_API_KEY"
     )
+    openai_base_url: Optional[str] = Field(
+        default=None, validation_alias="OPENAI_BASE_URL"
+    )
+    bulk_reply_poll_seconds: float = Field(
+        default=30.0, validation_alias="BULK_REPLY_POLL_SECONDS"
+    )
+    bulk_reply_timeout_seconds: float = Field(
+        default=24 * 3600.0, validation_alias="BULK_REPLY_TIMEOUT_SECONDS"
+    )
     port: int = Field(default=7860, validation_alias="PORT")
     max_upload_mb: int = Field(
         default=8, validation_alias="MAX_UPLOAD_MB"
@@ -42,6 +51,169 @@ class Settings(BaseSettings):
     max_batch_items: int = Field(
         default=200, validation_alias="MAX_BATCH_ITEMS"
     )
+    inference_concurrency: int = Field(
+        default=4, validation_alias="INFERENCE_CONCURRENCY"
+    )
+    reply_concurrency: int = Field(
+        default=8, validation_alias="REPLY_CONCURRENCY"
+    )
+    adaptive_concurrency: bool = Field(
+        default=True, validation_alias="ADAPTIVE_CONCURRENCY"
+    )
+    inference_max_concurrency: int = Field(
+        default=32, validation_alias="INFERENCE_MAX_CONCURRENCY"
+    )
+    reply_max_concurrency: int = Field(
+        default=64, validation_alias="REPLY_MAX_CONCURRENCY"
+    )
+    concurrency_latency_tolerance: float = Field(
+        default=2.0, validation_alias="CONCURRENCY_LATENCY_TOLERANCE"
+    )
+    concurrency_backoff: float = Field(
+        default=0.9, validation_alias="CONCURRENCY_BACKOFF"
+    )
+    request_timeout_ms: float = Field(
+        default=0, validation_alias="REQUEST_TIMEOUT_MS"
+    )
+    max_request_timeout_ms: float = Field(
+        default=120000, validation_alias="MAX_REQUEST_TIMEOUT_MS"
+    )
+    admission_enabled: bool = Field(
+        default=False, validation_alias="ADMISSION_ENABLED"
+    )
+    admission_api_keys: str = Field(
+        default="", validation_alias="ADMISSION_API_KEYS"
+    )
+    admission_trusted_proxies: str = Field(
+        default="", validation_alias="ADMISSION_TRUSTED_PROXIES"
+    )
+    admission_rate: float = Field(
+        default=20, validation_alias="ADMISSION_RATE"
+    )
+    admission_burst: float = Field(
+        default=400, validation_alias="ADMISSION_BURST"
+    )
+    admission_max_concurrent: int = Field(
+        default=8, validation_alias="ADMISSION_MAX_CONCURRENT"
+    )
+    admission_bytes_per_token: int = Field(
+        default=65536, validation_alias="ADMISSION_BYTES_PER_TOKEN"
+    )
+    admission_gpt_cost_multiplier: float = Field(
+        default=4, validation_alias="ADMISSION_GPT_COST_MULTIPLIER"
+    )
+    admission_store_path: Optional[Path] = Field(
+        default=None, validation_alias="ADMISSION_STORE_PATH"
+    )
+    inference_url: Optional[str] = Field(
+        default=None, validation_alias="INFERENCE_URL"
+    )
+    inference_timeout_seconds: float = Field(
+        default=10, validation_alias="INFERENCE_TIMEOUT_SECONDS"
+    )
+    inference_retry_seconds: float = Field(
+        default=15, validation_alias="INFERENCE_RETRY_SECONDS"
+    )
+    inference_pool_size: int = Field(
+        default=16, validation_alias="INFERENCE_POOL_SIZE"
+    )
+    inference_batch_size: int = Field(
+        default=16, validation_alias="INFERENCE_BATCH_SIZE"
+    )
+    inference_batch_wait_ms: float = Field(
+        default=5, validation_alias="INFERENCE_BATCH_WAIT_MS"
+    )
+    zero_shot_model: str = Field(
+        default="facebook/bart-large-mnli", validation_alias="MODEL_NAME"
+    )
+    zero_shot_model_revision: str = Field(
+        default="main", validation_alias="MODEL_REVISION"
+    )
+    zero_shot_model_dir: Optional[Path] = Field(
+        default=None, validation_alias="MODEL_DIR"
+    )
+    zero_shot_warmup: bool = Field(
+        default=True, validation_alias="MODEL_WARMUP"
+    )
+    zero_shot_idle_unload_seconds: float = Field(
+        default=0, validation_alias="MODEL_IDLE_UNLOAD_SECONDS"
+    )
+    zero_shot_rss_budget_mb: float = Field(
+        default=0, validation_alias="MODEL_RSS_BUDGET_MB"
+    )
+    zero_shot_governor_interval_seconds: float = Field(
+        default=30, validation_alias="MODEL_GOVERNOR_INTERVAL_SECONDS"
+    )
+    shadow_engine: Optional[str] = Field(
+        default=None, validation_alias="SHADOW_ENGINE"
+    )
+    shadow_sample_rate: float = Field(
+        default=0.0, validation_alias="SHADOW_SAMPLE_RATE"
+    )
+    shadow_store_path: Path = Field(
+        default=Path("logs") / "shadow_eval.json",
+        validation_alias="SHADOW_STORE_PATH",
+    )
+    admin_token: Optional[str] = Field(
+        default=None, validation_alias="ADMIN_TOKEN"
+    )
+    priority_weight_interactive: float = Field(
+        default=8, validation_alias="PRIORITY_WEIGHT_INTERACTIVE"
+    )
+    priority_weight_batch: float = Field(
+        default=2, validation_alias="PRIORITY_WEIGHT_BATCH"
+    )
+    priority_weight_background: float = Field(
+        default=1, validation_alias="PRIORITY_WEIGHT_BACKGROUND"
+    )
+    compression_enabled: bool = Field(
+        default=True, validation_alias="COMPRESSION_ENABLED"
+    )
+    compression_min_bytes: int = Field(
+        default=1024, validation_alias="COMPRESSION_MIN_BYTES"
+    )
+    pdf_extraction_mode: str = Field(
+        default="fast", validation_alias="PDF_EXTRACTION_MODE"
+    )
+    pdf_max_pages: int = Field(
+        default=50, validation_alias="PDF_MAX_PAGES"
+    )
+    pdf_workers: int = Field(
+        default=2, validation_alias="PDF_WORKERS"
+    )
+    pdf_parallel_min_pages: int = Field(
+        default=24, validation_alias="PDF_PARALLEL_MIN_PAGES"
+    )
+    pdf_cache_items: int = Field(
+        default=256, validation_alias="PDF_CACHE_ITEMS"
+    )
+    report_format: str = Field(
+        default="txt", validation_alias="REPORT_FORMAT"
+    )
+    report_precompress: bool = Field(
+        default=True, validation_alias="REPORT_PRECOMPRESS"
+    )
+    reports_max_mb: int = Field(
+        default=512, validation_alias="REPORTS_MAX_MB"
+    )
+    report_retention_hours: float = Field(
+        default=168, validation_alias="REPORT_RETENTION_HOURS"
+    )
+    report_cleanup_interval_seconds: float = Field(
+        default=600, validation_alias="REPORT_CLEANUP_INTERVAL_SECONDS"
+    )
+    near_duplicate_enabled: bool = Field(
+        default=False, validation_alias="NEAR_DUPLICATE_ENABLED"
+    )
+    near_duplicate_threshold: float = Field(
+        default=0.9, validation_alias="NEAR_DUPLICATE_THRESHOLD"
+    )
+    near_duplicate_capacity: int = Field(
+        default=50000, validation_alias="NEAR_DUPLICATE_CAPACITY"
+    )
+    near_duplicate_ttl_seconds: float = Field(
+        default=3600, validation_alias="NEAR_DUPLICATE_TTL_SECONDS"
+    )
 
     @field_validator("audit_log_path", "reports_dir", mode="before")
     @classmethod
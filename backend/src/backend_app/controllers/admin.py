@@ -0,0 +1,30 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from ..services.profiling import MAX_SAMPLE_SECONDS, get_profile, sample_stacks
+from ..services.security import require_admin
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def sample_profile(
+    seconds: float = Query(10.0, gt=0, le=MAX_SAMPLE_SECONDS),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+):
+    """Sample every thread for ``seconds``; the body is a collapsed-stack file."""
+    stacks = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+    return PlainTextResponse(
+        stacks,
+        headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'},
+    )
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def request_profile(profile_id: str):
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Perfil nao encontrado.")
+    return PlainTextResponse(profile.report)
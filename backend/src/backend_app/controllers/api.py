@@ -1,35 +1,41 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
 
+from fastapi import APIRouter, Header, HTTPException
+
+from ..models.records import FastJSONResponse, to_process_record
 from ..models.schemas import (
     BatchProcessRequest,
     BatchProcessResponse,
     ProcessRequest,
     ProcessResponse,
 )
-from ..services.processing import classify_text, hash_text, process_api_batch
+from ..services.deadline import parse_timeout_header, resolve_timeout
+from ..services.processing import classify_text, process_api_batch
 from ..config.settings import get_settings
 
 router = APIRouter()
 settings = get_settings()
 
 
+# Both endpoints return a prebuilt response: the records already match the
+# declared response_model, which is kept for the OpenAPI schema only.
 @router.post("/process", response_model=ProcessResponse)
-async def api_process(req: ProcessRequest):
+async def api_process(
+    req: ProcessRequest,
+    x_request_timeout: Optional[str] = Header(None),
+):
     content = (req.text or "").strip()
-    result = await classify_text(content, "/api/process")
-
-    return ProcessResponse(
-        primary_category=result.get("primary_category"),
-        overall_category=result.get("overall_category"),
-        confidence=float(result.get("confidence", 0)),
-        engine=result.get("engine") or "unknown",
-        reply=result.get("reply") or "",
-        text_hash=hash_text(content),
-    )
+    timeout = resolve_timeout(req.timeout_ms or parse_timeout_header(x_request_timeout))
+    result = await classify_text(content, "/api/process", timeout=timeout)
+    # classify_text already set result.text_hash.
+    return FastJSONResponse(to_process_record(result))
 
 
 @router.post("/batch", response_model=BatchProcessResponse)
-async def api_batch(req: BatchProcessRequest):
+async def api_batch(
+    req: BatchProcessRequest,
+    x_request_timeout: Optional[str] = Header(None),
+):
     texts = req.texts or []
     if len(texts) > settings.max_batch_items:
         raise HTTPException(
@@ -37,16 +43,6 @@ async def api_batch(req: BatchProcessRequest):
             detail=f"Lote excede o limite de {settings.max_batch_items} registros.",
         )
 
-    payloads = await process_api_batch(texts)
-    results = [
-        ProcessResponse(
-            primary_category=item.get("primary_category"),
-            overall_category=item.get("overall_category"),
-            confidence=float(item.get("confidence", 0)),
-            engine=item.get("engine") or "unknown",
-            reply=item.get("reply") or "",
-            text_hash=item.get("text_hash", ""),
-        )
-        for item in payloads
-    ]
-    return BatchProcessResponse(results=results)
+    timeout = resolve_timeout(req.timeout_ms or parse_timeout_header(x_request_timeout))
+    payloads = await process_api_batch(texts, timeout=timeout)
+    return FastJSONResponse({"results": [to_process_record(item) for item in payloads]})
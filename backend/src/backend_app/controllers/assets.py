@@ -0,0 +1,30 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+
+from ..services.compression import negotiate
+from ..services.http_cache import etag_matches
+
+router = APIRouter()
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@router.get("/static/{path:path}")
+async def static_asset(
+    path: str,
+    request: Request,
+    accept_encoding: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+):
+    asset = request.app.state.assets.get(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Arquivo nao encontrado.")
+    headers = {"Cache-Control": IMMUTABLE, "ETag": asset.etag, "Vary": "Accept-Encoding"}
+    if etag_matches(if_none_match, asset.etag):
+        return Response(status_code=304, headers=headers)
+    encoding = negotiate(accept_encoding or "", list(asset.encoded))
+    if encoding is None:
+        return Response(asset.content, media_type=asset.media_type, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(asset.encoded[encoding], media_type=asset.media_type, headers=headers)
@@ -1,23 +1,47 @@
-from fastapi import APIRouter, File, Request, UploadFile
+from typing import Optional
+
+from fastapi import APIRouter, File, Form, Request, UploadFile
 from fastapi.responses import HTMLResponse
 
-from ..services.processing import handle_zip_payload
+from ..services.mailbox import is_mailbox_name
+from ..services.processing import handle_mailbox_payload, handle_zip_payload
 from ..config.settings import get_settings
+from .web import wants_fragment
 
 router = APIRouter()
 settings = get_settings()
 
 
 @router.post("/batch_upload", response_class=HTMLResponse)
-async def batch_upload(request: Request, emails_zip: UploadFile = File(...)):
+async def batch_upload(
+    request: Request,
+    emails_zip: UploadFile = File(...),
+    report_format: Optional[str] = Form(None),
+    report_gzip: bool = Form(False),
+):
     templates = request.app.state.templates
-    data = await emails_zip.read()
-    rows, report_name, summary = await handle_zip_payload(data)
+    filename = emails_zip.filename or ""
+    if is_mailbox_name(filename):
+        rows, report_name, summary = await handle_mailbox_payload(
+            emails_zip.file,
+            filename,
+            emails_zip.size or 0,
+            report_format=report_format,
+            compress=report_gzip,
+        )
+    else:
+        # The form parser spooled the upload to disk; read members from there.
+        rows, report_name, summary = await handle_zip_payload(
+            emails_zip.file,
+            report_format=report_format,
+            compress=report_gzip,
+            size_bytes=emails_zip.size or 0,
+        )
 
     preview_limit = max(1, settings.batch_preview_limit)
     return templates.TemplateResponse(
         request,
-        "index.html",
+        "partials/batch_result.html" if wants_fragment(request) else "index.html",
         {
             "batch_done": True,
             "report_url": f"/reports/{report_name}",
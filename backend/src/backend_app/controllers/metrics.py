@@ -0,0 +1,37 @@
+from fastapi import APIRouter
+
+from ..services.model_manager import get_model_manager
+from ..services.model_store import last_load_info
+from ..services.pdf import get_text_cache
+from ..services.shadow import get_shadow_evaluator
+from ..services.scheduler import limits_snapshot, scheduler_snapshot
+
+router = APIRouter()
+
+
+@router.get("/metrics/scheduler")
+async def scheduler_metrics() -> dict:
+    return scheduler_snapshot()
+
+
+@router.get("/metrics/limits")
+async def limit_metrics() -> dict:
+    return limits_snapshot()
+
+
+@router.get("/metrics/model")
+async def model_metrics() -> dict:
+    return {**get_model_manager().snapshot(), "artifact": last_load_info()}
+
+
+@router.get("/metrics/shadow")
+async def shadow_report() -> dict:
+    shadow = get_shadow_evaluator()
+    if shadow is None:
+        return {"enabled": False}
+    return {"enabled": True, **shadow.report()}
+
+
+@router.get("/metrics/pdf")
+async def pdf_metrics() -> dict:
+    return get_text_cache().snapshot()
@@ -0,0 +1,63 @@
+import mimetypes
+import os
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+from ..services.compression import negotiate
+from ..services.http_cache import etag_matches
+from ..services.report_store import get_report_store
+
+router = APIRouter()
+
+# Report names are unique and never rewritten, so clients may cache them forever.
+REPORT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _media_type(report_name: str) -> str:
+    media_type, file_encoding = mimetypes.guess_type(report_name)
+    if file_encoding is not None:
+        # ``report.csv.gz`` is a gzip file, not a CSV the middleware should encode again.
+        return "application/gzip" if file_encoding == "gzip" else "application/octet-stream"
+    return media_type or "text/plain"
+
+
+@router.get("/reports/{report_name}")
+async def download_report(request: Request, report_name: str):
+    store = get_report_store()
+    path = store.resolve(report_name)
+    try:
+        stat_result = os.stat(path) if path is not None else None
+    except FileNotFoundError:
+        stat_result = None
+    if stat_result is None:
+        raise HTTPException(status_code=404, detail="Relatorio nao encontrado.")
+
+    headers = {"Cache-Control": REPORT_CACHE_CONTROL}
+    variants = store.encoded_variants(report_name)
+    encoding = negotiate(request.headers.get("accept-encoding", ""), list(variants))
+    if encoding is not None:
+        # Serve the copy compressed at commit time; FileResponse streams it as is.
+        try:
+            stat_result = os.stat(variants[encoding])
+            path = variants[encoding]
+            headers.update({"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+        except FileNotFoundError:
+            pass
+    elif variants:
+        headers["Vary"] = "Accept-Encoding"
+
+    response = FileResponse(
+        path,
+        stat_result=stat_result,
+        media_type=_media_type(report_name),
+        headers=headers,
+    )
+    etag = response.headers.get("etag")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        headers.pop("Content-Encoding", None)
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, **headers},
+        )
+    return response
@@ -3,11 +3,19 @@ from typing import Optional
 from fastapi import APIRouter, File, Form, Request, UploadFile
 from fastapi.responses import HTMLResponse
 
-from ..services.processing import classify_text, ensure_payload_limit
+from ..services.deadline import resolve_timeout
+from ..services.processing import classify_text, ensure_payload_limit, read_upload
 from ..services.nlp import extract_text_from_bytes
 
 router = APIRouter()
 
+PARTIAL_HEADER = "x-partial"
+
+
+def wants_fragment(request: Request) -> bool:
+    """The page submits with ``X-Partial: 1`` and swaps in the result fragment."""
+    return request.headers.get(PARTIAL_HEADER) == "1"
+
 
 @router.get("/health")
 async def health() -> dict:
@@ -29,8 +37,7 @@ async def process_email(
     templates = request.app.state.templates
     content = ""
     if email_file:
-        raw_bytes = await email_file.read()
-        ensure_payload_limit(len(raw_bytes))
+        raw_bytes = await read_upload(email_file)
         content = extract_text_from_bytes(email_file.filename or "", raw_bytes)
     if not content and email_text:
         cleaned = email_text.strip()
@@ -38,26 +45,32 @@ async def process_email(
             ensure_payload_limit(len(cleaned.encode("utf-8")))
             content = cleaned
 
+    partial = wants_fragment(request)
     if not content:
         return templates.TemplateResponse(
             request,
-            "index.html",
+            "partials/error.html" if partial else "index.html",
             {"error": "Envie um arquivo .txt/.pdf ou cole o texto do e-mail."},
             status_code=400,
         )
 
-    result = await classify_text(content, "/process")
+    result = await classify_text(content, "/process", timeout=resolve_timeout())
 
+    if partial:
+        # The page keeps the submitted text; only the result card is sent back.
+        template, context = "partials/result.html", {}
+    else:
+        template, context = "index.html", {"input_text": content}
     return templates.TemplateResponse(
         request,
-        "index.html",
+        template,
         {
-            "input_text": content,
-            "category": result.get("overall_category"),
-            "primary_category": result.get("primary_category"),
-            "confidence": result.get("confidence"),
-            "suggested_reply": result.get("reply"),
-            "engine": result.get("engine"),
+            **context,
+            "category": result.overall_category,
+            "primary_category": result.primary_category,
+            "confidence": result.confidence,
+            "suggested_reply": result.reply,
+            "engine": result.engine,
             "success_message": "E-mail processado com sucesso!",
         },
     )
@@ -0,0 +1,160 @@
+"""Standalone zero-shot inference service.
+
+Run it next to the API workers and point them at it with ``INFERENCE_URL``:
+
+    uvicorn backend.inference_server:app --uds /tmp/email-inference.sock
+    uvicorn backend.inference_server:app --port 7861
+
+The model is loaded once per server process. Concurrent requests (from any
+number of API workers) are gathered by a micro-batcher and classified with one
+pipeline call of up to ``INFERENCE_BATCH_SIZE`` texts.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from pydantic import BaseModel, Field
+
+from .config.settings import get_settings
+from .services.model_manager import get_model_manager
+from .services.nlp import CATEGORIES
+
+logger = logging.getLogger("backend_app.inference_server")
+
+MODEL_ENGINE = "Transformers (bart-large-mnli)"
+
+Prediction = Dict[str, Any]
+BatchClassifier = Callable[[List[str]], List[Prediction]]
+
+
+class ClassifyRequest(BaseModel):
+    texts: List[str] = Field(..., description="Preprocessed email texts")
+
+
+class ClassifyResponse(BaseModel):
+    results: List[Dict[str, Any]]
+
+
+def classify_with_model(texts: List[str]) -> List[Prediction]:
+    # The service exists to run the model, so it waits for a reload instead of
+    # answering with the heuristic.
+    classifier = get_model_manager().get(wait=True) if get_settings().enable_transformers else None
+    if classifier is None:
+        return [{"label": None, "confidence": 0.0, "engine": "Heuristic"} for _ in texts]
+    outputs = classifier(texts, CATEGORIES, multi_label=False)
+    if isinstance(outputs, dict):
+        outputs = [outputs]
+    return [
+        {
+            "label": output["labels"][0],
+            "confidence": float(output["scores"][0]),
+            "engine": MODEL_ENGINE,
+        }
+        for output in outputs
+    ]
+
+
+class MicroBatcher:
+    """Collect texts from concurrent requests into batches for one model call."""
+
+    def __init__(self, classify: BatchClassifier, max_batch: int, max_wait: float) -> None:
+        self.classify = classify
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_running(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        return self._queue
+
+    async def submit(self, texts: List[str]) -> List[Prediction]:
+        queue = self._ensure_running()
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in texts]
+        for text, future in zip(texts, futures):
+            queue.put_nowait((text, future))
+        return list(await asyncio.gather(*futures))
+
+    async def _run(self) -> None:
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await queue.get()]
+            flush_at = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = flush_at - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                results = await asyncio.to_thread(self.classify, [text for text, _ in batch])
+            except Exception as exc:
+                logger.warning("Batch classification failed: %s", exc)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self) -> None:
+        if self._task is not None and self._loop is asyncio.get_running_loop():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+def create_inference_app(classify: Optional[BatchClassifier] = None) -> FastAPI:
+    settings = get_settings()
+    batcher = MicroBatcher(
+        classify or classify_with_model,
+        max_batch=settings.inference_batch_size,
+        max_wait=settings.inference_batch_wait_ms / 1000,
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if classify is None:
+            # Load the model before the first request instead of during it.
+            await asyncio.to_thread(get_model_manager().get, True)
+        try:
+            yield
+        finally:
+            await batcher.close()
+
+    app = FastAPI(
+        title=f"{settings.app_name} inference", version=settings.app_version, lifespan=lifespan
+    )
+    app.state.batcher = batcher
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "ok", "batches": batcher.batches, "items": batcher.items}
+
+    @app.post("/classify", response_model=ClassifyResponse)
+    async def classify_texts(req: ClassifyRequest):
+        return {"results": await batcher.submit(req.texts)}
+
+    return app
+
+
+app = create_inference_app()
@@ -0,0 +1,340 @@
+"""Per-client admission control (token buckets + concurrency caps).
+
+Clients are identified by their API key (``X-API-Key`` or a bearer token) when
+it is one of ``ADMISSION_API_KEYS``; anything else is keyed by client IP, read
+from ``X-Forwarded-For`` only when the peer is one of
+``ADMISSION_TRUSTED_PROXIES``, so a client cannot get a fresh bucket by
+inventing keys or forwarding headers. Every work-producing request (anything but
+GET/HEAD/OPTIONS) takes tokens from the client's bucket according to its cost:
+the number of texts for ``/api/batch``, the upload size for file uploads and a
+multiplier when GPT replies are enabled. Requests that do not fit are rejected
+right away with 429 and ``Retry-After`` instead of queueing behind everyone
+else.
+
+Buckets live in memory by default; ``SQLiteBucketStore`` keeps them in a local
+SQLite file so that several workers on the same host share the same limits.
+Buckets idle long enough to have refilled are pruned, since a full bucket is
+the same as no bucket. Concurrency caps are always per process.
+"""
+
+import asyncio
+import hashlib
+import ipaddress
+import json
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+
+from ..config.settings import get_settings
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+
+EXEMPT_METHODS = {"GET", "HEAD", "OPTIONS"}
+COUNTED_PATHS = {"/api/batch"}
+PRUNE_INTERVAL_SECONDS = 60.0
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def _idle_ttl(rate: float, burst: float) -> Optional[float]:
+    """Seconds after which an untouched bucket is full again; ``None`` if it never refills."""
+    return burst / rate if rate > 0 else None
+
+
+class InMemoryBucketStore:
+    blocking = False
+
+    def __init__(self) -> None:
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._pruned = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """Take ``cost`` tokens; return 0 on success or the seconds until they are available."""
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now, rate, burst)
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (cost - tokens) / rate if rate > 0 else math.inf
+
+    def _prune(self, now: float, rate: float, burst: float) -> None:
+        ttl = _idle_ttl(rate, burst)
+        if ttl is None or now - self._pruned < PRUNE_INTERVAL_SECONDS:
+            return
+        self._pruned = now
+        expired = [key for key, (_, updated) in self._buckets.items() if now - updated >= ttl]
+        for key in expired:
+            del self._buckets[key]
+
+
+class SQLiteBucketStore:
+    """Buckets shared by every process that points at the same database file."""
+
+    blocking = True
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._pruned = time.time()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS buckets_updated ON buckets (updated)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        # Wall-clock time: monotonic clocks are not comparable across processes.
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + max(now - updated, 0.0) * rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate if rate > 0 else math.inf
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            ttl = _idle_ttl(rate, burst)
+            if ttl is not None and now - self._pruned >= PRUNE_INTERVAL_SECONDS:
+                self._pruned = now
+                conn.execute("DELETE FROM buckets WHERE updated <= ?", (now - ttl,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers") or ():
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _digest(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def parse_api_keys(value: str) -> FrozenSet[str]:
+    """Digests of the comma-separated keys in ``ADMISSION_API_KEYS``."""
+    return frozenset(_digest(key.strip()) for key in (value or "").split(",") if key.strip())
+
+
+def parse_networks(value: str) -> Tuple[Network, ...]:
+    """Networks from a comma-separated list of addresses or CIDRs; ``*`` trusts any peer."""
+    networks = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if item == "*":
+            networks += [ipaddress.ip_network("0.0.0.0/0"), ipaddress.ip_network("::/0")]
+        elif item:
+            networks.append(ipaddress.ip_network(item, strict=False))
+    return tuple(networks)
+
+
+def _trusted(address: str, proxies: Sequence[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def client_ip(scope: Scope, trusted_proxies: Sequence[Network] = ()) -> str:
+    """Peer address, or the first untrusted hop of ``X-Forwarded-For`` behind a trusted proxy."""
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if not _trusted(peer, trusted_proxies):
+        return peer
+    hops = [hop.strip() for hop in (_header(scope, b"x-forwarded-for") or "").split(",") if hop.strip()]
+    # Walk from the nearest hop: entries left of the first untrusted one can be forged.
+    for hop in reversed(hops):
+        if not _trusted(hop, trusted_proxies):
+            return hop
+    return hops[0] if hops else peer
+
+
+def client_key(
+    scope: Scope,
+    api_keys: FrozenSet[str] = frozenset(),
+    trusted_proxies: Sequence[Network] = (),
+) -> str:
+    api_key = _header(scope, b"x-api-key")
+    if not api_key:
+        authorization = _header(scope, b"authorization") or ""
+        if authorization.lower().startswith("bearer "):
+            api_key = authorization[7:].strip()
+    if api_key:
+        digest = _digest(api_key)
+        if digest in api_keys:
+            return "key:" + digest[:16]
+    return "ip:" + client_ip(scope, trusted_proxies)
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self,
+        app: Callable,
+        store: Optional[Any] = None,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_concurrent: Optional[int] = None,
+        bytes_per_token: Optional[int] = None,
+        gpt_cost_multiplier: Optional[float] = None,
+        api_keys: Optional[str] = None,
+        trusted_proxies: Optional[str] = None,
+    ) -> None:
+        settings = get_settings()
+        self.app = app
+        if store is None:
+            store = (
+                SQLiteBucketStore(settings.admission_store_path)
+                if settings.admission_store_path
+                else InMemoryBucketStore()
+            )
+        self.store = store
+        self.rate = settings.admission_rate if rate is None else rate
+        self.burst = settings.admission_burst if burst is None else burst
+        self.max_concurrent = (
+            settings.admission_max_concurrent if max_concurrent is None else max_concurrent
+        )
+        self.bytes_per_token = max(
+            settings.admission_bytes_per_token if bytes_per_token is None else bytes_per_token, 1
+        )
+        self.gpt_cost_multiplier = (
+            settings.admission_gpt_cost_multiplier
+            if gpt_cost_multiplier is None
+            else gpt_cost_multiplier
+        )
+        self.api_keys = parse_api_keys(
+            settings.admission_api_keys if api_keys is None else api_keys
+        )
+        self.trusted_proxies = parse_networks(
+            settings.admission_trusted_proxies if trusted_proxies is None else trusted_proxies
+        )
+        self.max_buffered_bytes = settings.max_upload_mb * 1024 * 1024
+        self._inflight: Dict[str, int] = {}
+
+    async def __call__(self, scope: Scope, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["method"] in EXEMPT_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        key = client_key(scope, self.api_keys, self.trusted_proxies)
+        # Check and claim the slot with no await in between, so concurrent
+        # requests cannot all pass the check before any of them is counted.
+        if self.max_concurrent > 0 and self._inflight.get(key, 0) >= self.max_concurrent:
+            await self._reject(send, 1.0)
+            return
+        self._inflight[key] = self._inflight.get(key, 0) + 1
+        try:
+            items = None
+            if scope["path"] in COUNTED_PATHS:
+                items, receive = await self._count_items(receive)
+            cost = self.cost(scope, items)
+            if self.store.blocking:
+                wait = await asyncio.to_thread(self.store.take, key, cost, self.rate, self.burst)
+            else:
+                wait = self.store.take(key, cost, self.rate, self.burst)
+            if wait > 0:
+                await self._reject(send, wait)
+                return
+            await self.app(scope, receive, send)
+        finally:
+            remaining = self._inflight[key] - 1
+            if remaining:
+                self._inflight[key] = remaining
+            else:
+                del self._inflight[key]
+
+    def cost(self, scope: Scope, items: Optional[int]) -> float:
+        if items is not None:
+            cost = float(max(items, 1))
+        else:
+            try:
+                length = int(_header(scope, b"content-length") or 0)
+            except ValueError:
+                length = 0
+            cost = max(1.0, length / self.bytes_per_token)
+        if get_settings().openai_api_key:
+            cost *= self.gpt_cost_multiplier
+        # A single request may drain the bucket but never needs more than all of it.
+        return min(cost, self.burst)
+
+    async def _count_items(self, receive: Callable) -> Tuple[Optional[int], Callable]:
+        """Read the JSON body to count its texts, then replay it to the app."""
+        messages: List[Message] = []
+        size = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            size += len(message.get("body", b""))
+            if not message.get("more_body") or size > self.max_buffered_bytes:
+                break
+
+        items = None
+        if messages[-1].get("type") == "http.request" and not messages[-1].get("more_body"):
+            try:
+                payload = json.loads(b"".join(m.get("body", b"") for m in messages))
+                texts = payload.get("texts") if isinstance(payload, dict) else None
+                items = len(texts) if isinstance(texts, list) else None
+            except ValueError:
+                items = None
+
+        async def replay() -> Message:
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        return items, replay
+
+    async def _reject(self, send: Callable, wait: float) -> None:
+        retry_after = max(1, math.ceil(min(wait, 3600)))
+        body = json.dumps(
+            {"detail": f"Limite de requisicoes excedido. Tente novamente em {retry_after} s."}
+        ).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"retry-after", str(retry_after).encode("ascii")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,95 @@
+"""Request body size limit enforced while the body streams in.
+
+A ``Content-Length`` over the limit is answered with 413 before any byte of
+the body is read. Other bodies (chunked uploads, or clients that send more
+than they announced) are counted as they are received and cut off with 413 at
+the first chunk over the limit. Memory per request is therefore bounded by the
+limit, not by what the client sends; multipart files above 1 MB are spooled to
+disk by the form parser.
+"""
+
+import json
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from ..config.settings import get_settings
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+
+# Room for multipart boundaries and the small form fields next to the file.
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+def _content_length(scope: Scope) -> Optional[int]:
+    for key, value in scope.get("headers") or ():
+        if key == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+class BodyLimitMiddleware:
+    def __init__(self, app: Callable, max_bytes: Optional[int] = None) -> None:
+        self.app = app
+        settings = get_settings()
+        self.max_bytes = (
+            settings.max_upload_mb * 1024 * 1024 + FORM_OVERHEAD_BYTES
+            if max_bytes is None
+            else max_bytes
+        )
+        self.detail = f"Payload excede o limite de {settings.max_upload_mb} MB."
+
+    async def __call__(self, scope: Scope, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        length = _content_length(scope)
+        if length is not None and length > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing as they are.
+                    raise HTTPException(status_code=413, detail=self.detail)
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as exc:
+            # Raised outside the routes (e.g. while another middleware buffers the body).
+            if exc.status_code != 413 or started:
+                raise
+            await self._reject(send)
+
+    async def _reject(self, send: Callable) -> None:
+        body = json.dumps({"detail": self.detail}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,121 @@
+"""Response compression negotiated through ``Accept-Encoding``.
+
+HTML pages, fragments, JSON and other text bodies of at least
+``COMPRESSION_MIN_BYTES`` are encoded with the best codec the client accepts.
+Responses that already carry a ``Content-Encoding`` (precompressed static
+assets, reports served from their precompressed copies), partial content
+and non-text types pass through untouched. Streamed bodies are compressed
+chunk by chunk, so they keep streaming. Bodies or chunks of at least
+``OFFLOAD_BYTES`` are compressed in a worker thread so a large batch response
+does not stall the event loop.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config.settings import get_settings
+from ..services.compression import StreamCompressor, compress, is_compressible, negotiate
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+Headers = List[Tuple[bytes, bytes]]
+
+OFFLOAD_BYTES = 256 * 1024
+
+
+def _get(headers: Headers, name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _without(headers: Headers, *names: bytes) -> Headers:
+    return [(key, value) for key, value in headers if key.lower() not in names]
+
+
+def _add_vary(headers: Headers) -> Headers:
+    vary = _get(headers, b"vary")
+    if vary and "accept-encoding" in vary.lower():
+        return headers
+    value = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+    return _without(headers, b"vary") + [(b"vary", value.encode("latin-1"))]
+
+
+class CompressionMiddleware:
+    def __init__(self, app: Callable, minimum_size: Optional[int] = None) -> None:
+        self.app = app
+        self.minimum_size = (
+            get_settings().compression_min_bytes if minimum_size is None else minimum_size
+        )
+
+    async def __call__(self, scope: Scope, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        for key, value in scope.get("headers") or ():
+            if key == b"accept-encoding":
+                encoding = negotiate(value.decode("latin-1"))
+                break
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def compressing_send(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = list(message.get("headers") or [])
+                passthrough = (
+                    message["status"] in (204, 206, 304)
+                    or _get(headers, b"content-encoding") is not None
+                    or not is_compressible(_get(headers, b"content-type") or "")
+                )
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if compressor is None:
+                assert start is not None
+                headers = list(start.get("headers") or [])
+                if not more and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                headers = _add_vary(_without(headers, b"content-length"))
+                etag = _get(headers, b"etag")
+                if etag and not etag.startswith("W/"):
+                    # The encoded bytes differ from the ones the strong ETag named.
+                    headers = _without(headers, b"etag") + [(b"etag", f"W/{etag}".encode("latin-1"))]
+                headers.append((b"content-encoding", encoding.encode("ascii")))
+                if not more:
+                    if len(body) >= OFFLOAD_BYTES:
+                        data = await asyncio.to_thread(compress, body, encoding)
+                    else:
+                        data = compress(body, encoding)
+                    headers.append((b"content-length", str(len(data)).encode("ascii")))
+                    await send({**start, "headers": headers})
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                compressor = StreamCompressor(encoding)
+                await send({**start, "headers": headers})
+            if len(body) >= OFFLOAD_BYTES:
+                data = await asyncio.to_thread(compressor.compress, body)
+            else:
+                data = compressor.compress(body) if body else b""
+            if not more:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, compressing_send)
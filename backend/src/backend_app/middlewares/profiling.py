@@ -0,0 +1,54 @@
+"""Opt-in per-request profiling (``X-Profile: 1`` plus the admin token).
+
+Only the routes in ``PROFILED_PATHS`` are profiled. The profile stops when the
+response starts; its summary is added as ``X-Profile-*`` headers and the full
+report is kept for ``GET /admin/profiles/{id}``.
+"""
+
+from typing import Any, Callable, Dict
+
+from ..services.profiling import RequestProfile, store_profile
+from ..services.security import admin_token_valid
+
+PROFILED_PATHS = {"/api/process", "/api/batch", "/process", "/batch_upload"}
+
+
+def _header(scope: Dict[str, Any], name: bytes) -> str:
+    for key, value in scope.get("headers") or ():
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"] not in PROFILED_PATHS
+            or _header(scope, b"x-profile").lower() not in ("1", "true", "yes")
+            or not admin_token_valid(_header(scope, b"x-admin-token"))
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(f"{scope['method']} {scope['path']}").start()
+
+        async def send_with_profile(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                profile.stop()
+                store_profile(profile)
+                headers = list(message.get("headers") or [])
+                headers.extend(
+                    (name.lower().encode("latin-1"), value.encode("latin-1", "replace"))
+                    for name, value in profile.headers().items()
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profile.stop()
@@ -0,0 +1,75 @@
+"""Lightweight result records for hot paths.
+
+``ClassificationResult`` is the single object produced per email: it is
+created by the classifier, completed with the reply and text hash, and passed
+unchanged through auditing, reporting and the API. ``ProcessRecord`` mirrors
+``ProcessResponse`` field for field so the API can serialize results directly
+instead of constructing and re-validating Pydantic models for every item.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, TypedDict, Union
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    from fastapi.responses import JSONResponse as FastJSONResponse
+
+
+class ProcessRecord(TypedDict):
+    primary_category: str
+    overall_category: str
+    confidence: float
+    engine: str
+    reply: str
+    text_hash: str
+    degradations: List[str]
+
+
+@dataclass(slots=True)
+class ClassificationResult:
+    primary_category: str
+    overall_category: str
+    confidence: float
+    engine: str
+    reply: str = ""
+    text_hash: str = ""
+    arquivo: str = ""
+    degradations: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_record(self) -> ProcessRecord:
+        return {
+            "primary_category": self.primary_category,
+            "overall_category": self.overall_category,
+            "confidence": float(self.confidence),
+            "engine": self.engine or "unknown",
+            "reply": self.reply or "",
+            "text_hash": self.text_hash,
+            "degradations": list(self.degradations),
+        }
+
+
+def to_process_record(item: Union[ClassificationResult, Mapping[str, Any]]) -> ProcessRecord:
+    if isinstance(item, ClassificationResult):
+        return item.to_record()
+    return {
+        "primary_category": item.get("primary_category"),
+        "overall_category": item.get("overall_category"),
+        "confidence": float(item.get("confidence", 0)),
+        "engine": item.get("engine") or "unknown",
+        "reply": item.get("reply") or "",
+        "text_hash": item.get("text_hash") or "",
+        "degradations": list(item.get("degradations") or []),
+    }
+
+
+__all__ = [
+    "ClassificationResult",
+    "FastJSONResponse",
+    "ProcessRecord",
+    "to_process_record",
+]
@@ -1,10 +1,13 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
 
 class ProcessRequest(BaseModel):
     text: str = Field(..., description="Email body text")
+    timeout_ms: Optional[float] = Field(
+        None, description="Time budget in milliseconds (overrides X-Request-Timeout)"
+    )
 
 
 class ProcessResponse(BaseModel):
@@ -14,10 +17,17 @@ class ProcessResponse(BaseModel):
     engine: str
     reply: str
     text_hash: str
+    degradations: List[str] = Field(
+        default_factory=list,
+        description="Cheaper paths taken to meet the deadline (heuristic_classifier, template_reply)",
+    )
 
 
 class BatchProcessRequest(BaseModel):
     texts: List[str] = Field(..., description="List of email body texts")
+    timeout_ms: Optional[float] = Field(
+        None, description="Time budget in milliseconds for the whole batch"
+    )
 
 
 class BatchProcessResponse(BaseModel):
@@ -0,0 +1,65 @@
+"""Fingerprinted, precompressed static assets.
+
+At startup every file under the static directories is hashed and published as
+``/static/<dir>/<name>.<hash><suffix>``. The content behind such a URL never
+changes, so it is served with a one-year ``immutable`` cache lifetime, and a
+new deploy with different content gets new URLs. Compressible files are
+encoded once per supported codec when the catalog is built; requests only pick
+the variant matching ``Accept-Encoding``.
+"""
+
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .compression import available_encodings, compress, is_compressible
+
+STATIC_PREFIX = "/static"
+HASH_LENGTH = 12
+
+
+@dataclass
+class Asset:
+    content: bytes
+    media_type: str
+    etag: str
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+
+class AssetCatalog:
+    def __init__(self, root: Path, directories: Iterable[str]) -> None:
+        self.root = Path(root)
+        self._urls: Dict[str, str] = {}
+        self._assets: Dict[str, Asset] = {}
+        for directory in directories:
+            for path in sorted((self.root / directory).rglob("*")):
+                if path.is_file() and not path.name.startswith("."):
+                    self._add(path)
+
+    def _add(self, path: Path) -> None:
+        content = path.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+        relative = path.relative_to(self.root).as_posix()
+        stem, dot, suffix = relative.rpartition(".")
+        hashed = f"{stem}.{digest}.{suffix}" if dot and "/" not in suffix else f"{relative}.{digest}"
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        asset = Asset(content=content, media_type=media_type, etag=f'"{digest}"')
+        if is_compressible(media_type):
+            for encoding in available_encodings():
+                encoded = compress(content, encoding)
+                if len(encoded) < len(content):
+                    asset.encoded[encoding] = encoded
+        self._urls[relative] = f"{STATIC_PREFIX}/{hashed}"
+        self._assets[hashed] = asset
+
+    def url(self, relative: str) -> str:
+        """Fingerprinted URL for ``relative`` (e.g. ``styles/style.css``)."""
+        try:
+            return self._urls[relative.lstrip("/")]
+        except KeyError:
+            raise KeyError(f"Unknown static asset: {relative}") from None
+
+    def get(self, hashed: str) -> Optional[Asset]:
+        return self._assets.get(hashed)
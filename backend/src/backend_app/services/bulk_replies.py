@@ -0,0 +1,244 @@
+"""GPT replies for large offline jobs through the provider's batch interface.
+
+Instead of one chat completion per email, ``BulkReplyClient`` writes every
+prompt of a job to a JSONL request file (``custom_id`` is the text hash, so
+repeated emails are asked once), uploads it to ``/files``, creates a
+``/batches`` job. ``BulkReplyJob`` tracks the batches of one group of rows and
+is polled without blocking, so a caller can keep submitting groups while
+earlier ones run, and it can be rebuilt from stored batch ids to resume
+polling instead of paying for a job twice. Replies are merged back into the
+rows by text hash; rows whose request failed, expired or never ran keep the
+template reply. ``OPENAI_BASE_URL`` points the client at any server exposing
+the same endpoints.
+"""
+
+import json
+import logging
+import tempfile
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import httpx
+
+from ..config.settings import get_settings
+from ..models.records import ClassificationResult
+from .nlp import REPLY_MODEL, REPLY_PARAMS, build_reply_messages, build_template_reply
+
+logger = logging.getLogger("backend_app.bulk_replies")
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+# Provider limit on requests per batch job.
+MAX_REQUESTS_PER_BATCH = 50_000
+TERMINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+Messages = List[Dict[str, str]]
+
+
+class BulkReplyError(RuntimeError):
+    """The batch job could not be submitted or its results could not be read."""
+
+
+class BulkReplyClient:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        poll_interval: float = 30.0,
+        timeout: float = 24 * 3600.0,
+        client: Optional[httpx.Client] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if client is None:
+            client = httpx.Client(
+                base_url=base_url or DEFAULT_BASE_URL,
+                headers={"Authorization": f"Bearer {api_key}"},
+                timeout=120.0,
+            )
+        self._client = client
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.sleep = sleep
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        try:
+            resp = self._client.request(method, path, **kwargs)
+            resp.raise_for_status()
+        except httpx.HTTPError as exc:
+            raise BulkReplyError(f"{method} {path} failed: {exc}") from exc
+        return resp
+
+    def submit(self, prompts: Mapping[str, Messages]) -> str:
+        """Upload one request file and create a batch job; returns the batch id."""
+        with tempfile.TemporaryFile() as handle:
+            for custom_id, messages in prompts.items():
+                line = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": COMPLETIONS_ENDPOINT,
+                    "body": {"model": REPLY_MODEL, "messages": messages, **REPLY_PARAMS},
+                }
+                handle.write(json.dumps(line, ensure_ascii=False).encode("utf-8") + b"\n")
+            handle.seek(0)
+            uploaded = self._request(
+                "POST",
+                "/files",
+                data={"purpose": "batch"},
+                files={"file": ("replies.jsonl", handle, "application/jsonl")},
+            ).json()
+        batch = self._request(
+            "POST",
+            "/batches",
+            json={
+                "input_file_id": uploaded["id"],
+                "endpoint": COMPLETIONS_ENDPOINT,
+                "completion_window": "24h",
+            },
+        ).json()
+        logger.info("Submitted bulk reply batch %s with %d requests", batch["id"], len(prompts))
+        return batch["id"]
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"/batches/{batch_id}").json()
+
+    def cancel(self, batch_id: str) -> Dict[str, Any]:
+        return self._request("POST", f"/batches/{batch_id}/cancel").json()
+
+    def fetch_replies(self, batch: Mapping[str, Any]) -> Dict[str, str]:
+        """Replies by ``custom_id`` from the batch output; failed requests are absent."""
+        file_id = batch.get("output_file_id")
+        if not file_id:
+            return {}
+        content = self._request("GET", f"/files/{file_id}/content").text
+        replies: Dict[str, str] = {}
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                reply = response["body"]["choices"][0]["message"]["content"].strip()
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                continue
+            if reply:
+                replies[entry["custom_id"]] = reply
+        return replies
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def _prompts(rows: Sequence[Tuple[ClassificationResult, str]]) -> Dict[str, Messages]:
+    prompts: Dict[str, Messages] = {}
+    for result, text in rows:
+        if result.text_hash and result.text_hash not in prompts:
+            prompts[result.text_hash] = build_reply_messages(text, result.primary_category)
+    return prompts
+
+
+class BulkReplyJob:
+    """The batch jobs answering one group of ``(result, text)`` rows.
+
+    New groups are submitted on creation; passing ``batch_ids`` attaches to
+    jobs submitted earlier (e.g. by a run that was interrupted) instead.
+    """
+
+    def __init__(
+        self,
+        client: BulkReplyClient,
+        rows: Sequence[Tuple[ClassificationResult, str]],
+        batch_ids: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.client = client
+        self.rows = list(rows)
+        self.batch_ids = list(batch_ids) if batch_ids is not None else self._submit()
+        self._ended: Dict[str, Dict[str, Any]] = {}
+        self._give_up_at = time.monotonic() + client.timeout
+
+    def _submit(self) -> List[str]:
+        items = list(_prompts(self.rows).items())
+        batch_ids: List[str] = []
+        try:
+            for start in range(0, len(items), MAX_REQUESTS_PER_BATCH):
+                batch_ids.append(
+                    self.client.submit(dict(items[start:start + MAX_REQUESTS_PER_BATCH]))
+                )
+        except (BulkReplyError, ValueError, KeyError) as exc:
+            logger.warning("Bulk reply submission failed, keeping template replies: %s", exc)
+        return batch_ids
+
+    def poll(self) -> bool:
+        """Check every running batch once; ``True`` when all of them have ended.
+
+        Past the client timeout, running batches are cancelled and treated as ended.
+        """
+        expired = time.monotonic() >= self._give_up_at
+        for batch_id in self.batch_ids:
+            if batch_id in self._ended:
+                continue
+            try:
+                batch = self.client.status(batch_id)
+                if batch.get("status") not in TERMINAL_STATES and expired:
+                    logger.warning(
+                        "Bulk reply batch %s still %s, cancelling", batch_id, batch.get("status")
+                    )
+                    batch = self.client.cancel(batch_id)
+            except (BulkReplyError, ValueError) as exc:
+                logger.warning("Could not check bulk reply batch %s: %s", batch_id, exc)
+                if not expired:
+                    continue
+                batch = {"id": batch_id, "status": "failed"}
+            if batch.get("status") in TERMINAL_STATES or expired:
+                self._ended[batch_id] = batch
+        return len(self._ended) == len(self.batch_ids)
+
+    def merge(self) -> int:
+        """Fill in the replies of ended batches; returns the rows answered by them."""
+        replies: Dict[str, str] = {}
+        for batch_id in self.batch_ids:
+            batch = self._ended.get(batch_id, {})
+            if batch.get("status") != "completed":
+                logger.warning("Bulk reply batch %s ended as %s", batch_id, batch.get("status"))
+            try:
+                replies.update(self.client.fetch_replies(batch))
+            except BulkReplyError as exc:
+                logger.warning("Could not read bulk reply batch %s: %s", batch_id, exc)
+        answered = 0
+        for result, text in self.rows:
+            reply = replies.get(result.text_hash)
+            if reply:
+                result.reply = reply
+                answered += 1
+            elif not result.reply:
+                result.reply = build_template_reply(result.primary_category, text)
+        return answered
+
+
+def apply_bulk_replies(
+    rows: Sequence[Tuple[ClassificationResult, str]], client: BulkReplyClient
+) -> int:
+    """Fill in replies for ``(result, text)`` rows from one batch job, waiting for it.
+
+    Rows without a reply from the batch get the template reply. Returns the
+    number of rows answered by the batch.
+    """
+    job = BulkReplyJob(client, rows)
+    while not job.poll():
+        client.sleep(client.poll_interval)
+    return job.merge()
+
+
+@lru_cache()
+def get_bulk_reply_client() -> Optional[BulkReplyClient]:
+    settings = get_settings()
+    if not settings.openai_api_key:
+        return None
+    return BulkReplyClient(
+        settings.openai_api_key,
+        base_url=settings.openai_base_url,
+        poll_interval=settings.bulk_reply_poll_seconds,
+        timeout=settings.bulk_reply_timeout_seconds,
+    )
@@ -0,0 +1,139 @@
+"""Content-Encoding negotiation and codecs shared by responses, assets and reports.
+
+gzip is always available; zstd and brotli are used when the optional
+``zstandard`` and ``brotli`` packages are installed.
+"""
+
+import gzip
+import shutil
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Sequence
+
+try:  # optional
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:  # optional
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+FILE_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "br": ".br"}
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "image/svg+xml",
+)
+
+
+def available_encodings() -> List[str]:
+    """Supported encodings, most preferred first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    return encodings + ["gzip"]
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate(header: str, offered: Optional[Sequence[str]] = None) -> Optional[str]:
+    """Pick the encoding for ``Accept-Encoding``; ``None`` means identity."""
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoding in offered if offered is not None else available_encodings():
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    return (content_type or "").lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        # mtime=0 keeps the output stable, so precompressed files can be compared.
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=5)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_file(source: Path, target: Path, encoding: str) -> None:
+    """Write ``source`` encoded to ``target`` in chunks, at a high compression level.
+
+    Meant for files compressed once and served many times.
+    """
+    with Path(source).open("rb") as src, Path(target).open("wb") as dst:
+        _copy_encoded(src, dst, encoding)
+
+
+def _copy_encoded(src: BinaryIO, dst: BinaryIO, encoding: str) -> None:
+    if encoding == "gzip":
+        with gzip.GzipFile(filename="", mode="wb", fileobj=dst, compresslevel=9, mtime=0) as out:
+            shutil.copyfileobj(src, out, 1024 * 1024)
+    elif encoding == "zstd" and zstandard is not None:
+        zstandard.ZstdCompressor(level=12).copy_stream(src, dst)
+    elif encoding == "br" and brotli is not None:
+        compressor = brotli.Compressor(quality=9)
+        for chunk in iter(lambda: src.read(1024 * 1024), b""):
+            dst.write(compressor.process(chunk))
+        dst.write(compressor.finish())
+    else:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class StreamCompressor:
+    """Incremental encoder for streamed bodies; every chunk is flushed as it goes."""
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._gzip = zlib.compressobj(6, zlib.DEFLATED, 31)
+        elif encoding == "zstd" and zstandard is not None:
+            self._zstd = zstandard.ZstdCompressor(level=3).compressobj()
+        elif encoding == "br" and brotli is not None:
+            self._brotli = brotli.Compressor(quality=5)
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "gzip":
+            return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "zstd":
+            return self._zstd.compress(data) + self._zstd.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._brotli.process(data) + self._brotli.flush()
+
+    def finish(self) -> bytes:
+        if self.encoding == "gzip":
+            return self._gzip.flush(zlib.Z_FINISH)
+        if self.encoding == "zstd":
+            return self._zstd.flush()
+        return self._brotli.finish()
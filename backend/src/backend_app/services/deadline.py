@@ -0,0 +1,66 @@
+"""Per-request deadlines shared by every stage of the pipeline.
+
+The deadline lives in a context variable, so it follows the request into
+spawned tasks and ``asyncio.to_thread`` calls without being passed around.
+Stages ask for the remaining budget and degrade to cheaper paths (heuristic
+classifier, template replies) once it runs out.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from ..config.settings import get_settings
+
+DEGRADED_CLASSIFIER = "heuristic_classifier"
+DEGRADED_REPLY = "template_reply"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def resolve_timeout(requested_ms: Optional[float] = None) -> Optional[float]:
+    """Return the request budget in seconds, applying the configured default and cap."""
+    settings = get_settings()
+    timeout_ms = requested_ms if requested_ms and requested_ms > 0 else settings.request_timeout_ms
+    cap = settings.max_request_timeout_ms
+    # The cap bounds deadlines that exist; it does not create one when the default is off.
+    if cap > 0 and timeout_ms > cap:
+        timeout_ms = cap
+    return timeout_ms / 1000 if timeout_ms > 0 else None
+
+
+def parse_timeout_header(value: Optional[str]) -> Optional[float]:
+    """Parse ``X-Request-Timeout`` (milliseconds); invalid values are ignored."""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+@contextmanager
+def request_deadline(timeout: Optional[float]) -> Iterator[None]:
+    """Bound the work inside the block by ``timeout`` seconds (never extends an outer deadline)."""
+    if timeout is None:
+        yield
+        return
+    deadline = time.monotonic() + max(timeout, 0.0)
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or ``None`` without one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def expired() -> bool:
+    budget = remaining()
+    return budget is not None and budget <= 0
@@ -0,0 +1,204 @@
+"""Near-duplicate index used to reuse results for repetitive emails.
+
+Each preprocessed text is reduced to a 64-bit SimHash over word shingles (with
+digits masked, so protocol numbers and dates do not matter). Signatures are
+split into ``m`` blocks, each indexed in its own table (multi-index hashing):
+two signatures within ``max_distance`` bits differ in at most
+``max_distance // m`` bits of some block, so a lookup probes every block key
+within that radius and only compares against the entries found there. The
+block count is picked from the capacity so that blocks are wide enough for
+buckets to stay small (about one entry) however full the index gets, while
+keeping the number of probes low; lookups never scan the whole index.
+"""
+
+import copy
+import dataclasses
+import hashlib
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import combinations
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from ..config.settings import get_settings
+
+SIGNATURE_BITS = 64
+SHINGLE_SIZE = 3
+MIN_TOKENS = 8
+
+_TOKEN_RE = re.compile(r"\w+")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _tokens(text: str) -> List[str]:
+    normalized = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    normalized = _DIGITS_RE.sub("0", normalized.lower())
+    return _TOKEN_RE.findall(normalized)
+
+
+def simhash(text: str) -> Optional[int]:
+    """Return the SimHash of ``text`` or ``None`` when it is too short to compare."""
+    tokens = _tokens(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    counts: Dict[str, int] = {}
+    for i in range(len(tokens) - SHINGLE_SIZE + 1):
+        shingle = " ".join(tokens[i : i + SHINGLE_SIZE])
+        counts[shingle] = counts.get(shingle, 0) + 1
+
+    weights = [0] * SIGNATURE_BITS
+    for shingle, count in counts.items():
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(SIGNATURE_BITS):
+            if value >> bit & 1:
+                weights[bit] += count
+            else:
+                weights[bit] -= count
+
+    signature = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            signature |= 1 << bit
+    return signature
+
+
+def _blocks(count: int) -> List[Tuple[int, int]]:
+    """``(offset, width)`` of ``count`` blocks covering the signature as evenly as possible."""
+    width, extra = divmod(SIGNATURE_BITS, count)
+    blocks, offset = [], 0
+    for i in range(count):
+        size = width + (1 if i < extra else 0)
+        blocks.append((offset, size))
+        offset += size
+    return blocks
+
+
+def _flip_masks(width: int, radius: int) -> List[int]:
+    """XOR masks for every key within ``radius`` bits of a ``width``-bit key."""
+    masks = [0]
+    for flipped in range(1, radius + 1):
+        for bits in combinations(range(width), flipped):
+            masks.append(sum(1 << bit for bit in bits))
+    return masks
+
+
+def _choose_block_count(capacity: int, max_distance: int) -> int:
+    """Block count with the lowest expected lookup cost for a full index.
+
+    Cost is estimated as probes per lookup times (1 + expected bucket size):
+    fewer, wider blocks mean near-empty buckets but more probes per block.
+    """
+    best, best_cost = 1, math.inf
+    for count in range(1, max_distance + 2):
+        radius = max_distance // count
+        cost = 0.0
+        for _, width in _blocks(count):
+            probes = sum(math.comb(width, flipped) for flipped in range(radius + 1))
+            cost += probes * (1 + capacity / 2 ** width)
+        if cost < best_cost:
+            best, best_cost = count, cost
+    return best
+
+
+def _copy_payload(payload: Any) -> Any:
+    """Copy ``payload`` without sharing its mutable ``degradations`` list."""
+    if dataclasses.is_dataclass(payload) and not isinstance(payload, type):
+        return dataclasses.replace(payload, degradations=list(payload.degradations))
+    return copy.copy(payload)
+
+
+class NearDuplicateIndex:
+    """Bounded LRU of recent results addressable by SimHash similarity."""
+
+    def __init__(self, capacity: int, threshold: float, ttl_seconds: float) -> None:
+        self.capacity = max(capacity, 1)
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max(0, min(SIGNATURE_BITS - 1, int((1 - threshold) * SIGNATURE_BITS)))
+        block_count = _choose_block_count(self.capacity, self.max_distance)
+        self.probe_radius = self.max_distance // block_count
+        self._bands: List[Tuple[int, int]] = []
+        self._probes: List[List[int]] = []
+        for offset, size in _blocks(block_count):
+            self._bands.append((offset, (1 << size) - 1))
+            self._probes.append(_flip_masks(size, self.probe_radius))
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in self._bands]
+        self._entries: "OrderedDict[int, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, text: str) -> Optional[int]:
+        return simhash(text)
+
+    def _band_keys(self, signature: int) -> Iterator[Tuple[int, int]]:
+        for band, (offset, mask) in enumerate(self._bands):
+            yield band, signature >> offset & mask
+
+    def _candidates(self, signature: int) -> Set[int]:
+        candidates: Set[int] = set()
+        for band, key in self._band_keys(signature):
+            buckets = self._buckets[band]
+            for flip in self._probes[band]:
+                bucket = buckets.get(key ^ flip)
+                if bucket:
+                    candidates.update(bucket)
+        return candidates
+
+    def _remove(self, signature: int) -> None:
+        self._entries.pop(signature, None)
+        for band, key in self._band_keys(signature):
+            bucket = self._buckets[band].get(key)
+            if bucket is None:
+                continue
+            bucket.discard(signature)
+            if not bucket:
+                del self._buckets[band][key]
+
+    def lookup(self, signature: int) -> Optional[Any]:
+        """Return a copy of the closest stored payload within ``max_distance``."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = self._candidates(signature)
+            best: Optional[int] = None
+            best_distance = self.max_distance + 1
+            for candidate in candidates:
+                stored_at, _ = self._entries[candidate]
+                if self.ttl_seconds and now - stored_at > self.ttl_seconds:
+                    self._remove(candidate)
+                    continue
+                distance = bin(candidate ^ signature).count("1")
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+            if best is None:
+                return None
+            self._entries.move_to_end(best)
+            return _copy_payload(self._entries[best][1])
+
+    def add(self, signature: int, payload: Any) -> None:
+        with self._lock:
+            if signature in self._entries:
+                self._remove(signature)
+            self._entries[signature] = (time.monotonic(), _copy_payload(payload))
+            for band, key in self._band_keys(signature):
+                self._buckets[band].setdefault(key, set()).add(signature)
+            while len(self._entries) > self.capacity:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+
+@lru_cache()
+def get_near_duplicate_index() -> Optional[NearDuplicateIndex]:
+    settings = get_settings()
+    if not settings.near_duplicate_enabled:
+        return None
+    return NearDuplicateIndex(
+        capacity=settings.near_duplicate_capacity,
+        threshold=settings.near_duplicate_threshold,
+        ttl_seconds=settings.near_duplicate_ttl_seconds,
+    )
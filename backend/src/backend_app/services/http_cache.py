@@ -0,0 +1,22 @@
+"""Conditional request helpers shared by the report and asset routes."""
+
+from typing import Optional
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """``If-None-Match`` check using weak comparison (RFC 9110, section 13.1.2).
+
+    The header is a comma-separated list of entity tags, or ``*`` for any
+    current representation; whole tags are compared, ignoring ``W/``.
+    """
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = _opaque(etag)
+    return any(_opaque(tag) == current for tag in if_none_match.split(","))
@@ -0,0 +1,124 @@
+"""Client for the standalone inference service (``INFERENCE_URL``).
+
+``INFERENCE_URL`` is either ``http://host:port`` or ``unix:///path/to.sock``.
+One pooled ``httpx.Client`` is shared by the worker threads of the process.
+When a call fails the service is marked unhealthy and callers get ``None``
+(the heuristic takes over) until a ``/health`` probe succeeds again, so an
+outage costs one timeout per retry interval instead of one per email.
+"""
+
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from ..config.settings import get_settings
+from . import deadline
+
+logger = logging.getLogger("backend_app.inference_client")
+
+UDS_PREFIX = "unix://"
+
+
+class InferenceClient:
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 10.0,
+        retry_interval: float = 15.0,
+        pool_size: int = 16,
+        client: Optional[httpx.Client] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        if client is None:
+            limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            if url.startswith(UDS_PREFIX):
+                transport = httpx.HTTPTransport(uds=url[len(UDS_PREFIX):], limits=limits)
+                client = httpx.Client(base_url="http://inference", transport=transport)
+            else:
+                client = httpx.Client(base_url=url, limits=limits)
+        self._client = client
+        self._lock = threading.Lock()
+        self._healthy = True
+        self._retry_at = 0.0
+        self.failures = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self._healthy
+
+    def _mark_down(self, exc: Exception) -> None:
+        with self._lock:
+            if self._healthy:
+                logger.warning("Inference service unavailable, using heuristic: %s", exc)
+            self._healthy = False
+            self._retry_at = time.monotonic() + self.retry_interval
+            self.failures += 1
+
+    def _available(self) -> bool:
+        if self._healthy:
+            return True
+        with self._lock:
+            if time.monotonic() < self._retry_at:
+                return False
+            # Only one thread probes; the others keep using the heuristic meanwhile.
+            self._retry_at = time.monotonic() + self.retry_interval
+        return self.check_health()
+
+    def check_health(self) -> bool:
+        try:
+            self._client.get("/health", timeout=min(self.timeout, 2.0)).raise_for_status()
+        except httpx.HTTPError as exc:
+            self._mark_down(exc)
+            return False
+        with self._lock:
+            if not self._healthy:
+                logger.info("Inference service is back")
+            self._healthy = True
+        return True
+
+    def classify_many(self, texts: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Return one prediction per text, or ``None`` when the service cannot be used."""
+        if not self._available():
+            return None
+        timeout = self.timeout
+        budget = deadline.remaining()
+        if budget is not None:
+            timeout = min(timeout, max(budget, 0.001))
+        try:
+            resp = self._client.post("/classify", json={"texts": texts}, timeout=timeout)
+            resp.raise_for_status()
+            return resp.json()["results"]
+        except httpx.TimeoutException as exc:
+            if timeout < self.timeout:
+                # The request deadline ran out first; that says nothing about the service.
+                return None
+            self._mark_down(exc)
+            return None
+        except (httpx.HTTPError, ValueError, KeyError) as exc:
+            self._mark_down(exc)
+            return None
+
+    def classify(self, text: str) -> Optional[Dict[str, Any]]:
+        results = self.classify_many([text])
+        return results[0] if results else None
+
+    def close(self) -> None:
+        self._client.close()
+
+
+@lru_cache()
+def get_inference_client() -> Optional[InferenceClient]:
+    settings = get_settings()
+    if not settings.inference_url:
+        return None
+    return InferenceClient(
+        settings.inference_url,
+        timeout=settings.inference_timeout_seconds,
+        retry_interval=settings.inference_retry_seconds,
+        pool_size=settings.inference_pool_size,
+    )
@@ -0,0 +1,85 @@
+"""Adaptive concurrency limits (AIMD) for the scheduler stages.
+
+Each stage keeps a limit that grows by roughly one slot per round of
+successful, fast work and is cut multiplicatively when a call fails or its
+latency rises well above the no-load baseline. The baseline is a low
+percentile (``BASELINE_PERCENTILE``) of the latencies in a sliding window
+rather than the minimum, so a single fast outlier cannot pin it; the limit
+settles around the point where extra concurrency starts to queue inside the
+backend (the knee) instead of a hand-tuned constant.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict
+
+BASELINE_PERCENTILE = 0.05
+
+
+class AIMDLimit:
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.9,
+        latency_tolerance: float = 2.0,
+        window: int = 500,
+    ) -> None:
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._recent: Deque[float] = deque(maxlen=32)
+        self.increases = 0
+        self.decreases = 0
+        self.errors = 0
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    @property
+    def baseline(self) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[int((len(ordered) - 1) * BASELINE_PERCENTILE)]
+
+    def on_sample(self, latency: float, inflight: int, error: bool = False) -> None:
+        """Feed one completed call; ``inflight`` includes the call itself."""
+        if error:
+            self.errors += 1
+            self._decrease()
+            return
+        self._samples.append(latency)
+        self._recent.append(latency)
+        baseline = self.baseline
+        if baseline and latency > baseline * self.latency_tolerance:
+            self._decrease()
+        elif inflight * 2 >= self.limit:
+            # Only grow while the limit is actually being used.
+            before = self.current
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            if self.current > before:
+                self.increases += 1
+
+    def _decrease(self) -> None:
+        before = self.current
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        if self.current < before:
+            self.decreases += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = sorted(self._recent)
+        return {
+            "limit": self.current,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "baseline_ms": round(self.baseline * 1000, 3),
+            "recent_p50_ms": round(recent[len(recent) // 2] * 1000, 3) if recent else 0.0,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "errors": self.errors,
+        }
@@ -0,0 +1,159 @@
+"""Incremental mbox/EML ingestion.
+
+``iter_mbox_messages`` scans an mbox stream line by line and yields one raw
+message at a time, so memory depends on the largest message rather than the
+mailbox; messages over ``max_message_bytes`` are skipped instead of buffered. ``message_text`` picks the text/plain body (or the HTML body with tags
+stripped), decodes it with the declared charset and appends the text of PDF
+attachments.
+"""
+
+import logging
+import re
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
+from html.parser import HTMLParser
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("backend_app.mailbox")
+
+MAILBOX_SUFFIXES = (".eml", ".mbox")
+# Upper bound for one read, so a line without newlines is never read whole.
+MBOX_READ_BYTES = 64 * 1024
+_FROM_ESCAPED_RE = re.compile(rb"^>+From ")
+_BLOCK_TAGS = {"br", "p", "div", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+
+class _HTMLStripper(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs) -> None:
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag) -> None:
+        if tag in ("script", "style") and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data) -> None:
+        if not self._skip:
+            self.parts.append(data)
+
+
+def strip_html(markup: str) -> str:
+    stripper = _HTMLStripper()
+    stripper.feed(markup)
+    stripper.close()
+    return "".join(stripper.parts)
+
+
+def is_mailbox_name(filename: str) -> bool:
+    return (filename or "").lower().endswith(MAILBOX_SUFFIXES)
+
+
+def parse_message(raw: bytes) -> EmailMessage:
+    return BytesParser(policy=policy.default).parsebytes(raw)
+
+
+def _part_text(part: EmailMessage) -> str:
+    try:
+        return part.get_content()
+    except (LookupError, UnicodeDecodeError, AssertionError):
+        # Unknown or wrong charset label: fall back to a lossy UTF-8 decode.
+        payload = part.get_payload(decode=True) or b""
+        return payload.decode("utf-8", errors="replace")
+
+
+def message_text(msg: EmailMessage) -> str:
+    from .nlp import extract_text_from_bytes
+
+    sections: List[str] = []
+    subject = msg.get("subject")
+    if subject:
+        sections.append(str(subject))
+
+    body = msg.get_body(preferencelist=("plain", "html"))
+    if body is not None:
+        text = _part_text(body)
+        if body.get_content_subtype() == "html":
+            text = strip_html(text)
+        sections.append(text)
+
+    for attachment in msg.iter_attachments():
+        filename = attachment.get_filename() or ""
+        if attachment.get_content_type() != "application/pdf" and not filename.lower().endswith(".pdf"):
+            continue
+        payload = attachment.get_payload(decode=True)
+        if payload:
+            sections.append(extract_text_from_bytes(filename or "anexo.pdf", payload))
+    return "\n\n".join(s.strip() for s in sections if s and s.strip())
+
+
+def eml_text(raw: bytes) -> str:
+    try:
+        return message_text(parse_message(raw))
+    except Exception as exc:
+        logger.warning("Unable to parse email message: %s", exc)
+        return ""
+
+
+def iter_mbox_messages(
+    stream: BinaryIO, max_message_bytes: Optional[int] = None
+) -> Iterator[bytes]:
+    """Yield raw messages from an mbox stream without reading it all.
+
+    Messages larger than ``max_message_bytes`` are dropped as soon as they
+    cross the limit and skipped with a warning.
+    """
+    lines: List[bytes] = []
+    size = 0
+    oversized = False
+    previous_blank = True
+    at_line_start = True
+    position = 0
+    for line in iter(lambda: stream.readline(MBOX_READ_BYTES), b""):
+        continued = not at_line_start
+        at_line_start = line.endswith(b"\n")
+        if not continued and previous_blank and line.startswith(b"From "):
+            if position and oversized:
+                logger.warning("Skipping mbox message %d over %d bytes", position, max_message_bytes)
+            elif lines:
+                yield b"".join(lines)
+            lines, size, oversized = [], 0, False
+            position += 1
+            previous_blank = False
+            continue
+        if not continued and _FROM_ESCAPED_RE.match(line):
+            line = line[1:]
+        previous_blank = not continued and at_line_start and not line.strip()
+        if oversized:
+            continue
+        size += len(line)
+        if max_message_bytes is not None and size > max_message_bytes:
+            lines, oversized = [], True
+            continue
+        lines.append(line)
+    if oversized:
+        logger.warning("Skipping mbox message %d over %d bytes", max(position, 1), max_message_bytes)
+    elif lines and any(l.strip() for l in lines):
+        yield b"".join(lines)
+
+
+def iter_mailbox_entries(
+    filename: str, stream: BinaryIO, max_message_bytes: Optional[int] = None
+) -> Iterator[Tuple[str, str]]:
+    """Yield ``(source, text)`` for every message of an .eml or .mbox stream."""
+    if filename.lower().endswith(".eml"):
+        raw = stream.read() if max_message_bytes is None else stream.read(max_message_bytes + 1)
+        if max_message_bytes is not None and len(raw) > max_message_bytes:
+            logger.warning("Skipping %s over %d bytes", filename, max_message_bytes)
+            return
+        yield filename, eml_text(raw)
+        return
+    for index, raw in enumerate(iter_mbox_messages(stream, max_message_bytes), start=1):
+        yield f"{filename}#{index}", eml_text(raw)
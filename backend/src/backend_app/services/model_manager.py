@@ -0,0 +1,208 @@
+"""Lifecycle of the zero-shot pipeline: lazy background loads and unloading.
+
+The manager loads the model in a background thread on first use (or at
+startup), records when it was last used and drops it after
+``MODEL_IDLE_UNLOAD_SECONDS`` without requests or as soon as the process RSS
+goes over ``MODEL_RSS_BUDGET_MB``. While the model is not ready, callers get
+``None`` and classify with the heuristic instead of waiting for the load.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import gc
+import logging
+import os
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, Optional
+
+from ..config.settings import get_settings
+
+logger = logging.getLogger("backend_app.model_manager")
+
+STATE_UNLOADED = "unloaded"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_UNAVAILABLE = "unavailable"
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size of this process, when the platform exposes it."""
+    try:
+        with open("/proc/self/statm", "rb") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def _release_memory() -> None:
+    gc.collect()
+    # glibc keeps freed arenas mapped; give them back so RSS actually drops.
+    libc_name = ctypes.util.find_library("c")
+    if libc_name:
+        try:
+            ctypes.CDLL(libc_name).malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return round(value / (1024 * 1024), 1) if value is not None else None
+
+
+class ModelManager:
+    def __init__(
+        self,
+        loader: Callable[[], Any],
+        idle_seconds: float = 0,
+        rss_budget_bytes: int = 0,
+        retry_seconds: float = 300,
+    ) -> None:
+        self.loader = loader
+        self.idle_seconds = idle_seconds
+        self.rss_budget_bytes = rss_budget_bytes
+        self.retry_seconds = retry_seconds
+        self.state = STATE_UNLOADED
+        self._model: Any = None
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._retry_at = 0.0
+        self.last_used = 0.0
+        self.loads = 0
+        self.unloads = 0
+        self.last_load_seconds: Optional[float] = None
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+    def _event(self, kind: str, **details: Any) -> None:
+        event = {"ts": round(time.time(), 3), "event": kind, "rss_mb": _mb(rss_bytes()), **details}
+        self.events.append(event)
+        logger.info("Model %s %s", kind, details or "")
+
+    def _over_budget(self) -> bool:
+        if self.rss_budget_bytes <= 0:
+            return False
+        rss = rss_bytes()
+        return rss is not None and rss > self.rss_budget_bytes
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        try:
+            model = self.loader()
+        except Exception as exc:
+            logger.warning("Model load failed: %s", exc)
+            model = None
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            if model is None:
+                self.state = STATE_UNAVAILABLE
+                self._retry_at = time.monotonic() + self.retry_seconds
+                self._event("load_failed", seconds=round(elapsed, 3))
+            else:
+                self._model = model
+                self.state = STATE_READY
+                self.loads += 1
+                self.last_load_seconds = round(elapsed, 3)
+                self.last_used = time.monotonic()
+                self._event("loaded", seconds=self.last_load_seconds)
+            self._loaded.set()
+
+    def warm_up(self) -> None:
+        """Start a background load unless one is running or the model is ready."""
+        with self._lock:
+            if self.state in (STATE_READY, STATE_LOADING):
+                return
+            if self.state == STATE_UNAVAILABLE and time.monotonic() < self._retry_at:
+                return
+            if self._over_budget():
+                return
+            self.state = STATE_LOADING
+            self._loaded.clear()
+        threading.Thread(target=self._load, name="model-loader", daemon=True).start()
+
+    def get(self, wait: bool = False) -> Any:
+        """Return the model, or ``None`` while it is (re)loading or unavailable.
+
+        ``wait=True`` blocks until a load in progress finishes; offline jobs
+        use it since they have no latency target to protect.
+        """
+        self.last_used = time.monotonic()
+        model = self._model
+        if model is not None:
+            return model
+        self.warm_up()
+        if wait and self.state == STATE_LOADING:
+            self._loaded.wait()
+        return self._model
+
+    def unload(self, reason: str) -> bool:
+        with self._lock:
+            if self._model is None:
+                return False
+            self._model = None
+            self.state = STATE_UNLOADED
+            self.unloads += 1
+        _release_memory()
+        self._event("unloaded", reason=reason)
+        return True
+
+    def enforce(self) -> Optional[str]:
+        """Unload the model when idle for too long or over the memory budget."""
+        if self._model is None:
+            return None
+        idle = time.monotonic() - self.last_used
+        if self.idle_seconds > 0 and idle > self.idle_seconds:
+            reason = "idle"
+        elif self._over_budget():
+            reason = "rss_budget"
+        else:
+            return None
+        return reason if self.unload(reason) else None
+
+    async def run_governor(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.enforce()
+            except Exception as exc:
+                logger.warning("Model governor check failed: %s", exc)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "loads": self.loads,
+            "unloads": self.unloads,
+            "last_load_seconds": self.last_load_seconds,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1) if self.last_used else None,
+            "idle_unload_seconds": self.idle_seconds,
+            "rss_mb": _mb(rss_bytes()),
+            "rss_budget_mb": _mb(self.rss_budget_bytes) if self.rss_budget_bytes else None,
+            "events": list(self.events),
+        }
+
+
+def load_zero_shot_classifier() -> Any:
+    settings = get_settings()
+    if not settings.enable_transformers:
+        return None
+    from .model_store import load_pipeline
+
+    return load_pipeline()
+
+
+@lru_cache()
+def get_model_manager() -> ModelManager:
+    settings = get_settings()
+    return ModelManager(
+        load_zero_shot_classifier,
+        idle_seconds=settings.zero_shot_idle_unload_seconds,
+        rss_budget_bytes=int(settings.zero_shot_rss_budget_mb * 1024 * 1024),
+    )
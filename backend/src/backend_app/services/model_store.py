@@ -0,0 +1,166 @@
+"""Pinned local artifacts for the zero-shot model.
+
+``prepare_artifact`` (``python -m backend.cli prepare-model``) resolves the
+requested revision to a commit hash, converts the weights to safetensors, saves
+the tokenizer next to them and writes a ``manifest.json`` with the revision
+and a SHA-256 per file. With ``MODEL_DIR`` pointing at that directory, startup
+loads it with the Hugging Face hub in offline mode: nothing is downloaded, and
+safetensors maps the weights from the file instead of unpickling them, so
+replicas on the same host share the page cache.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..config.settings import get_settings
+
+logger = logging.getLogger("backend_app.model_store")
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+_last_load: Dict[str, Any] = {}
+
+
+class ArtifactError(RuntimeError):
+    """The artifact directory is missing files or does not match its manifest."""
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(directory: Path, model: str, revision: str, **extra: Any) -> Dict[str, Any]:
+    files = {
+        str(path.relative_to(directory)): {"size": path.stat().st_size, "sha256": _sha256(path)}
+        for path in sorted(directory.rglob("*"))
+        if path.is_file() and path.name != MANIFEST_NAME
+    }
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "model": model,
+        "revision": revision,
+        "created": round(time.time(), 3),
+        "files": files,
+        **extra,
+    }
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def read_manifest(directory: Path) -> Dict[str, Any]:
+    try:
+        return json.loads((Path(directory) / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise ArtifactError(f"No readable {MANIFEST_NAME} in {directory}: {exc}") from exc
+
+
+def verify_artifact(directory: Path, full: bool = False) -> Dict[str, Any]:
+    """Check files against the manifest: sizes always, hashes when ``full``."""
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    files = manifest.get("files") or {}
+    if not any(name.endswith(".safetensors") for name in files):
+        raise ArtifactError(f"{directory} has no safetensors weights")
+    for name, meta in files.items():
+        path = directory / name
+        if not path.is_file() or path.stat().st_size != meta["size"]:
+            raise ArtifactError(f"{path} is missing or has the wrong size")
+        if full and _sha256(path) != meta["sha256"]:
+            raise ArtifactError(f"{path} does not match its SHA-256")
+    return manifest
+
+
+def _resolve_revision(model: str, revision: str) -> str:
+    from huggingface_hub import HfApi
+
+    return HfApi().model_info(model, revision=revision).sha or revision
+
+
+def prepare_artifact(model: str, revision: str, output: Path) -> Dict[str, Any]:
+    """Download ``model`` at ``revision`` and store it under ``output`` for offline use."""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    import transformers
+
+    output = Path(output)
+    pinned = _resolve_revision(model, revision)
+    staging = output.with_name(f".{output.name}.staging")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    try:
+        AutoTokenizer.from_pretrained(model, revision=pinned).save_pretrained(staging)
+        weights = AutoModelForSequenceClassification.from_pretrained(model, revision=pinned)
+        weights.save_pretrained(staging, safe_serialization=True)
+        manifest = write_manifest(
+            staging, model, pinned, transformers_version=transformers.__version__
+        )
+        previous = output.with_name(f".{output.name}.previous")
+        shutil.rmtree(previous, ignore_errors=True)
+        if output.exists():
+            os.replace(output, previous)
+        os.replace(staging, output)
+        shutil.rmtree(previous, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def load_pipeline() -> Any:
+    """Build the zero-shot pipeline from ``MODEL_DIR`` when set, else from the hub."""
+    settings = get_settings()
+    started = time.perf_counter()
+    if settings.zero_shot_model_dir:
+        directory = Path(settings.zero_shot_model_dir)
+        manifest = verify_artifact(directory)
+        # local_files_only keeps every lookup (config, tokenizer, weights) on disk.
+        # HF_HUB_OFFLINE would only help if set before huggingface_hub is first
+        # imported, which a library function cannot guarantee.
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+
+        tokenizer = AutoTokenizer.from_pretrained(directory, local_files_only=True)
+        model = AutoModelForSequenceClassification.from_pretrained(
+            directory,
+            local_files_only=True,
+            use_safetensors=True,
+            low_cpu_mem_usage=True,
+        )
+        classifier = pipeline("zero-shot-classification", model=model, tokenizer=tokenizer)
+        source = {
+            "source": "artifact",
+            "model": manifest["model"],
+            "path": str(directory),
+            "revision": manifest["revision"],
+        }
+    else:
+        from transformers import pipeline
+
+        classifier = pipeline(
+            "zero-shot-classification",
+            model=settings.zero_shot_model,
+            revision=settings.zero_shot_model_revision,
+        )
+        source = {
+            "source": "hub",
+            "model": settings.zero_shot_model,
+            "revision": settings.zero_shot_model_revision,
+        }
+    elapsed = time.perf_counter() - started
+    _last_load.clear()
+    _last_load.update(source, load_seconds=round(elapsed, 3))
+    logger.info("Loaded zero-shot model from %s in %.2fs", source["source"], elapsed)
+    return classifier
+
+
+def last_load_info() -> Optional[Dict[str, Any]]:
+    return dict(_last_load) or None
@@ -20,17 +20,33 @@ import os
 
 import re
 
+import time
+
 import unicodedata
 
 from functools import lru_cache
 
-from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+
+
+from ..config.settings import get_settings
+
+from ..models.records import ClassificationResult
+
+from . import deadline
 
-from typing import Any, Dict, Optional
+from .dedup import get_near_duplicate_index
 
+from .model_manager import get_model_manager
 
+from .pdf import extract_pdf_text
 
-from ..config.settings import get_settings
+from .profiling import profiled
+
+from .scheduler import get_scheduler
+
+from .shadow import get_shadow_evaluator
 
 
 
@@ -52,6 +68,10 @@ CATEGORIES = [
 
 ]
 
+# Engine label of the keyword fallback (model loading, unloaded or unreachable).
+
+HEURISTIC_ENGINE = "Heuristic"
+
 
 
 
@@ -64,35 +84,39 @@ def binary_from_category(cat: str) -> str:
 
 
 
+@profiled
+
 def _extract_pdf_text(file_bytes: bytes) -> str:
 
     try:
 
-        from pdfminer.high_level import extract_text
+        return extract_pdf_text(file_bytes)
 
+    except Exception as exc:
 
+        logger.warning("PDF extraction failed: %s", exc)
+
+        return ""
 
-        bio = BytesIO(file_bytes)
 
-        return extract_text(bio) or ""
 
-    except Exception:
 
-        try:
 
-            import PyPDF2
+def decode_text_bytes(file_bytes: bytes) -> str:
 
+    """Decode plain text files: UTF-8 (with or without BOM), then Windows-1252."""
 
+    for encoding in ("utf-8-sig", "cp1252"):
 
-            reader = PyPDF2.PdfReader(BytesIO(file_bytes))
+        try:
 
-            pages = [page.extract_text() or "" for page in reader.pages]
+            return file_bytes.decode(encoding)
 
-            return "\n".join(pages)
+        except UnicodeDecodeError:
 
-        except Exception:
+            continue
 
-            return ""
+    return file_bytes.decode("latin-1")
 
 
 
@@ -106,9 +130,17 @@ def extract_text_from_bytes(filename: str, file_bytes: bytes) -> str:
 
         return _extract_pdf_text(file_bytes)
 
+    if filename.endswith(".eml"):
+
+        from .mailbox import eml_text
+
+
+
+        return eml_text(file_bytes)
+
     try:
 
-        return file_bytes.decode("utf-8", errors="ignore")
+        return decode_text_bytes(file_bytes)
 
     except Exception:
 
@@ -136,39 +168,33 @@ def _strip_accents(value: str) -> str:
 
 
 
-@lru_cache()
-
-def _get_zero_shot_classifier(enable_transformers: bool):
-
-    if not enable_transformers:
-
-        return None
-
-    try:
+def zero_shot_multiclass(text: str) -> Dict[str, Any]:
 
-        from transformers import pipeline
+    if settings.inference_url:
 
+        from .inference_client import get_inference_client
 
 
-        return pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
 
-    except Exception as exc:
+        remote = get_inference_client().classify(text)
 
-        logger.warning("Unable to load Transformers zero-shot model: %s", exc)
-
-        return None
+        if remote and remote.get("label"):
 
+            return remote
 
+        return {"label": None, "confidence": 0.0, "engine": HEURISTIC_ENGINE}
 
+    if not settings.enable_transformers:
 
+        return {"label": None, "confidence": 0.0, "engine": HEURISTIC_ENGINE}
 
-def zero_shot_multiclass(text: str) -> Dict[str, Any]:
+    # None while the model is loading or was unloaded; the heuristic covers it.
 
-    classifier = _get_zero_shot_classifier(settings.enable_transformers)
+    classifier = get_model_manager().get()
 
     if not classifier:
 
-        return {"label": None, "confidence": 0.0, "engine": "Heuristic"}
+        return {"label": None, "confidence": 0.0, "engine": HEURISTIC_ENGINE}
 
     try:
 
@@ -196,7 +222,7 @@ def zero_shot_multiclass(text: str) -> Dict[str, Any]:
 
         logger.warning("Zero-shot classification failed: %s", exc)
 
-    return {"label": None, "confidence": 0.0, "engine": "Heuristic"}
+    return {"label": None, "confidence": 0.0, "engine": HEURISTIC_ENGINE}
 
 
 
@@ -334,7 +360,7 @@ def heuristic_multiclass(text: str) -> Dict[str, Any]:
 
         conf = 0.55
 
-    return {"label": best, "confidence": conf, "engine": "Heuristic"}
+    return {"label": best, "confidence": conf, "engine": HEURISTIC_ENGINE}
 
 
 
@@ -389,9 +415,47 @@ def build_template_reply(category: str, text: str) -> str:
         "Se surgir alguma demanda espec\u00edfica, escreva pra gente e teremos prazer em ajudar.\n\n"
         "Abra\u00e7os,\nEquipe"
     )
+REPLY_MODEL = "gpt-4o-mini"
+
+REPLY_PARAMS: Dict[str, Any] = {"temperature": 0.3, "max_tokens": 220}
+
+REPLY_PROMPT_CHARS = 2500
+
+
+
+
+
+def build_reply_messages(text: str, category: str) -> List[Dict[str, str]]:
+
+    """Chat messages asking for a reply; shared by ``gpt_reply`` and bulk replies."""
+
+    prompt = (
+
+        f"Categoria: {category}\n\n"
+
+        "Escreva uma resposta de email profissional, objetiva e cordial em PT-BR, "
+
+        "com ate 120 palavras. Se precisar de dados, liste-os em marcadores.\n\n"
+
+        f"Texto recebido:\n{text[:REPLY_PROMPT_CHARS]}"
+
+    )
+
+    return [
+
+        {"role": "system", "content": "Voce e um assistente de atendimento ao cliente."},
+
+        {"role": "user", "content": prompt},
+
+    ]
+
+
+
+
+
 @lru_cache()
 
-def _get_openai_client(api_key: Optional[str]):
+def _get_openai_client(api_key: Optional[str], base_url: Optional[str] = None):
 
     if not api_key:
 
@@ -423,7 +487,7 @@ def _get_openai_client(api_key: Optional[str]):
 
 
 
-        return OpenAI(api_key=api_key)
+        return OpenAI(api_key=api_key, base_url=base_url)
 
     except Exception as exc:
 
@@ -437,7 +501,7 @@ def _get_openai_client(api_key: Optional[str]):
 
 async def gpt_reply(text: str, category: str) -> str:
 
-    client = _get_openai_client(settings.openai_api_key)
+    client = _get_openai_client(settings.openai_api_key, settings.openai_base_url)
 
     if not client:
 
@@ -445,37 +509,29 @@ async def gpt_reply(text: str, category: str) -> str:
 
 
 
-    prompt = (
+    @profiled
 
-        f"Categoria: {category}\n\n"
-
-        "Escreva uma resposta de email profissional, objetiva e cordial em PT-BR, "
-
-        "com ate 120 palavras. Se precisar de dados, liste-os em marcadores.\n\n"
+    def _call_openai() -> str:
 
-        f"Texto recebido:\n{text[:2500]}"
+        options: Dict[str, Any] = {}
 
-    )
+        budget = deadline.remaining()
 
+        if budget is not None:
 
+            # Keep the HTTP call itself within the request deadline.
 
-    def _call_openai() -> str:
+            options["timeout"] = max(budget, 0.001)
 
         resp = client.chat.completions.create(
 
-            model="gpt-4o-mini",
-
-            messages=[
+            model=REPLY_MODEL,
 
-                {"role": "system", "content": "Voce e um assistente de atendimento ao cliente."},
+            messages=build_reply_messages(text, category),
 
-                {"role": "user", "content": prompt},
+            **REPLY_PARAMS,
 
-            ],
-
-            temperature=0.3,
-
-            max_tokens=220,
+            **options,
 
         )
 
@@ -485,7 +541,9 @@ async def gpt_reply(text: str, category: str) -> str:
 
     try:
 
-        return await asyncio.to_thread(_call_openai)
+        async with get_scheduler("reply").slot():
+
+            return await asyncio.to_thread(_call_openai)
 
     except Exception as exc:
 
@@ -497,55 +555,221 @@ async def gpt_reply(text: str, category: str) -> str:
 
 
 
-def _predict_category_sync(text: str) -> Dict[str, Any]:
+# Share of the remaining budget given to classification when a GPT reply follows.
+
+INFERENCE_BUDGET_SHARE = 0.6
+
+
+
+
+
+def _result_from(prediction: Dict[str, Any]) -> ClassificationResult:
+
+    primary = prediction["label"]
+
+    return ClassificationResult(
+
+        primary_category=primary,
+
+        overall_category=binary_from_category(primary),
+
+        confidence=round(prediction["confidence"], 3),
+
+        engine=prediction["engine"],
+
+    )
+
+
+
+
+
+@profiled
+
+def _predict_category_sync(text: str) -> ClassificationResult:
 
     z = zero_shot_multiclass(text)
 
-    if z["label"]:
+    return _result_from(z if z["label"] else heuristic_multiclass(text))
 
-        primary = z["label"]
 
-        confidence = z["confidence"]
 
-        engine = z["engine"]
 
-    else:
 
-        h = heuristic_multiclass(text)
+async def _predict_within(
 
-        primary = h["label"]
+    text: str, timeout: Optional[float]
 
-        confidence = h["confidence"]
+) -> Tuple[ClassificationResult, float]:
 
-        engine = h["engine"]
+    """Classify in a worker thread, raising ``TimeoutError`` after ``timeout`` seconds.
 
-    overall = binary_from_category(primary)
 
-    return {
 
-        "primary_category": primary,
+    Returns the prediction and the seconds spent classifying (queueing excluded).
 
-        "overall_category": overall,
 
-        "confidence": round(confidence, 3),
 
-        "engine": engine,
+    An abandoned thread keeps its inference slot until it actually finishes, so
 
-    }
+    timed-out work still counts against the concurrency limit.
+
+    """
+
+    scheduler = get_scheduler("inference")
+
+    started = time.monotonic()
+
+    await asyncio.wait_for(scheduler.acquire(), timeout)
+
+    began = time.perf_counter()
+
+    task = asyncio.ensure_future(asyncio.to_thread(_predict_category_sync, text))
+
+
+
+    def _finished(done: asyncio.Future) -> None:
+
+        failed = done.cancelled() or done.exception() is not None
+
+        # Heuristic fallbacks take microseconds; as latency samples they would
+
+        # drag the limiter's no-load baseline far below any real model call.
+
+        if failed or done.result().engine != HEURISTIC_ENGINE:
 
+            scheduler.record(time.perf_counter() - began, failed)
 
+        scheduler.release()
 
 
 
-async def classify_and_respond(text: str) -> Dict[str, Any]:
+    task.add_done_callback(_finished)
+
+    if timeout is not None:
+
+        timeout = max(timeout - (time.monotonic() - started), 0.0)
+
+    result = await asyncio.wait_for(asyncio.shield(task), timeout)
+
+    return result, time.perf_counter() - began
+
+
+
+
+
+async def classify_and_respond(
+
+    text: str, text_hash: str = "", use_gpt: bool = True
+
+) -> ClassificationResult:
 
     text = preprocess(text)
 
-    prediction = await asyncio.to_thread(_predict_category_sync, text)
+    index = get_near_duplicate_index()
+
+    signature = None
+
+    if index is not None and not deadline.expired():
+
+        signature = await asyncio.to_thread(index.signature, text)
+
+        if signature is not None:
+
+            reused = index.lookup(signature)
+
+            if reused is not None:
+
+                reused.engine = f"Near-duplicate ({reused.engine})"
+
+                reused.text_hash = text_hash
+
+                reused.degradations = []
+
+                return reused
+
+
+
+    budget = deadline.remaining()
+
+    prediction = None
+
+    if budget is None or budget > 0:
+
+        # Template replies are instant, so the split only applies when GPT will run.
+
+        reply_follows = use_gpt and _get_openai_client(
+
+            settings.openai_api_key, settings.openai_base_url
+
+        ) is not None
+
+        timeout = budget * INFERENCE_BUDGET_SHARE if budget is not None and reply_follows else budget
+
+        try:
+
+            prediction, elapsed = await _predict_within(text, timeout)
+
+        except asyncio.TimeoutError:
+
+            logger.info("Deadline reached during classification, using heuristic")
+
+        else:
+
+            shadow = get_shadow_evaluator()
+
+            if shadow is not None:
+
+                shadow.maybe_submit(text, prediction.primary_category, prediction.engine, elapsed)
+
+    if prediction is None:
+
+        prediction = _result_from(heuristic_multiclass(text))
+
+        prediction.degradations.append(deadline.DEGRADED_CLASSIFIER)
+
+
+
+    reply = None
+
+    budget = deadline.remaining()
+
+    if use_gpt and (budget is None or budget > 0):
+
+        try:
+
+            reply = await asyncio.wait_for(gpt_reply(text, prediction.primary_category), budget)
+
+        except asyncio.TimeoutError:
+
+            logger.info("Deadline reached during reply generation, using template")
+
+    if reply is None:
+
+        if use_gpt:
+
+            prediction.degradations.append(deadline.DEGRADED_REPLY)
+
+        reply = build_template_reply(prediction.primary_category, text)
+
+    prediction.reply = reply
+
+    prediction.text_hash = text_hash
+
+    # Only model results are worth reusing; a heuristic answer would be served
+
+    # for the whole TTL even after the model comes back.
+
+    if (
+
+        signature is not None
+
+        and not prediction.degradations
+
+        and prediction.engine != HEURISTIC_ENGINE
 
-    reply = await gpt_reply(text, prediction["primary_category"])
+    ):
 
-    prediction["reply"] = reply
+        index.add(signature, prediction)
 
     return prediction
 
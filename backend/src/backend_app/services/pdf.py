@@ -0,0 +1,206 @@
+"""PDF text extraction tuned for classification rather than fidelity.
+
+A quick probe opens the document with PyPDF2 (cheap: the page tree is read,
+page content is not) and extracts the first page. When that yields text the
+rest goes through PyPDF2 too; otherwise pdfminer handles it, in
+``PDF_EXTRACTION_MODE=fast`` without the box ordering pass that dominates its
+layout analysis. ``PDF_EXTRACTION_MODE=layout`` always uses pdfminer with the
+full analysis. Only the first ``PDF_MAX_PAGES`` pages are read, long
+documents are split into page ranges extracted in parallel processes, and a
+range that fails with one backend is retried with the other alone instead of
+re-parsing the whole file.
+
+Results are cached by the SHA-256 of the PDF bytes, so an attachment that
+arrives again is not parsed a second time.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO, StringIO
+from typing import List, Optional, Tuple
+
+from ..config.settings import get_settings
+
+logger = logging.getLogger("backend_app.pdf")
+
+BACKEND_PYPDF = "pypdf2"
+BACKEND_PDFMINER = "pdfminer"
+# Pages per parallel task; smaller ranges do not pay for re-reading the file.
+RANGE_PAGES = 8
+
+
+def _pypdf_range(data: bytes, start: int, stop: int) -> str:
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(BytesIO(data))
+    pages = reader.pages
+    return "\n".join(pages[index].extract_text() or "" for index in range(start, min(stop, len(pages))))
+
+
+def _pdfminer_range(data: bytes, start: int, stop: int, layout: bool = False) -> str:
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    # boxes_flow=None keeps line and word grouping but skips text box ordering.
+    laparams = LAParams() if layout else LAParams(boxes_flow=None, detect_vertical=False)
+    output = StringIO()
+    manager = PDFResourceManager(caching=True)
+    with TextConverter(manager, output, laparams=laparams) as device:
+        interpreter = PDFPageInterpreter(manager, device)
+        for page in PDFPage.get_pages(BytesIO(data), pagenos=set(range(start, stop))):
+            interpreter.process_page(page)
+    return output.getvalue()
+
+
+def extract_range(data: bytes, backend: str, start: int, stop: int, layout: bool = False) -> str:
+    """Text of pages ``[start, stop)``; falls back to the other backend for this range only."""
+    order = [backend, BACKEND_PDFMINER if backend == BACKEND_PYPDF else BACKEND_PYPDF]
+    for name in order:
+        try:
+            if name == BACKEND_PYPDF:
+                return _pypdf_range(data, start, stop)
+            return _pdfminer_range(data, start, stop, layout)
+        except Exception as exc:
+            logger.debug("%s failed on pages %d-%d: %s", name, start, stop, exc)
+    return ""
+
+
+def _count_pdfminer_pages(data: bytes) -> int:
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+
+    document = PDFDocument(PDFParser(BytesIO(data)))
+    return sum(1 for _ in PDFPage.create_pages(document))
+
+
+def probe(data: bytes) -> Tuple[str, int, Optional[str]]:
+    """Pick the backend for ``data``; returns it, the page count and the first page text."""
+    try:
+        import PyPDF2
+
+        reader = PyPDF2.PdfReader(BytesIO(data))
+        pages = len(reader.pages)
+        first = (reader.pages[0].extract_text() or "") if pages else ""
+        if first.strip():
+            return BACKEND_PYPDF, pages, first
+    except Exception as exc:
+        logger.debug("PyPDF2 probe failed: %s", exc)
+        pages = -1
+    if pages < 0:
+        try:
+            pages = _count_pdfminer_pages(data)
+        except Exception as exc:
+            logger.debug("pdfminer probe failed: %s", exc)
+            pages = 0
+    return BACKEND_PDFMINER, pages, None
+
+
+class TextCache:
+    """LRU of extracted texts keyed by content hash."""
+
+    def __init__(self, max_items: int) -> None:
+        self.max_items = max_items
+        self._items: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._items.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key: str, text: str) -> None:
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._items[key] = text
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"items": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+@lru_cache()
+def get_text_cache() -> TextCache:
+    return TextCache(get_settings().pdf_cache_items)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    workers = get_settings().pdf_workers
+    # Worker processes (e.g. the CLI pool) already keep every core busy.
+    if workers <= 1 or multiprocessing.parent_process() is not None:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # Forking a process that runs the event loop and the model threads
+            # can copy held locks into the children; start clean interpreters.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return _pool
+
+
+def _page_ranges(start: int, stop: int, size: int) -> List[Tuple[int, int]]:
+    return [(first, min(first + size, stop)) for first in range(start, stop, size)]
+
+
+def extract_pdf_text(data: bytes) -> str:
+    settings = get_settings()
+    key = hashlib.sha256(data).hexdigest()
+    cache = get_text_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    layout = settings.pdf_extraction_mode == "layout"
+    backend, pages, first = probe(data)
+    if layout:
+        # Layout mode asks for pdfminer's box ordering on every page.
+        backend, first = BACKEND_PDFMINER, None
+    if settings.pdf_max_pages > 0:
+        pages = min(pages, settings.pdf_max_pages)
+    parts: List[str] = []
+    start = 0
+    if first is not None:
+        parts.append(first)
+        start = 1
+    pool = _get_pool() if pages >= settings.pdf_parallel_min_pages else None
+    if pool is not None:
+        ranges = _page_ranges(start, pages, RANGE_PAGES)
+        futures = [pool.submit(extract_range, data, backend, a, b, layout) for a, b in ranges]
+        parts.extend(future.result() for future in futures)
+    elif start < pages:
+        parts.append(extract_range(data, backend, start, pages, layout))
+    text = "\n".join(part for part in parts if part)
+    cache.put(key, text)
+    return text
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -5,27 +5,31 @@ import hashlib
 import io
 import time
 import zipfile
+from contextlib import aclosing
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from itertools import islice
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 
-from fastapi import HTTPException
+from fastapi import HTTPException, UploadFile
 
 from ..config.audit import append_event
 from ..config.settings import get_settings
+from ..models.records import ClassificationResult
+from .deadline import request_deadline
+from .mailbox import iter_mailbox_entries
+from .profiling import profiled
 from .nlp import classify_and_respond, extract_text_from_bytes
+from .report_store import get_report_store
+from .reports import ReportWriter, open_report_writer
+from .scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, request_priority
 
 settings = get_settings()
 
 MAX_UPLOAD_BYTES = settings.max_upload_mb * 1024 * 1024
-REPORT_COLUMNS = [
-    ("arquivo", "Arquivo"),
-    ("overall_category", "Categoria binaria"),
-    ("primary_category", "Categoria principal"),
-    ("confidence", "Confianca"),
-    ("engine", "Engine"),
-    ("text_hash", "Hash"),
-    ("reply", "Resposta"),
-]
+UPLOAD_CHUNK_BYTES = 64 * 1024
+# Rows handed to the report writer thread at a time.
+REPORT_WRITE_BATCH = 100
+BATCH_SUFFIXES = (".txt", ".pdf", ".eml")
 
 
 def hash_text(text: str) -> str:
@@ -48,118 +52,196 @@ def ensure_payload_limit(size_bytes: int) -> None:
         )
 
 
-async def classify_many(texts: List[str]) -> List[Dict[str, Any]]:
-    workers = max(settings.classification_workers, 1)
-    semaphore = asyncio.Semaphore(workers)
+async def read_upload(upload: UploadFile) -> bytes:
+    """Read an upload in chunks, rejecting it at the first chunk over the limit."""
+    if upload.size is not None:
+        ensure_payload_limit(upload.size)
+    chunks: List[bytes] = []
+    total = 0
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        total += len(chunk)
+        ensure_payload_limit(total)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _classify(text: str) -> ClassificationResult:
+    # Concurrency is bounded process-wide by the inference/reply schedulers.
+    return await classify_and_respond(text, text_hash=hash_text(text))
 
-    async def _run(text: str) -> Dict[str, Any]:
-        async with semaphore:
-            return await classify_and_respond(text)
 
-    return await asyncio.gather(*[_run(t) for t in texts])
+async def classify_many(texts: List[str]) -> List[ClassificationResult]:
+    return await asyncio.gather(*[_classify(t) for t in texts])
 
 
-def write_txt_report(rows: List[Dict[str, Any]], report_path: Path) -> None:
-    report_path.parent.mkdir(parents=True, exist_ok=True)
-    lines = ["\t".join(label for _, label in REPORT_COLUMNS)]
-    for row in rows:
-        values = []
-        for key, _ in REPORT_COLUMNS:
-            value = row.get(key, "")
-            if isinstance(value, float):
-                value = f"{value:.3f}"
-            value = str(value).replace("\t", " ").replace("\n", " ").strip()
-            values.append(value)
-        lines.append("\t".join(values))
-    report_path.write_text("\n".join(lines), encoding="utf-8")
+async def iter_classified(texts: List[str]) -> AsyncIterator[Tuple[int, ClassificationResult]]:
+    """Yield ``(index, result)`` in input order as soon as each prefix is done."""
+    tasks = [asyncio.ensure_future(_classify(t)) for t in texts]
+    try:
+        for index, task in enumerate(tasks):
+            yield index, await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
 
+@profiled
+def _write_report_rows(writer: ReportWriter, rows: List[ClassificationResult]) -> None:
+    writer.write_rows(rows)
 
-def _log_classification(route: str, content: str, result: Dict[str, Any]) -> None:
+
+@profiled
+def _commit_report(writer: ReportWriter) -> Path:
+    return writer.commit()
+
+
+def _log_classification(route: str, result: ClassificationResult) -> None:
     _record_event(
         route,
-        text_hash=hash_text(content),
-        primary_category=result.get("primary_category"),
-        overall_category=result.get("overall_category"),
-        confidence=result.get("confidence"),
-        engine=result.get("engine"),
+        text_hash=result.text_hash,
+        primary_category=result.primary_category,
+        overall_category=result.overall_category,
+        confidence=result.confidence,
+        engine=result.engine,
+        degradations=result.degradations,
     )
 
 
-async def classify_text(content: str, route: str) -> Dict[str, Any]:
-    result = await classify_and_respond(content)
-    _log_classification(route, content, result)
+async def classify_text(
+    content: str, route: str, timeout: Optional[float] = None
+) -> ClassificationResult:
+    with request_priority(PRIORITY_INTERACTIVE), request_deadline(timeout):
+        result = await classify_and_respond(content, text_hash=hash_text(content))
+    _log_classification(route, result)
     return result
 
 
-async def process_api_batch(texts: List[str]) -> List[Dict[str, Any]]:
-    normalized = [(t or "").strip() for t in texts]
-    results = await classify_many(normalized)
-    payloads: List[Dict[str, Any]] = []
-    for content, result in zip(normalized, results):
-        _log_classification("/api/batch", content, result)
-        payloads.append(
-            {
-                **result,
-                "text_hash": hash_text(content),
-            }
-        )
-    return payloads
+async def process_api_batch(
+    texts: List[str], timeout: Optional[float] = None
+) -> List[ClassificationResult]:
+    with request_priority(PRIORITY_BATCH), request_deadline(timeout):
+        results = await classify_many([(t or "").strip() for t in texts])
+    for result in results:
+        _log_classification("/api/batch", result)
+    return results
 
 
-async def handle_zip_payload(data: bytes) -> Tuple[List[Dict[str, Any]], str, Dict[str, int]]:
-    ensure_payload_limit(len(data))
-    try:
-        zf = zipfile.ZipFile(io.BytesIO(data))
-    except zipfile.BadZipFile as exc:
-        raise HTTPException(status_code=400, detail="Arquivo ZIP invalido.") from exc
+@profiled
+def _limited(entries: Iterator[Tuple[str, str]]) -> List[Dict[str, str]]:
+    return [
+        {"arquivo": source, "conteudo": text or ""}
+        for source, text in islice(entries, max(settings.max_batch_items, 0))
+    ]
 
-    entries: List[Dict[str, str]] = []
-    for name in zf.namelist():
-        if len(entries) >= settings.max_batch_items:
-            break
-        if name.endswith("/"):
+
+def _iter_zip_entries(zf: zipfile.ZipFile) -> Iterator[Tuple[str, str]]:
+    for info in zf.infolist():
+        name = info.filename
+        if info.is_dir():
             continue
-        if not (name.lower().endswith(".txt") or name.lower().endswith(".pdf")):
+        lower = name.lower()
+        # The declared size is enforced while decompressing, so it bounds every member.
+        if info.file_size > MAX_UPLOAD_BYTES:
+            continue
+        if lower.endswith(".mbox"):
+            with zf.open(info) as stream:
+                yield from iter_mailbox_entries(name, stream, MAX_UPLOAD_BYTES)
+            continue
+        if not lower.endswith(BATCH_SUFFIXES):
             continue
         try:
-            file_bytes = zf.read(name)
+            file_bytes = zf.read(info)
         except Exception:
             continue
-        if not file_bytes or len(file_bytes) > MAX_UPLOAD_BYTES:
+        if not file_bytes:
             continue
-        content = extract_text_from_bytes(name, file_bytes)
-        entries.append({"arquivo": name, "conteudo": content or ""})
+        yield name, extract_text_from_bytes(name, file_bytes)
+
+
+async def _classify_entries(
+    entries: List[Dict[str, str]],
+    report_format: Optional[str],
+    compress: bool,
+) -> Tuple[List[ClassificationResult], str, Dict[str, int]]:
+    store = get_report_store()
+    writer = await asyncio.to_thread(
+        open_report_writer,
+        store.new_report_path(),
+        report_format or settings.report_format,
+        compress,
+    )
+    preview_limit = max(1, settings.batch_preview_limit)
+    rows: List[ClassificationResult] = []
+    pending: List[ClassificationResult] = []
+    summary: Dict[str, int] = {}
+    try:
+        texts = [e["conteudo"] for e in entries]
+        with request_priority(PRIORITY_BATCH):
+            async with aclosing(iter_classified(texts)) as results:
+                async for index, row in results:
+                    row.arquivo = entries[index]["arquivo"]
+                    _record_event("/batch_upload", filename=row.arquivo, **row.to_dict())
+                    pending.append(row)
+                    if len(pending) >= REPORT_WRITE_BATCH:
+                        # File writes, gzip and row-group flushes stay off the event loop.
+                        await asyncio.to_thread(_write_report_rows, writer, pending)
+                        pending = []
+                    summary[row.overall_category] = summary.get(row.overall_category, 0) + 1
+                    if len(rows) < preview_limit:
+                        rows.append(row)
+        if pending:
+            await asyncio.to_thread(_write_report_rows, writer, pending)
+    except BaseException:
+        await asyncio.to_thread(writer.abort)
+        raise
+    report_path = await asyncio.to_thread(_commit_report, writer)
+    report_name = await asyncio.to_thread(store.register, report_path)
+
+    return rows, report_name, summary
 
+
+async def handle_zip_payload(
+    data: Union[bytes, BinaryIO],
+    report_format: Optional[str] = None,
+    compress: bool = False,
+    size_bytes: Optional[int] = None,
+) -> Tuple[List[ClassificationResult], str, Dict[str, int]]:
+    """Classify a ZIP given as bytes or as a seekable file (e.g. the spooled upload)."""
+    if isinstance(data, bytes):
+        size_bytes, data = len(data), io.BytesIO(data)
+    ensure_payload_limit(size_bytes or 0)
+    try:
+        zf = await asyncio.to_thread(zipfile.ZipFile, data)
+    except zipfile.BadZipFile as exc:
+        raise HTTPException(status_code=400, detail="Arquivo ZIP invalido.") from exc
+
+    entries = await asyncio.to_thread(_limited, _iter_zip_entries(zf))
     if not entries:
         raise HTTPException(
             status_code=400,
-            detail="Nenhum .txt ou .pdf valido encontrado no ZIP.",
+            detail="Nenhum .txt, .pdf, .eml ou .mbox valido encontrado no ZIP.",
         )
-
-    texts = [e["conteudo"] for e in entries]
-    results = await classify_many(texts)
-    rows: List[Dict[str, Any]] = []
-    for entry, result in zip(entries, results):
-        content = entry["conteudo"]
-        row = {
-            "arquivo": entry["arquivo"],
-            "primary_category": result.get("primary_category"),
-            "overall_category": result.get("overall_category"),
-            "confidence": result.get("confidence"),
-            "engine": result.get("engine"),
-            "text_hash": hash_text(content or ""),
-            "reply": result.get("reply"),
-        }
-        _record_event("/batch_upload", filename=row["arquivo"], **row)
-        rows.append(row)
-
-    ts = int(time.time())
-    report_name = f"report_{ts}.txt"
-    report_path = settings.reports_dir / report_name
-    await asyncio.to_thread(write_txt_report, rows, report_path)
-
-    summary: Dict[str, int] = {}
-    for r in rows:
-        summary[r["overall_category"]] = summary.get(r["overall_category"], 0) + 1
-
-    return rows, report_name, summary
+    return await _classify_entries(entries, report_format, compress)
+
+
+async def handle_mailbox_payload(
+    stream: BinaryIO,
+    filename: str,
+    size_bytes: int,
+    report_format: Optional[str] = None,
+    compress: bool = False,
+) -> Tuple[List[ClassificationResult], str, Dict[str, int]]:
+    """Classify an uploaded .eml or .mbox file, reading it incrementally."""
+    ensure_payload_limit(size_bytes)
+    entries = await asyncio.to_thread(
+        _limited, iter_mailbox_entries(filename, stream, MAX_UPLOAD_BYTES)
+    )
+    if not entries:
+        raise HTTPException(
+            status_code=400,
+            detail="Nenhuma mensagem valida encontrada no arquivo.",
+        )
+    return await _classify_entries(entries, report_format, compress)
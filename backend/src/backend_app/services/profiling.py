@@ -0,0 +1,215 @@
+"""Diagnostics for live processes: a sampling profiler and per-request profiles.
+
+``sample_stacks`` polls the stacks of every thread for a few seconds and
+returns them in the collapsed format read by flamegraph.pl and speedscope.
+
+``RequestProfile`` covers a single request: a cProfile of the event loop thread
+while the request runs, plus one cProfile per worker-thread call of the
+functions decorated with ``@profiled`` (the profile is found through a context
+variable, which ``asyncio.to_thread`` copies into the worker), and the
+tracemalloc peak. Requests running concurrently on the same event loop show up
+in the loop-thread profile too.
+"""
+
+import cProfile
+import functools
+import io
+import pstats
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Set, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+MAX_SAMPLE_SECONDS = 60.0
+STORED_PROFILES = 20
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> str:
+    """Sample all threads for ``seconds`` and return collapsed stacks."""
+    seconds = max(0.0, min(seconds, MAX_SAMPLE_SECONDS))
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    counts: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            thread = names.get(ident) or f"thread-{ident}"
+            counts[";".join([thread.replace(" ", "_"), *reversed(stack)])] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+class _TracemallocUsers:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._users = 0
+        self._started_here = False
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._users == 0:
+                self._started_here = not tracemalloc.is_tracing()
+                if self._started_here:
+                    tracemalloc.start()
+                tracemalloc.reset_peak()
+            self._users += 1
+
+    def release(self) -> int:
+        with self._lock:
+            _, peak = tracemalloc.get_traced_memory()
+            self._users -= 1
+            if self._users == 0 and self._started_here:
+                tracemalloc.stop()
+            return peak
+
+
+_tracemalloc = _TracemallocUsers()
+
+
+class RequestProfile:
+    def __init__(self, label: str) -> None:
+        self.id = secrets.token_hex(6)
+        self.label = label
+        self.created = time.time()
+        self.wall_ms = 0.0
+        self.peak_bytes = 0
+        self.profiles: List[cProfile.Profile] = []
+        self._busy: Set[int] = set()
+        self._lock = threading.Lock()
+        self._started = 0.0
+        self._loop_profile: Optional[cProfile.Profile] = None
+        self._loop_thread = 0
+        self._token = None
+        self.report = ""
+        self.top = ""
+
+    def start(self) -> "RequestProfile":
+        _tracemalloc.acquire()
+        self._token = _active.set(self)
+        self._loop_profile = cProfile.Profile()
+        self._loop_thread = threading.get_ident()
+        self.profiles.append(self._loop_profile)
+        self._busy.add(self._loop_thread)
+        self._started = time.perf_counter()
+        try:
+            self._loop_profile.enable()
+        except ValueError:
+            # Another profiler already owns this thread (a concurrent profiled request).
+            pass
+        return self
+
+    def stop(self) -> None:
+        if self._loop_profile is None:
+            return
+        self._loop_profile.disable()
+        with self._lock:
+            self._busy.discard(self._loop_thread)
+        self.wall_ms = (time.perf_counter() - self._started) * 1000
+        self.peak_bytes = _tracemalloc.release()
+        try:
+            _active.reset(self._token)
+        except ValueError:
+            # Stopped from a different context (e.g. the response callback).
+            pass
+        self._loop_profile = None
+        self._summarize()
+
+    def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        ident = threading.get_ident()
+        with self._lock:
+            if ident in self._busy:
+                # Nested call on a thread that is already being profiled.
+                return fn(*args, **kwargs)
+            self._busy.add(ident)
+            profile = cProfile.Profile()
+            self.profiles.append(profile)
+        try:
+            return profile.runcall(fn, *args, **kwargs)
+        finally:
+            with self._lock:
+                self._busy.discard(ident)
+
+    def _summarize(self) -> None:
+        stream = io.StringIO()
+        stats = None
+        with self._lock:
+            for profile in self.profiles:
+                if stats is None:
+                    stats = pstats.Stats(profile, stream=stream)
+                else:
+                    stats.add(profile)
+        stream.write(
+            f"{self.label}: {self.wall_ms:.1f} ms wall, tracemalloc peak "
+            f"{self.peak_bytes / 1024:.1f} KiB, {len(self.profiles)} profiled call(s)\n\n"
+        )
+        if stats is None:
+            self.report = stream.getvalue()
+            return
+        stats.sort_stats("cumulative").print_stats(40)
+        self.report = stream.getvalue()
+        ranked = sorted(
+            (
+                (entry[3], f"{func[2]} ({func[0].rsplit('/', 1)[-1]}:{func[1]})")
+                for func, entry in stats.stats.items()
+                if "backend_app" in func[0]
+            ),
+            reverse=True,
+        )
+        self.top = "; ".join(f"{name}={seconds * 1000:.1f}ms" for seconds, name in ranked[:3])
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-Profile-Id": self.id,
+            "X-Profile-Wall-Ms": f"{self.wall_ms:.1f}",
+            "X-Profile-Peak-KB": f"{self.peak_bytes / 1024:.1f}",
+            "X-Profile-Top": self.top,
+        }
+
+
+def profiled(fn: F) -> F:
+    """Include calls of ``fn`` in the active request profile, from any thread."""
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        profile = _active.get()
+        if profile is None:
+            return fn(*args, **kwargs)
+        return profile.run(fn, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+_profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def store_profile(profile: RequestProfile) -> None:
+    with _profiles_lock:
+        _profiles[profile.id] = profile
+        while len(_profiles) > STORED_PROFILES:
+            _profiles.popitem(last=False)
+
+
+def get_profile(profile_id: str) -> Optional[RequestProfile]:
+    with _profiles_lock:
+        return _profiles.get(profile_id)
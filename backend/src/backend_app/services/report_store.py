@@ -0,0 +1,270 @@
+"""Storage lifecycle for generated reports.
+
+Reports get collision-free names, identical reports are deduplicated by the
+SHA-256 of their bytes, and a background sweep removes reports past the
+configured age and evicts the oldest ones while the directory exceeds its size
+budget.
+
+Text reports are also stored precompressed (``.encoded/<name>.gz``, and
+``.zst`` when zstandard is installed) by a background thread once they are
+registered, so downloads can be served from those files without compressing
+on every request, and the batch response does not wait for them; until a copy
+exists the plain file is served. The copies count towards the size budget and
+go away with their report.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from ..config.settings import get_settings
+from .compression import FILE_SUFFIXES, available_encodings, compress_file
+
+logger = logging.getLogger("backend_app.report_store")
+
+INDEX_DIR_NAME = ".index"
+ENCODED_DIR_NAME = ".encoded"
+# Already compressed (gzip reports, Parquet); another encoding would not help.
+PRECOMPRESS_SUFFIXES = (".txt", ".csv", ".jsonl")
+REPORT_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+STALE_TMP_SECONDS = 24 * 3600
+
+
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ReportStore:
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = 0,
+        max_age_seconds: float = 0,
+        encodings: Sequence[str] = (),
+    ) -> None:
+        self.root = root
+        self.index_dir = root / INDEX_DIR_NAME
+        self.encoded_dir = root / ENCODED_DIR_NAME
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.encodings = tuple(encodings)
+        self._precompressor: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[Future] = set()
+        # Guards the executor and _pending; requests register reports from
+        # several threads (the batch endpoints run in the threadpool).
+        self._lock = threading.Lock()
+
+    def new_report_path(self) -> Path:
+        """Base path (without extension) that is unique across workers."""
+        return self.root / f"report_{int(time.time())}_{secrets.token_hex(4)}"
+
+    def resolve(self, name: str) -> Optional[Path]:
+        if not REPORT_NAME_RE.match(name or ""):
+            return None
+        path = self.root / name
+        return path if path.is_file() else None
+
+    def register(self, path: Path) -> str:
+        """Deduplicate a committed report and return the name to serve."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        entry = self.index_dir / file_digest(path)
+        try:
+            fd = os.open(entry, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            existing = self.resolve(entry.read_text(encoding="utf-8").strip())
+            if existing is not None and existing != path:
+                try:
+                    os.utime(existing)
+                except FileNotFoundError:
+                    # Swept by retention since resolve(); keep the new report instead.
+                    existing = None
+                else:
+                    path.unlink()
+                    return existing.name
+            tmp = entry.with_name(f"{entry.name}.{secrets.token_hex(4)}.tmp")
+            tmp.write_text(path.name, encoding="utf-8")
+            os.replace(tmp, entry)
+            self.schedule_precompress(path)
+            return path.name
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(path.name)
+        self.schedule_precompress(path)
+        return path.name
+
+    def schedule_precompress(self, path: Path) -> None:
+        """Precompress ``path`` in the background; downloads use the plain file meanwhile."""
+        if not self.encodings or not path.name.endswith(PRECOMPRESS_SUFFIXES):
+            return
+        with self._lock:
+            if self._precompressor is None:
+                self._precompressor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="report-precompress"
+                )
+            future = self._precompressor.submit(self.precompress, path)
+            self._pending.add(future)
+        # Outside the lock: the callback runs right away if the future is done.
+        future.add_done_callback(self._forget)
+
+    def _forget(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+
+    def wait_precompressed(self, timeout: Optional[float] = None) -> None:
+        """Block until the scheduled precompression work is done."""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending, timeout=timeout)
+
+    def shutdown(self) -> None:
+        """Drop queued precompression; leftovers are rebuilt or swept later."""
+        with self._lock:
+            precompressor, self._precompressor = self._precompressor, None
+        if precompressor is not None:
+            precompressor.shutdown(wait=False, cancel_futures=True)
+
+    def precompress(self, path: Path) -> None:
+        if not path.name.endswith(PRECOMPRESS_SUFFIXES):
+            return
+        self.encoded_dir.mkdir(parents=True, exist_ok=True)
+        for encoding in self.encodings:
+            target = self.encoded_path(path.name, encoding)
+            tmp = target.with_name(f".{target.name}.{secrets.token_hex(4)}.tmp")
+            try:
+                compress_file(path, tmp, encoding)
+                os.replace(tmp, target)
+            except FileNotFoundError:
+                # Removed by retention while queued.
+                tmp.unlink(missing_ok=True)
+                return
+            except Exception as exc:
+                tmp.unlink(missing_ok=True)
+                logger.warning("Could not precompress %s as %s: %s", path.name, encoding, exc)
+
+    def encoded_path(self, name: str, encoding: str) -> Path:
+        return self.encoded_dir / f"{name}{FILE_SUFFIXES[encoding]}"
+
+    def encoded_variants(self, name: str) -> Dict[str, Path]:
+        """Precompressed copies of report ``name`` that exist on disk, by encoding."""
+        variants = {}
+        for encoding in self.encodings:
+            path = self.encoded_path(name, encoding)
+            if path.is_file():
+                variants[encoding] = path
+        return variants
+
+    def _remove(self, path: Path) -> None:
+        path.unlink(missing_ok=True)
+        for encoding in FILE_SUFFIXES:
+            self.encoded_path(path.name, encoding).unlink(missing_ok=True)
+
+    def _reports(self) -> List[Tuple[float, int, Path]]:
+        reports = []
+        now = time.time()
+        for item in self.root.iterdir():
+            try:
+                stat = item.stat()
+            except FileNotFoundError:
+                continue
+            if not item.is_file():
+                continue
+            if item.name.startswith("."):
+                if item.name.endswith(".tmp") and now - stat.st_mtime > STALE_TMP_SECONDS:
+                    item.unlink(missing_ok=True)
+                continue
+            size = stat.st_size
+            for variant in self.encoded_variants(item.name).values():
+                try:
+                    size += variant.stat().st_size
+                except FileNotFoundError:
+                    pass
+            reports.append((stat.st_mtime, size, item))
+        reports.sort(key=lambda r: r[0])
+        return reports
+
+    def enforce_retention(self) -> int:
+        """Delete expired reports, then the oldest ones over the size budget."""
+        if not self.root.exists():
+            return 0
+        removed = 0
+        reports = self._reports()
+        now = time.time()
+        if self.max_age_seconds:
+            kept = []
+            for mtime, size, path in reports:
+                if now - mtime > self.max_age_seconds:
+                    self._remove(path)
+                    removed += 1
+                else:
+                    kept.append((mtime, size, path))
+            reports = kept
+        if self.max_bytes:
+            total = sum(size for _, size, _ in reports)
+            for _, size, path in reports:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                removed += 1
+        self._sweep_encoded()
+        if removed and self.index_dir.exists():
+            for entry in self.index_dir.iterdir():
+                try:
+                    name = entry.read_text(encoding="utf-8").strip()
+                except OSError:
+                    continue
+                if self.resolve(name) is None:
+                    entry.unlink(missing_ok=True)
+        if removed:
+            logger.info("Report retention removed %d file(s) from %s", removed, self.root)
+        return removed
+
+    def _sweep_encoded(self) -> None:
+        """Drop precompressed copies whose report is gone and stale temp files."""
+        if not self.encoded_dir.exists():
+            return
+        now = time.time()
+        suffixes = tuple(FILE_SUFFIXES.values())
+        for item in self.encoded_dir.iterdir():
+            try:
+                if item.name.startswith("."):
+                    if now - item.stat().st_mtime > STALE_TMP_SECONDS:
+                        item.unlink(missing_ok=True)
+                    continue
+            except FileNotFoundError:
+                continue
+            original = next((item.name[: -len(s)] for s in suffixes if item.name.endswith(s)), None)
+            if original is None or self.resolve(original) is None:
+                item.unlink(missing_ok=True)
+
+    async def run_retention(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.enforce_retention)
+            except Exception as exc:
+                logger.warning("Report retention sweep failed: %s", exc)
+            await asyncio.sleep(interval_seconds)
+
+
+@lru_cache()
+def get_report_store() -> ReportStore:
+    settings = get_settings()
+    encodings = [e for e in available_encodings() if e in ("zstd", "gzip")]
+    return ReportStore(
+        settings.reports_dir,
+        max_bytes=settings.reports_max_mb * 1024 * 1024,
+        max_age_seconds=settings.report_retention_hours * 3600,
+        encodings=encodings if settings.report_precompress else (),
+    )
@@ -0,0 +1,283 @@
+"""Streaming report writers for batch results.
+
+Rows are appended to a temporary file next to the final report as soon as they
+are available and the file is atomically renamed on commit, so a report is
+never materialized in memory and readers never observe a partial file.
+"""
+
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import secrets
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Mapping, Optional, Type, Union
+
+from fastapi import HTTPException
+
+from ..models.records import ClassificationResult
+
+logger = logging.getLogger("backend_app.reports")
+
+Row = Union[ClassificationResult, Mapping[str, Any]]
+
+REPORT_COLUMNS = [
+    ("arquivo", "Arquivo"),
+    ("overall_category", "Categoria binaria"),
+    ("primary_category", "Categoria principal"),
+    ("confidence", "Confianca"),
+    ("engine", "Engine"),
+    ("text_hash", "Hash"),
+    ("reply", "Resposta"),
+]
+
+
+class ReportWriter(ABC):
+    """Base class: subclasses implement ``_open`` and ``_write``."""
+
+    extension = ""
+    supports_gzip = True
+
+    def __init__(self, path: Path, compress: bool = False, append: bool = False) -> None:
+        self.path = path
+        self.compress = compress and self.supports_gzip
+        self.append = append
+        self.rows_written = 0
+        self._tmp_path = self.path.with_name(f".{self.path.name}.{secrets.token_hex(4)}.tmp")
+        self._raw: Optional[BinaryIO] = None
+        self._stream: Optional[BinaryIO] = None
+        self._fresh = True
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    def open(self) -> "ReportWriter":
+        """Open the temp file, or ``path`` itself in append mode (no atomic rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.append:
+            self._raw = self.path.open("ab")
+            self._fresh = self._raw.tell() == 0
+        else:
+            self._raw = self._tmp_path.open("wb")
+        self._stream = self._raw
+        if self.compress:
+            self._stream = gzip.GzipFile(filename="", mode="wb", fileobj=self._raw, mtime=0)
+        self._open(self._stream)
+        return self
+
+    def write_row(self, row: Row) -> None:
+        if isinstance(row, ClassificationResult):
+            row = row.to_dict()
+        self._write(row)
+        self.rows_written += 1
+
+    def write_rows(self, rows: Iterable[Row]) -> None:
+        for row in rows:
+            self.write_row(row)
+
+    @abstractmethod
+    def _open(self, stream: BinaryIO) -> None:
+        """Prepare ``stream`` (write headers, create encoders)."""
+
+    @abstractmethod
+    def _write(self, row: Mapping[str, Any]) -> None:
+        """Encode one row."""
+
+    def _finish(self) -> None:
+        """Flush any buffered rows before the underlying file is closed."""
+
+    def _close(self) -> None:
+        if self._stream is not None and self._stream is not self._raw:
+            self._stream.close()
+        if self._raw is not None:
+            self._raw.close()
+        self._stream = self._raw = None
+
+    def flush(self) -> int:
+        """Flush and fsync everything written so far; return the file size."""
+        self._flush_buffers()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        return self._raw.tell()
+
+    def _flush_buffers(self) -> None:
+        if self._stream is not self._raw:
+            self._stream.flush()
+
+    def commit(self) -> Path:
+        try:
+            self._finish()
+        finally:
+            self._close()
+        if not self.append:
+            os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        try:
+            self._close()
+        finally:
+            if not self.append:
+                try:
+                    self._tmp_path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def __enter__(self) -> "ReportWriter":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+class _TextReportWriter(ReportWriter):
+    def _open(self, stream: BinaryIO) -> None:
+        self._text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+
+    def _flush_buffers(self) -> None:
+        self._text.flush()
+        super()._flush_buffers()
+
+    def _close(self) -> None:
+        text = getattr(self, "_text", None)
+        if text is not None:
+            try:
+                text.flush()
+                text.detach()
+            except ValueError:
+                pass
+            self._text = None
+        super()._close()
+
+
+def _format_cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+class TsvReportWriter(_TextReportWriter):
+    extension = ".txt"
+
+    def _open(self, stream: BinaryIO) -> None:
+        super()._open(stream)
+        if self._fresh:
+            self._text.write("\t".join(label for _, label in REPORT_COLUMNS) + "\n")
+
+    def _write(self, row: Mapping[str, Any]) -> None:
+        values = (
+            _format_cell(row.get(key)).replace("\t", " ").replace("\n", " ").strip()
+            for key, _ in REPORT_COLUMNS
+        )
+        self._text.write("\t".join(values) + "\n")
+
+
+class CsvReportWriter(_TextReportWriter):
+    extension = ".csv"
+
+    def _open(self, stream: BinaryIO) -> None:
+        super()._open(stream)
+        self._csv = csv.writer(self._text)
+        if self._fresh:
+            self._csv.writerow([label for _, label in REPORT_COLUMNS])
+
+    def _write(self, row: Mapping[str, Any]) -> None:
+        self._csv.writerow([_format_cell(row.get(key)) for key, _ in REPORT_COLUMNS])
+
+
+class JsonlReportWriter(_TextReportWriter):
+    extension = ".jsonl"
+
+    def _write(self, row: Mapping[str, Any]) -> None:
+        record = {key: row.get(key) for key, _ in REPORT_COLUMNS}
+        self._text.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+class ParquetReportWriter(ReportWriter):
+    """Columnar output; rows are flushed as one row group every ``row_group_size``."""
+
+    extension = ".parquet"
+    supports_gzip = False
+    row_group_size = 1000
+
+    def __init__(self, path: Path, compress: bool = False, append: bool = False) -> None:
+        if append:
+            raise ValueError("Parquet reports cannot be appended to.")
+        super().__init__(path)
+        self.codec = "gzip" if compress else "snappy"
+        self._buffer: Dict[str, List[Any]] = {key: [] for key, _ in REPORT_COLUMNS}
+
+    def _open(self, stream: BinaryIO) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                (key, pa.float64() if key == "confidence" else pa.string())
+                for key, _ in REPORT_COLUMNS
+            ]
+        )
+        self._parquet = pq.ParquetWriter(stream, self._schema, compression=self.codec)
+
+    def _write(self, row: Mapping[str, Any]) -> None:
+        for key, _ in REPORT_COLUMNS:
+            value = row.get(key)
+            if key == "confidence":
+                value = float(value) if value is not None else None
+            elif value is not None:
+                value = str(value)
+            self._buffer[key].append(value)
+        if len(self._buffer["arquivo"]) >= self.row_group_size:
+            self._flush_group()
+
+    def _flush_group(self) -> None:
+        if not self._buffer["arquivo"]:
+            return
+        table = self._pa.Table.from_pydict(self._buffer, schema=self._schema)
+        self._parquet.write_table(table)
+        for values in self._buffer.values():
+            values.clear()
+
+    def _finish(self) -> None:
+        self._flush_group()
+        self._parquet.close()
+
+
+REPORT_WRITERS: Dict[str, Type[ReportWriter]] = {
+    "txt": TsvReportWriter,
+    "csv": CsvReportWriter,
+    "jsonl": JsonlReportWriter,
+    "parquet": ParquetReportWriter,
+}
+
+
+def open_report_writer(base_path: Path, report_format: str, compress: bool = False) -> ReportWriter:
+    """Create and open a writer for ``base_path`` (without extension)."""
+    writer_cls = REPORT_WRITERS.get((report_format or "").lower())
+    if writer_cls is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato de relatorio invalido. Use: {', '.join(REPORT_WRITERS)}.",
+        )
+    gzipped = compress and writer_cls.supports_gzip
+    suffix = writer_cls.extension + (".gz" if gzipped else "")
+    writer = writer_cls(base_path.with_name(base_path.name + suffix), compress=compress)
+    try:
+        return writer.open()
+    except ImportError as exc:
+        writer.abort()
+        logger.warning("Report format %s unavailable: %s", report_format, exc)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato de relatorio {report_format} indisponivel neste servidor.",
+        ) from exc
@@ -0,0 +1,263 @@
+"""Priority-aware admission for the inference and reply stages.
+
+Work is tagged with a priority class through a context variable (set by the
+processing layer) and admitted into a fixed number of slots per stage. When
+slots are contended, waiting requests are served by weighted fair queuing:
+each class receives a share of the freed slots proportional to its weight, so
+interactive requests keep flowing while a large batch is running and bulk work
+still makes progress instead of starving. With adaptive concurrency enabled the
+number of slots follows an AIMD limit fed by the latency and errors of the
+work run inside each slot (see ``limits``).
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional, Tuple
+
+from ..config.settings import get_settings
+from .limits import AIMDLimit
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+PRIORITY_BACKGROUND = "background"
+PRIORITY_CLASSES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH, PRIORITY_BACKGROUND)
+
+_current_priority: ContextVar[str] = ContextVar("request_priority", default=PRIORITY_INTERACTIVE)
+
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+
+@contextmanager
+def request_priority(priority: str) -> Iterator[None]:
+    """Tag work started inside the block (including spawned tasks) with ``priority``."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class _WaitStats:
+    def __init__(self, window: int = 1024) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+
+        def _pct(q: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+        return {
+            "admitted": self.count,
+            "mean_wait_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_wait_ms": round(_pct(0.50), 3),
+            "p95_wait_ms": round(_pct(0.95), 3),
+            "max_wait_ms": round(self.max * 1000, 3),
+        }
+
+
+class WeightedFairScheduler:
+    """Admit work into ``capacity`` slots, serving waiters by weighted fair queuing.
+
+    Every waiter gets a virtual finish tag ``max(V, last_finish[class]) + 1/weight``
+    and freed slots go to the waiter with the smallest tag. When ``limiter`` is
+    given, it replaces the fixed capacity and every slot reports its latency to
+    it. Must only be used from the event loop thread.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int,
+        weights: Dict[str, float],
+        limiter: Optional[AIMDLimit] = None,
+    ) -> None:
+        self.name = name
+        self._capacity = max(capacity, 1)
+        self.limiter = limiter
+        self.weights = {cls: max(float(weights.get(cls, 1)), 1e-6) for cls in PRIORITY_CLASSES}
+        self.in_use = 0
+        self._virtual_time = 0.0
+        self._last_finish = {cls: 0.0 for cls in PRIORITY_CLASSES}
+        self._queues: Dict[str, Deque[Tuple[float, asyncio.Future]]] = {
+            cls: deque() for cls in PRIORITY_CLASSES
+        }
+        self._stats = {cls: _WaitStats() for cls in PRIORITY_CLASSES}
+
+    @property
+    def capacity(self) -> int:
+        return self.limiter.current if self.limiter is not None else self._capacity
+
+    def _queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    async def acquire(self, priority: Optional[str] = None) -> float:
+        """Wait for a slot; return the time spent queued in seconds."""
+        cls = priority if priority in self._queues else current_priority()
+        if cls not in self._queues:
+            cls = PRIORITY_INTERACTIVE
+        if self.in_use < self.capacity and not self._queued():
+            self.in_use += 1
+            self._stats[cls].add(0.0)
+            return 0.0
+
+        start = max(self._virtual_time, self._last_finish[cls])
+        finish = start + 1.0 / self.weights[cls]
+        self._last_finish[cls] = finish
+        future = asyncio.get_running_loop().create_future()
+        entry = (finish, future)
+        self._queues[cls].append(entry)
+        queued_at = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over right before the cancellation landed.
+                self.release()
+            else:
+                try:
+                    self._queues[cls].remove(entry)
+                except ValueError:
+                    pass
+            raise
+        waited = time.perf_counter() - queued_at
+        self._stats[cls].add(waited)
+        return waited
+
+    def _pop_next(self) -> Optional[asyncio.Future]:
+        best_cls = None
+        for cls, queue in self._queues.items():
+            while queue and queue[0][1].done():
+                queue.popleft()
+            if queue and (best_cls is None or queue[0][0] < self._queues[best_cls][0][0]):
+                best_cls = cls
+        if best_cls is None:
+            return None
+        finish, future = self._queues[best_cls].popleft()
+        self._virtual_time = finish
+        return future
+
+    def release(self) -> None:
+        # After the limit shrank, freed slots are retired instead of handed over.
+        future = self._pop_next() if self.in_use <= self.capacity else None
+        if future is None:
+            self.in_use = max(self.in_use - 1, 0)
+            return
+        future.set_result(None)
+
+    def _admit_waiters(self) -> None:
+        while self.in_use < self.capacity:
+            future = self._pop_next()
+            if future is None:
+                return
+            self.in_use += 1
+            future.set_result(None)
+
+    def record(self, latency: float, error: bool = False) -> None:
+        """Feed the limiter with one finished call and admit waiters if it grew."""
+        if self.limiter is None:
+            return
+        self.limiter.on_sample(latency, self.in_use, error)
+        self._admit_waiters()
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[str] = None) -> AsyncIterator[float]:
+        waited = await self.acquire(priority)
+        started = time.perf_counter()
+        error = False
+        try:
+            yield waited
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.record(time.perf_counter() - started, error)
+            self.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "adaptive": self.limiter is not None,
+            "classes": {
+                cls: {
+                    "weight": self.weights[cls],
+                    "queued": len(self._queues[cls]),
+                    **self._stats[cls].snapshot(),
+                }
+                for cls in PRIORITY_CLASSES
+            },
+        }
+
+
+def _weights() -> Dict[str, float]:
+    settings = get_settings()
+    return {
+        PRIORITY_INTERACTIVE: settings.priority_weight_interactive,
+        PRIORITY_BATCH: settings.priority_weight_batch,
+        PRIORITY_BACKGROUND: settings.priority_weight_background,
+    }
+
+
+_schedulers: Dict[str, WeightedFairScheduler] = {}
+STAGES = ("inference", "reply")
+
+
+def get_scheduler(stage: str) -> WeightedFairScheduler:
+    """Process-wide scheduler for ``stage`` ("inference" or "reply")."""
+    scheduler = _schedulers.get(stage)
+    if scheduler is None:
+        settings = get_settings()
+        if stage == "reply":
+            capacity, max_limit = settings.reply_concurrency, settings.reply_max_concurrency
+        else:
+            capacity, max_limit = settings.inference_concurrency, settings.inference_max_concurrency
+        limiter = None
+        if settings.adaptive_concurrency:
+            limiter = AIMDLimit(
+                initial=capacity,
+                min_limit=1,
+                max_limit=max_limit,
+                backoff=settings.concurrency_backoff,
+                latency_tolerance=settings.concurrency_latency_tolerance,
+            )
+        scheduler = _schedulers[stage] = WeightedFairScheduler(
+            stage, capacity, _weights(), limiter=limiter
+        )
+    return scheduler
+
+
+def scheduler_snapshot() -> Dict[str, Any]:
+    return {stage: get_scheduler(stage).snapshot() for stage in STAGES}
+
+
+def limits_snapshot() -> Dict[str, Any]:
+    snapshot: Dict[str, Any] = {}
+    for stage in STAGES:
+        scheduler = get_scheduler(stage)
+        snapshot[stage] = {
+            "in_use": scheduler.in_use,
+            "queued": scheduler._queued(),
+            **(
+                scheduler.limiter.snapshot()
+                if scheduler.limiter is not None
+                else {"limit": scheduler.capacity, "adaptive": False}
+            ),
+        }
+    return snapshot
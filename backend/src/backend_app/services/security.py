@@ -0,0 +1,23 @@
+"""Admin token checks for diagnostic endpoints."""
+
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from ..config.settings import get_settings
+
+
+def admin_token_valid(token: Optional[str]) -> bool:
+    expected = get_settings().admin_token
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8"))
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not get_settings().admin_token:
+        # Admin routes do not exist unless a token is configured.
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not admin_token_valid(x_admin_token):
+        raise HTTPException(status_code=403, detail="Acesso negado.")
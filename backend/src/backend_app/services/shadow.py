@@ -0,0 +1,226 @@
+"""Shadow evaluation of a candidate classifier on live traffic.
+
+A fraction (``SHADOW_SAMPLE_RATE``) of classified emails is handed to a
+candidate engine after the response has been computed. The candidate runs on a
+single low-priority thread with a short queue; when it falls behind, samples
+are dropped instead of delaying requests. Agreement, the confusion matrix and
+latencies are aggregated per ``primary engine -> candidate`` pair and saved as
+a small JSON file, so the comparison survives restarts.
+"""
+
+import importlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional
+
+from ..config.settings import get_settings
+
+logger = logging.getLogger("backend_app.shadow")
+
+Candidate = Callable[[str], Dict[str, Any]]
+
+LATENCY_WINDOW = 1000
+SAVE_EVERY = 50
+
+
+def resolve_candidate(spec: str) -> Candidate:
+    """``heuristic``, ``zero_shot`` or ``package.module:function``."""
+    from . import nlp
+
+    builtin = {"heuristic": nlp.heuristic_multiclass, "zero_shot": nlp.zero_shot_multiclass}
+    if spec in builtin:
+        return builtin[spec]
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Invalid shadow engine {spec!r}; expected module:function")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _percentiles(values: Deque[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0}
+
+    def _pct(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(_pct(0.50), 3),
+        "p95": round(_pct(0.95), 3),
+    }
+
+
+class _PairStats:
+    def __init__(self, data: Optional[Dict[str, Any]] = None) -> None:
+        data = data or {}
+        self.samples = int(data.get("samples", 0))
+        self.agree = int(data.get("agree", 0))
+        self.confusion: Dict[str, Dict[str, int]] = data.get("confusion", {})
+        self.primary_ms: Deque[float] = deque(data.get("primary_ms", ()), maxlen=LATENCY_WINDOW)
+        self.candidate_ms: Deque[float] = deque(data.get("candidate_ms", ()), maxlen=LATENCY_WINDOW)
+
+    def add(self, primary: str, candidate: str, primary_ms: float, candidate_ms: float) -> None:
+        self.samples += 1
+        self.agree += primary == candidate
+        row = self.confusion.setdefault(primary, {})
+        row[candidate] = row.get(candidate, 0) + 1
+        self.primary_ms.append(round(primary_ms, 3))
+        self.candidate_ms.append(round(candidate_ms, 3))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "agree": self.agree,
+            "confusion": self.confusion,
+            "primary_ms": list(self.primary_ms),
+            "candidate_ms": list(self.candidate_ms),
+        }
+
+    def report(self) -> Dict[str, Any]:
+        per_category = {
+            category: {
+                "samples": sum(row.values()),
+                "agreement": round(row.get(category, 0) / max(sum(row.values()), 1), 4),
+            }
+            for category, row in self.confusion.items()
+        }
+        deltas = deque(c - p for p, c in zip(self.primary_ms, self.candidate_ms))
+        return {
+            "samples": self.samples,
+            "agreement": round(self.agree / self.samples, 4) if self.samples else None,
+            "per_category": per_category,
+            "confusion": self.confusion,
+            "primary_ms": _percentiles(self.primary_ms),
+            "candidate_ms": _percentiles(self.candidate_ms),
+            "delta_ms": _percentiles(deltas),
+        }
+
+
+def _lower_thread_priority() -> None:
+    try:
+        # Linux applies nice values per thread.
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
+
+class ShadowEvaluator:
+    def __init__(
+        self,
+        candidate: Candidate,
+        candidate_name: str,
+        sample_rate: float,
+        store_path: Optional[Path] = None,
+        max_pending: int = 32,
+    ) -> None:
+        self.candidate = candidate
+        self.candidate_name = candidate_name
+        self.sample_rate = sample_rate
+        self.store_path = Path(store_path) if store_path else None
+        self.max_pending = max_pending
+        self.pending = 0
+        self.dropped = 0
+        self.errors = 0
+        self._pairs: Dict[str, _PairStats] = {}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="shadow", initializer=_lower_thread_priority
+        )
+        self._load()
+
+    def _load(self) -> None:
+        if not self.store_path or not self.store_path.exists():
+            return
+        try:
+            data = json.loads(self.store_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable shadow store %s: %s", self.store_path, exc)
+            return
+        self._pairs = {pair: _PairStats(stats) for pair, stats in data.get("pairs", {}).items()}
+
+    def save(self) -> None:
+        if not self.store_path:
+            return
+        with self._lock:
+            payload = {"pairs": {pair: stats.to_dict() for pair, stats in self._pairs.items()}}
+            self._unsaved = 0
+        self.store_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.store_path.with_name(self.store_path.name + ".tmp")
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp, self.store_path)
+
+    def maybe_submit(
+        self, text: str, primary_label: str, primary_engine: str, primary_seconds: float
+    ) -> bool:
+        """Sample this request for shadow evaluation; never blocks the caller."""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.pending += 1
+        self._executor.submit(self._evaluate, text, primary_label, primary_engine, primary_seconds)
+        return True
+
+    def _evaluate(
+        self, text: str, primary_label: str, primary_engine: str, primary_seconds: float
+    ) -> None:
+        try:
+            started = time.perf_counter()
+            result = self.candidate(text)
+            elapsed = time.perf_counter() - started
+            label = str(result.get("label") or "none")
+            pair = f"{primary_engine} -> {result.get('engine') or self.candidate_name}"
+            with self._lock:
+                stats = self._pairs.setdefault(pair, _PairStats())
+                stats.add(primary_label, label, primary_seconds * 1000, elapsed * 1000)
+                self._unsaved += 1
+                should_save = self._unsaved >= SAVE_EVERY
+            if should_save:
+                self.save()
+        except Exception as exc:
+            self.errors += 1
+            logger.warning("Shadow candidate %s failed: %s", self.candidate_name, exc)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            pairs = {pair: stats.report() for pair, stats in self._pairs.items()}
+        return {
+            "candidate": self.candidate_name,
+            "sample_rate": self.sample_rate,
+            "pending": self.pending,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "pairs": pairs,
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.save()
+
+
+@lru_cache()
+def get_shadow_evaluator() -> Optional[ShadowEvaluator]:
+    settings = get_settings()
+    if settings.shadow_sample_rate <= 0 or not settings.shadow_engine:
+        return None
+    return ShadowEvaluator(
+        resolve_candidate(settings.shadow_engine),
+        settings.shadow_engine,
+        sample_rate=settings.shadow_sample_rate,
+        store_path=settings.shadow_store_path,
+    )
@@ -0,0 +1,89 @@
+"""Per-batch serialization cost of /api/batch: Pydantic models vs prebuilt records.
+
+Usage: python benchmarks/bench_serialization.py [--items 200] [--repeat 50]
+
+The "models" path reproduces what FastAPI did before: build ProcessResponse
+and BatchProcessResponse, dump them, validate the dump against the
+response_model and serialize with JSONResponse. The "records" path is the
+current one: TypedDict records rendered by FastJSONResponse.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "backend" / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from backend_app.models.records import FastJSONResponse, to_process_record  # noqa: E402
+from backend_app.models.schemas import BatchProcessResponse, ProcessResponse  # noqa: E402
+from backend_app.services.nlp import build_template_reply  # noqa: E402
+
+
+def _payloads(items: int):
+    reply = build_template_reply("Suporte tecnico", "") * 3
+    return [
+        {
+            "primary_category": "Suporte tecnico",
+            "overall_category": "Produtivo",
+            "confidence": 0.873,
+            "engine": "Transformers (bart-large-mnli)",
+            "reply": reply,
+            "text_hash": f"{idx:064x}",
+        }
+        for idx in range(items)
+    ]
+
+
+def models_path(payloads) -> bytes:
+    response = BatchProcessResponse(
+        results=[
+            ProcessResponse(
+                primary_category=item.get("primary_category"),
+                overall_category=item.get("overall_category"),
+                confidence=float(item.get("confidence", 0)),
+                engine=item.get("engine") or "unknown",
+                reply=item.get("reply") or "",
+                text_hash=item.get("text_hash", ""),
+            )
+            for item in payloads
+        ]
+    )
+    validated = BatchProcessResponse.model_validate(response.model_dump())
+    return JSONResponse(validated.model_dump(mode="json")).body
+
+
+def records_path(payloads) -> bytes:
+    return FastJSONResponse({"results": [to_process_record(item) for item in payloads]}).body
+
+
+def _measure(fn, payloads, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(payloads)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = _payloads(args.items)
+    assert len(models_path(payloads)) > 0 and len(records_path(payloads)) > 0
+    before = _measure(models_path, payloads, args.repeat)
+    after = _measure(records_path, payloads, args.repeat)
+    print(f"items={args.items} response_class={FastJSONResponse.__name__}")
+    print(f"models : {before:8.3f} ms/batch")
+    print(f"records: {after:8.3f} ms/batch ({before / after:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
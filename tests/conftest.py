@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "backend" / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# Keep runtime files written by the app out of the repository; set before the
+# settings are first read.
+_RUNTIME_DIR = Path(tempfile.mkdtemp(prefix="email-smart-reply-tests-"))
+os.environ["AUDIT_LOG_PATH"] = str(_RUNTIME_DIR / "email_events.jsonl")
+os.environ["SHADOW_STORE_PATH"] = str(_RUNTIME_DIR / "shadow_eval.json")
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend_app.middlewares import admission
+from backend_app.middlewares.admission import (
+    AdmissionMiddleware,
+    InMemoryBucketStore,
+    SQLiteBucketStore,
+    client_key,
+    parse_api_keys,
+    parse_networks,
+)
+
+
+def _client(store, **options):
+    app = FastAPI()
+
+    @app.post("/api/batch")
+    async def batch(request: Request):
+        body = await request.json()
+        return {"count": len(body["texts"])}
+
+    @app.post("/api/process")
+    async def process():
+        return {"ok": True}
+
+    app.add_middleware(AdmissionMiddleware, store=store, **options)
+    return TestClient(app)
+
+
+def test_batch_cost_follows_item_count_and_rejects_with_retry_after():
+    client = _client(InMemoryBucketStore(), rate=1, burst=10, max_concurrent=0, api_keys="outra")
+    resp = client.post("/api/batch", json={"texts": ["a"] * 8})
+    assert resp.status_code == 200
+    assert resp.json() == {"count": 8}
+
+    resp = client.post("/api/batch", json={"texts": ["a"] * 5})
+    assert resp.status_code == 429
+    assert int(resp.headers["retry-after"]) >= 3
+
+    # Other clients have their own bucket.
+    resp = client.post("/api/process", json={"text": "x"}, headers={"X-API-Key": "outra"})
+    assert resp.status_code == 200
+
+
+def test_sqlite_store_shares_buckets_between_workers(tmp_path):
+    path = tmp_path / "admission.sqlite3"
+    options = dict(rate=0.01, burst=2, max_concurrent=0, api_keys="integracao")
+    first = _client(SQLiteBucketStore(path), **options)
+    second = _client(SQLiteBucketStore(path), **options)
+    headers = {"Authorization": "Bearer integracao"}
+    assert first.post("/api/process", json={}, headers=headers).status_code == 200
+    assert second.post("/api/process", json={}, headers=headers).status_code == 200
+    assert first.post("/api/process", json={}, headers=headers).status_code == 429
+
+
+def test_unknown_api_keys_share_the_ip_bucket():
+    client = _client(InMemoryBucketStore(), rate=0.01, burst=2, max_concurrent=0, api_keys="valida")
+    statuses = [
+        client.post("/api/process", json={}, headers={"X-API-Key": f"inventada-{i}"}).status_code
+        for i in range(3)
+    ]
+    assert statuses == [200, 200, 429]
+    assert client.post("/api/process", json={}, headers={"X-API-Key": "valida"}).status_code == 200
+
+
+def test_forwarded_for_is_only_trusted_from_configured_proxies():
+    proxies = parse_networks("10.0.0.0/8")
+    scope = {
+        "client": ("10.1.2.3", 1234),
+        "headers": [(b"x-forwarded-for", b"1.1.1.1, 203.0.113.9, 10.0.0.5")],
+    }
+    assert client_key(scope, frozenset(), proxies) == "ip:203.0.113.9"
+    assert client_key(scope) == "ip:10.1.2.3"
+
+    direct = {"client": ("198.51.100.7", 1234), "headers": scope["headers"]}
+    assert client_key(direct, frozenset(), proxies) == "ip:198.51.100.7"
+
+    keyed = {"client": ("10.1.2.3", 1234), "headers": [(b"x-api-key", b"valida")]}
+    assert client_key(keyed, parse_api_keys("outra, valida"), proxies).startswith("key:")
+
+
+def test_concurrency_cap_counts_requests_waiting_on_the_store():
+    class SlowStore:
+        blocking = True
+
+        def take(self, key, cost, rate, burst):
+            time.sleep(0.05)
+            return 0.0
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    middleware = AdmissionMiddleware(app, store=SlowStore(), max_concurrent=1)
+
+    async def request():
+        statuses = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        scope = {"type": "http", "method": "POST", "path": "/api/process", "headers": [], "client": ("1.2.3.4", 1)}
+        await middleware(scope, receive, send)
+        return statuses[0]
+
+    async def main():
+        return await asyncio.gather(*(request() for _ in range(4)))
+
+    assert sorted(asyncio.run(main())) == [200, 429, 429, 429]
+    assert middleware._inflight == {}
+
+
+def test_idle_buckets_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(admission, "PRUNE_INTERVAL_SECONDS", 0.0)
+    store = InMemoryBucketStore()
+    store.take("a", 1, rate=1000, burst=1)
+    time.sleep(0.01)
+    store.take("b", 1, rate=1000, burst=1)
+    assert len(store) == 1
+
+    sqlite_store = SQLiteBucketStore(tmp_path / "admission.sqlite3")
+    sqlite_store.take("a", 1, rate=1000, burst=1)
+    time.sleep(0.01)
+    sqlite_store.take("b", 1, rate=1000, burst=1)
+    rows = sqlite_store._connect().execute("SELECT key FROM buckets").fetchall()
+    assert rows == [("b",)]
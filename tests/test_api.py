@@ -2,6 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app import app
+from backend_app.models.records import ClassificationResult
+from backend_app.services.processing import hash_text
 
 
 @pytest.fixture
@@ -11,16 +13,17 @@ def client():
 
 @pytest.fixture(autouse=True)
 def stub_classifiers(monkeypatch):
-    async def fake_classify_text(content: str, route: str):
-        return {
-            "primary_category": "Status de chamado",
-            "overall_category": "Produtivo",
-            "confidence": 0.91,
-            "engine": "MockEngine",
-            "reply": "Ola! Este eh um stub.",
-        }
+    async def fake_classify_text(content: str, route: str, **_options):
+        return ClassificationResult(
+            primary_category="Status de chamado",
+            overall_category="Produtivo",
+            confidence=0.91,
+            engine="MockEngine",
+            reply="Ola! Este eh um stub.",
+            text_hash=hash_text(content),
+        )
 
-    async def fake_process_api_batch(texts):
+    async def fake_process_api_batch(texts, **_options):
         results = []
         for idx, text in enumerate(texts):
             results.append(
@@ -0,0 +1,68 @@
+from fastapi import FastAPI, UploadFile
+from fastapi.testclient import TestClient
+
+from backend_app.middlewares.admission import AdmissionMiddleware, InMemoryBucketStore
+from backend_app.middlewares.body_limit import BodyLimitMiddleware
+from backend_app.services import processing
+
+
+def _client(max_bytes=100, admission=False):
+    app = FastAPI()
+    app.state.reached = 0
+
+    @app.post("/api/process")
+    async def process(payload: dict):
+        app.state.reached += 1
+        return {"size": len(payload["text"])}
+
+    @app.post("/api/batch")
+    async def batch(payload: dict):
+        return {"count": len(payload["texts"])}
+
+    if admission:
+        app.add_middleware(AdmissionMiddleware, store=InMemoryBucketStore(), max_concurrent=0)
+    app.add_middleware(BodyLimitMiddleware, max_bytes=max_bytes)
+    return TestClient(app), app
+
+
+def _chunks(total, size=20):
+    for start in range(0, total, size):
+        yield b" " * min(size, total - start)
+
+
+def test_declared_length_over_limit_is_rejected_before_the_app():
+    client, app = _client()
+    resp = client.post("/api/process", json={"text": "x" * 200})
+    assert resp.status_code == 413
+    assert "Payload excede" in resp.json()["detail"]
+    assert app.state.reached == 0
+
+    assert client.post("/api/process", json={"text": "curto"}).json() == {"size": 5}
+
+
+def test_streamed_body_is_cut_off_at_the_limit():
+    client, _ = _client()
+    # A generator body is sent chunked, without Content-Length.
+    body = (chunk for chunk in [b'{"text": "', *_chunks(200), b'"}'])
+    resp = client.post("/api/process", content=body, headers={"content-type": "application/json"})
+    assert resp.status_code == 413
+
+
+def test_limit_applies_while_admission_buffers_the_batch():
+    client, _ = _client(admission=True)
+    body = (chunk for chunk in [b'{"texts": ["', *_chunks(200), b'"]}'])
+    resp = client.post("/api/batch", content=body, headers={"content-type": "application/json"})
+    assert resp.status_code == 413
+
+
+def test_read_upload_rejects_oversized_files(monkeypatch):
+    monkeypatch.setattr(processing, "MAX_UPLOAD_BYTES", 10)
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile):
+        return {"size": len(await processing.read_upload(file))}
+
+    client = TestClient(app)
+    assert client.post("/upload", files={"file": ("a.txt", b"0123456789")}).json() == {"size": 10}
+    assert client.post("/upload", files={"file": ("a.txt", b"0123456789!")}).status_code == 413
@@ -0,0 +1,191 @@
+import json
+
+import pytest
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from backend_app import cli
+from backend_app.models.records import ClassificationResult
+from backend_app.services import nlp
+from backend_app.services.bulk_replies import BulkReplyClient, apply_bulk_replies
+
+
+@pytest.fixture(autouse=True)
+def heuristic_only(monkeypatch):
+    monkeypatch.setattr(nlp.settings, "enable_transformers", False)
+    monkeypatch.setattr(nlp.settings, "openai_api_key", None)
+
+
+def create_batch_server(fail_ids=()):
+    """Stand-in for the provider's file and batch endpoints."""
+    app = FastAPI()
+    app.state.files = {}
+    app.state.batches = {}
+    app.state.requests = []
+    app.state.events = []
+
+    @app.post("/files")
+    async def upload(file: UploadFile = File(...), purpose: str = Form(...)):
+        assert purpose == "batch"
+        file_id = f"file-{len(app.state.files)}"
+        app.state.files[file_id] = (await file.read()).decode("utf-8")
+        return {"id": file_id}
+
+    @app.post("/batches")
+    def create(payload: dict):
+        batch_id = f"batch-{len(app.state.batches)}"
+        app.state.batches[batch_id] = {
+            "id": batch_id,
+            "status": "validating",
+            "input_file_id": payload["input_file_id"],
+        }
+        app.state.events.append(("create", batch_id))
+        return app.state.batches[batch_id]
+
+    @app.get("/batches/{batch_id}")
+    def retrieve(batch_id: str):
+        batch = app.state.batches[batch_id]
+        if batch["status"] == "validating":
+            batch["status"] = "in_progress"
+        elif batch["status"] == "in_progress":
+            lines = []
+            for raw in app.state.files[batch["input_file_id"]].splitlines():
+                request = json.loads(raw)
+                app.state.requests.append(request)
+                if request["custom_id"] in fail_ids:
+                    response = {"status_code": 500, "body": {"error": "boom"}}
+                else:
+                    content = f"Resposta para {request['custom_id'][:8]}"
+                    response = {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"content": content}}]},
+                    }
+                lines.append(json.dumps({"custom_id": request["custom_id"], "response": response}))
+            output_id = f"file-{len(app.state.files)}"
+            app.state.files[output_id] = "\n".join(lines)
+            batch.update(status="completed", output_file_id=output_id)
+            app.state.events.append(("complete", batch_id))
+        return batch
+
+    @app.get("/files/{file_id}/content", response_class=PlainTextResponse)
+    def content(file_id: str):
+        if file_id not in app.state.files:
+            raise HTTPException(status_code=404)
+        return app.state.files[file_id]
+
+    return app
+
+
+def _row(text, category="Financeiro"):
+    result = ClassificationResult(category, "Produtivo", 0.9, "Heuristic", text_hash=f"{abs(hash(text)):016x}")
+    return result, text
+
+
+def test_replies_are_merged_by_text_hash_with_template_fallback():
+    rows = [_row("Segunda via do boleto"), _row("Segunda via do boleto"), _row("Nota fiscal de maio")]
+    failing = rows[2][0].text_hash
+    server = create_batch_server(fail_ids={failing})
+    with TestClient(server) as http:
+        client = BulkReplyClient("key", client=http, poll_interval=0, sleep=lambda _: None)
+        answered = apply_bulk_replies(rows, client)
+
+    # Identical emails are requested once and both rows get the reply.
+    assert len(server.state.requests) == 2
+    assert server.state.requests[0]["url"] == "/v1/chat/completions"
+    assert server.state.requests[0]["body"]["messages"] == nlp.build_reply_messages(
+        "Segunda via do boleto", "Financeiro"
+    )
+    assert answered == 2
+    assert rows[0][0].reply == rows[1][0].reply == f"Resposta para {rows[0][0].text_hash[:8]}"
+    assert rows[2][0].reply == nlp.build_template_reply("Financeiro", "Nota fiscal de maio")
+
+
+def test_unreachable_provider_keeps_templates():
+    server = FastAPI()
+    rows = [_row("Preciso de ajuda com o acesso", "Acesso/Senha")]
+    with TestClient(server) as http:
+        client = BulkReplyClient("key", client=http, sleep=lambda _: None)
+        assert apply_bulk_replies(rows, client) == 0
+    assert rows[0][0].reply == nlp.build_template_reply("Acesso/Senha", "Preciso de ajuda com o acesso")
+
+
+def test_cli_bulk_replies(tmp_path, monkeypatch):
+    source = tmp_path / "emails.jsonl"
+    source.write_text(
+        "\n".join(json.dumps({"id": f"e{i}", "text": f"Boleto numero {i % 3}"}) for i in range(7)),
+        encoding="utf-8",
+    )
+    output = tmp_path / "out.jsonl"
+    server = create_batch_server()
+    with TestClient(server) as http:
+        client = BulkReplyClient("key", client=http, poll_interval=0, sleep=lambda _: None)
+        monkeypatch.setattr(cli, "get_bulk_reply_client", lambda: client)
+        code = cli.main([
+            "classify", str(source), "-o", str(output), "--replies", "bulk",
+            "--workers", "1", "--chunk-size", "2", "--bulk-size", "4", "--progress-interval", "0",
+        ])
+
+    assert code == 0
+    rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [row["arquivo"] for row in rows] == [f"e{i}" for i in range(7)]
+    assert all(row["reply"].startswith("Resposta para ") for row in rows)
+    assert len(server.state.batches) == 2
+
+
+def _write_source(tmp_path, count):
+    source = tmp_path / "emails.jsonl"
+    source.write_text(
+        "\n".join(json.dumps({"id": f"e{i}", "text": f"Boleto numero {i}"}) for i in range(count)),
+        encoding="utf-8",
+    )
+    return source
+
+
+def _bulk_args(source, output, bulk_size):
+    return [
+        "classify", str(source), "-o", str(output), "--replies", "bulk", "--workers", "1",
+        "--chunk-size", "2", "--bulk-size", str(bulk_size), "--progress-interval", "0",
+    ]
+
+
+def test_cli_submits_next_job_before_earlier_ones_finish(tmp_path, monkeypatch):
+    source = _write_source(tmp_path, 8)
+    server = create_batch_server()
+    with TestClient(server) as http:
+        client = BulkReplyClient("key", client=http, poll_interval=0, sleep=lambda _: None)
+        monkeypatch.setattr(cli, "get_bulk_reply_client", lambda: client)
+        assert cli.main(_bulk_args(source, tmp_path / "out.jsonl", 2)) == 0
+
+    events = server.state.events
+    assert events.index(("create", "batch-1")) < events.index(("complete", "batch-0"))
+    assert len(server.state.batches) == 4
+
+
+def test_cli_resumes_polling_submitted_jobs_instead_of_resubmitting(tmp_path, monkeypatch):
+    source = _write_source(tmp_path, 7)
+    output = tmp_path / "out.jsonl"
+    server = create_batch_server()
+
+    class CrashingClient(BulkReplyClient):
+        def status(self, batch_id):
+            raise RuntimeError("processo interrompido")
+
+    with TestClient(server) as http:
+        crashing = CrashingClient("key", client=http, poll_interval=0, sleep=lambda _: None)
+        monkeypatch.setattr(cli, "get_bulk_reply_client", lambda: crashing)
+        with pytest.raises(RuntimeError):
+            cli.main(_bulk_args(source, output, 4))
+        checkpoint = json.loads((tmp_path / "out.jsonl.checkpoint.json").read_text(encoding="utf-8"))
+        assert checkpoint["done"] == 0
+        assert checkpoint["bulk_jobs"] == [{"count": 4, "batch_ids": ["batch-0"]}]
+
+        client = BulkReplyClient("key", client=http, poll_interval=0, sleep=lambda _: None)
+        monkeypatch.setattr(cli, "get_bulk_reply_client", lambda: client)
+        assert cli.main(_bulk_args(source, output, 4)) == 0
+
+    # The interrupted job is polled again; only the remaining rows get a new one.
+    assert sorted(server.state.batches) == ["batch-0", "batch-1"]
+    rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [row["arquivo"] for row in rows] == [f"e{i}" for i in range(7)]
+    assert all(row["reply"].startswith("Resposta para ") for row in rows)
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from backend_app import cli
+from backend_app.services import nlp
+
+
+@pytest.fixture(autouse=True)
+def heuristic_only(monkeypatch):
+    monkeypatch.setattr(nlp.settings, "enable_transformers", False)
+    monkeypatch.setattr(nlp.settings, "openai_api_key", None)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "emails"
+    (root / "sub").mkdir(parents=True)
+    for idx in range(7):
+        (root / f"email{idx}.txt").write_text(f"Preciso da segunda via do boleto {idx}", encoding="utf-8")
+    (root / "sub" / "natal.txt").write_text("Feliz natal a toda a equipe!", encoding="utf-8")
+    (root / "ignored.png").write_bytes(b"\x89PNG")
+    return root
+
+
+def _run(corpus, output, *extra):
+    args = [
+        "classify", str(corpus), "-o", str(output),
+        "--workers", "2", "--chunk-size", "3", "--progress-interval", "0", *extra,
+    ]
+    assert cli.main(args) == 0
+    return [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+
+
+def test_classify_directory_in_stable_order(corpus, tmp_path):
+    rows = _run(corpus, tmp_path / "out.jsonl")
+    assert [r["arquivo"] for r in rows] == [f"email{i}.txt" for i in range(7)] + ["sub/natal.txt"]
+    assert rows[0]["primary_category"] == "Financeiro"
+    assert rows[-1]["overall_category"] == "Improdutivo"
+    assert not (tmp_path / "out.jsonl.checkpoint.json").exists()
+
+
+def test_classify_resumes_from_checkpoint(corpus, tmp_path):
+    output = tmp_path / "out.jsonl"
+    first_two = "".join(
+        json.dumps({"arquivo": f"email{i}.txt"}) + "\n" for i in range(2)
+    )
+    # Two rows were checkpointed, a third was half-written when the run died.
+    output.write_text(first_two + '{"arquivo": "email2', encoding="utf-8")
+    cli.Checkpoint(tmp_path / "out.jsonl.checkpoint.json", corpus).save(2, len(first_two))
+
+    rows = _run(corpus, output)
+    assert [r["arquivo"] for r in rows] == [f"email{i}.txt" for i in range(7)] + ["sub/natal.txt"]
+    assert "engine" not in rows[0] and rows[2]["engine"] == "Heuristic"
+
+
+def test_default_workers_are_capped_by_memory_when_the_model_is_local(monkeypatch):
+    monkeypatch.setattr(cli.os, "cpu_count", lambda: 16)
+    monkeypatch.setattr(cli, "_available_memory", lambda: 5 * cli.WORKER_MODEL_BYTES // 2)
+    assert cli.default_workers() == 16
+
+    monkeypatch.setattr(nlp.settings, "enable_transformers", True)
+    monkeypatch.setattr(nlp.settings, "inference_url", None)
+    assert cli.default_workers() == 2
+
+    monkeypatch.setattr(cli, "_available_memory", lambda: None)
+    assert cli.default_workers() == 1
@@ -0,0 +1,125 @@
+import gzip
+import json
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app import app
+from backend_app.middlewares.compression import OFFLOAD_BYTES, CompressionMiddleware
+from backend_app.services.report_store import ReportStore
+
+
+def _write(store: ReportStore, content: str, suffix: str = ".txt"):
+    path = store.new_report_path().with_suffix(suffix)
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+def test_text_reports_are_precompressed_and_removed_with_the_report(tmp_path):
+    store = ReportStore(tmp_path, max_age_seconds=3600, encodings=("gzip",))
+    path = _write(store, "Financeiro\tProdutivo\n" * 200)
+    name = store.register(path)
+    store.wait_precompressed()
+
+    encoded = store.encoded_path(name, "gzip")
+    assert store.encoded_variants(name) == {"gzip": encoded}
+    assert gzip.decompress(encoded.read_bytes()) == path.read_bytes()
+
+    old = time.time() - 7200
+    os.utime(path, (old, old))
+    assert store.enforce_retention() == 1
+    assert not encoded.exists()
+
+
+def test_already_compressed_reports_are_not_precompressed(tmp_path):
+    store = ReportStore(tmp_path, encodings=("gzip",))
+    path = store.new_report_path().with_suffix(".csv.gz")
+    path.write_bytes(gzip.compress(b"a,b\n"))
+    name = store.register(path)
+    store.wait_precompressed()
+    assert store.encoded_variants(name) == {}
+
+
+def test_report_download_serves_the_precompressed_copy(tmp_path, monkeypatch):
+    store = ReportStore(tmp_path, encodings=("gzip",))
+    monkeypatch.setattr("backend_app.controllers.reports.get_report_store", lambda: store)
+    content = "Suporte\tProdutivo\n" * 500
+    name = store.register(_write(store, content))
+    store.wait_precompressed()
+    client = TestClient(app)
+
+    resp = client.get(f"/reports/{name}", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert int(resp.headers["content-length"]) == store.encoded_path(name, "gzip").stat().st_size
+    assert resp.text == content
+
+    plain = client.get(f"/reports/{name}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.text == content
+    assert plain.headers["etag"] != resp.headers["etag"]
+
+    cached = client.get(
+        f"/reports/{name}",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["etag"]},
+    )
+    assert cached.status_code == 304
+    assert "content-encoding" not in cached.headers
+
+
+def test_large_json_bodies_are_compressed_and_etag_weakened():
+    inner = FastAPI()
+    rows = [{"categoria": "Financeiro", "resposta": "x" * 40, "indice": i} for i in range(OFFLOAD_BYTES // 40)]
+
+    @inner.get("/batch")
+    def batch():
+        return JSONResponse({"results": rows}, headers={"ETag": '"abc"'})
+
+    inner.add_middleware(CompressionMiddleware, minimum_size=100)
+    resp = TestClient(inner).get("/batch", headers={"Accept-Encoding": "gzip"})
+
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["etag"] == 'W/"abc"'
+    assert int(resp.headers["content-length"]) < OFFLOAD_BYTES
+    assert json.loads(resp.content) == {"results": rows}
+
+
+def test_register_does_not_wait_for_precompression(tmp_path, monkeypatch):
+    import threading
+
+    from backend_app.services import report_store
+
+    release = threading.Event()
+
+    def slow_compress_file(source, target, encoding):
+        release.wait(5)
+        target.write_bytes(gzip.compress(source.read_bytes()))
+
+    monkeypatch.setattr(report_store, "compress_file", slow_compress_file)
+    store = ReportStore(tmp_path, encodings=("gzip",))
+    name = store.register(_write(store, "Financeiro\n" * 100))
+    assert store.encoded_variants(name) == {}
+
+    release.set()
+    store.wait_precompressed()
+    assert set(store.encoded_variants(name)) == {"gzip"}
+
+
+def test_concurrent_registrations_share_one_precompressor(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    store = ReportStore(tmp_path, encodings=("gzip",))
+    paths = [_write(store, f"Financeiro {idx}\n" * 50) for idx in range(32)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        names = list(pool.map(store.register, paths))
+    executor = store._precompressor
+    store.wait_precompressed()
+
+    assert store._precompressor is executor
+    assert all(set(store.encoded_variants(name)) == {"gzip"} for name in names)
+    store.shutdown()
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from backend_app.services import deadline, nlp
+
+
+def test_slow_classifier_degrades_to_heuristic_and_template(monkeypatch):
+    def slow_prediction(text):
+        time.sleep(0.3)
+        return nlp._result_from({"label": "Financeiro", "confidence": 0.99, "engine": "Slow"})
+
+    async def slow_reply(text, category):
+        await asyncio.sleep(1)
+        return "GPT"
+
+    monkeypatch.setattr(nlp, "_predict_category_sync", slow_prediction)
+    monkeypatch.setattr(nlp, "gpt_reply", slow_reply)
+
+    async def scenario():
+        with deadline.request_deadline(0.05):
+            started = time.monotonic()
+            result = await nlp.classify_and_respond("Preciso do boleto da fatura de marco")
+            return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.25
+    assert result.engine == "Heuristic"
+    assert result.degradations == [deadline.DEGRADED_CLASSIFIER, deadline.DEGRADED_REPLY]
+    assert result.reply == nlp.build_template_reply(result.primary_category, "")
+    assert result.to_record()["degradations"] == result.degradations
+
+
+def test_timeout_uses_default_and_is_capped(monkeypatch):
+    settings = deadline.get_settings()
+    monkeypatch.setattr(settings, "request_timeout_ms", 2000)
+    monkeypatch.setattr(settings, "max_request_timeout_ms", 5000)
+    assert deadline.resolve_timeout() == 2.0
+    assert deadline.resolve_timeout(300) == 0.3
+    assert deadline.resolve_timeout(60000) == 5.0
+    assert deadline.parse_timeout_header("abc") is None
+
+    with deadline.request_deadline(10):
+        with deadline.request_deadline(60):
+            assert deadline.remaining() <= 10
+    assert deadline.remaining() is None
+
+
+def test_no_deadline_by_default(monkeypatch):
+    settings = deadline.get_settings()
+    monkeypatch.setattr(settings, "request_timeout_ms", 0)
+    monkeypatch.setattr(settings, "max_request_timeout_ms", 5000)
+    assert deadline.resolve_timeout() is None
+    assert deadline.resolve_timeout(60000) == 5.0
+
+
+def test_classification_keeps_the_whole_budget_without_gpt_client(monkeypatch):
+    timeouts = []
+
+    async def fake_predict(text, timeout):
+        timeouts.append(timeout)
+        return nlp._result_from({"label": "Financeiro", "confidence": 0.9, "engine": "Stub"}), 0.0
+
+    monkeypatch.setattr(nlp, "_predict_within", fake_predict)
+    monkeypatch.setattr(nlp, "_get_openai_client", lambda api_key, base_url=None: None)
+
+    async def scenario():
+        with deadline.request_deadline(10):
+            return await nlp.classify_and_respond("Preciso do boleto")
+
+    result = asyncio.run(scenario())
+    assert timeouts[0] > 10 * nlp.INFERENCE_BUDGET_SHARE
+    assert result.degradations == []
@@ -0,0 +1,112 @@
+import asyncio
+import random
+
+from backend_app.models.records import ClassificationResult
+from backend_app.services import nlp
+from backend_app.services.dedup import NearDuplicateIndex, simhash
+
+TEMPLATE = (
+    "Ola equipe, gostaria de saber o status do chamado protocolo {protocol}. "
+    "Abri a solicitacao na semana passada e ainda nao recebi retorno sobre o andamento. "
+    "O sistema de faturamento segue apresentando erro ao gerar o relatorio mensal e "
+    "precisamos de uma previsao de atualizacao para repassar aos nossos clientes."
+)
+
+
+def _payload(label: str) -> dict:
+    return {
+        "primary_category": label,
+        "overall_category": "Produtivo",
+        "confidence": 0.9,
+        "engine": "MockEngine",
+        "reply": f"Resposta {label}",
+    }
+
+
+def test_simhash_ignores_protocol_numbers():
+    a = simhash(TEMPLATE.format(protocol="123456"))
+    b = simhash(TEMPLATE.format(protocol="987"))
+    assert a is not None and a == b
+
+
+def test_simhash_skips_short_texts():
+    assert simhash("obrigado!") is None
+
+
+def test_lookup_returns_near_duplicate_payload():
+    index = NearDuplicateIndex(capacity=10, threshold=0.9, ttl_seconds=0)
+    index.add(simhash(TEMPLATE.format(protocol="1")), _payload("Status de chamado"))
+
+    near = TEMPLATE.replace("Ola", "Oi").format(protocol="2")
+    hit = index.lookup(simhash(near))
+    assert hit is not None
+    assert hit["primary_category"] == "Status de chamado"
+
+    unrelated = (
+        "Segue em anexo a nota fiscal referente ao pagamento do mes, "
+        "por favor confirmem o recebimento do boleto e da fatura."
+    )
+    assert index.lookup(simhash(unrelated)) is None
+
+
+def test_index_evicts_least_recently_used_entries():
+    index = NearDuplicateIndex(capacity=2, threshold=0.99, ttl_seconds=0)
+    for i in range(5):
+        index.add(1 << i, _payload(str(i)))
+    assert len(index) == 2
+    assert index.lookup(1 << 0) is None
+    assert index.lookup(1 << 4)["primary_category"] == "4"
+
+
+def test_lookup_candidates_stay_bounded_at_large_sizes():
+    rng = random.Random(7)
+    size = 200_000
+    index = NearDuplicateIndex(capacity=size, threshold=0.9, ttl_seconds=0)
+    stored = [rng.getrandbits(64) for _ in range(size)]
+    for signature in stored:
+        index.add(signature, None)
+
+    probes = [rng.getrandbits(64) for _ in range(200)]
+    average = sum(len(index._candidates(p)) for p in probes) / len(probes)
+    # A fixed 9-bit banding would return about 7 * size / 512 (~2700) candidates.
+    assert average < 400
+
+    # Still exact: anything within max_distance bits is found.
+    target = stored[12345]
+    flipped = target
+    for bit in rng.sample(range(64), index.max_distance):
+        flipped ^= 1 << bit
+    assert target in index._candidates(flipped)
+
+
+def test_blocks_widen_with_capacity():
+    small = NearDuplicateIndex(capacity=1_000, threshold=0.9, ttl_seconds=0)
+    large = NearDuplicateIndex(capacity=5_000_000, threshold=0.9, ttl_seconds=0)
+    assert len(large._bands) < len(small._bands)
+    # Expected bucket size of a full index stays in the low single digits.
+    narrowest = min(mask.bit_length() for _, mask in large._bands)
+    assert 5_000_000 / 2 ** narrowest < 4
+
+
+def test_hits_do_not_share_the_degradations_list():
+    index = NearDuplicateIndex(capacity=10, threshold=0.9, ttl_seconds=0)
+    signature = simhash(TEMPLATE.format(protocol="1"))
+    index.add(signature, ClassificationResult("Status de chamado", "Produtivo", 0.9, "MockEngine"))
+
+    first = index.lookup(signature)
+    first.degradations.append("classifier")
+    assert index.lookup(signature).degradations == []
+
+
+def test_heuristic_results_are_not_indexed(monkeypatch):
+    index = NearDuplicateIndex(capacity=10, threshold=0.9, ttl_seconds=0)
+    monkeypatch.setattr(nlp, "get_near_duplicate_index", lambda: index)
+    monkeypatch.setattr(
+        nlp,
+        "_predict_category_sync",
+        lambda text: nlp._result_from(nlp.heuristic_multiclass(text)),
+    )
+
+    result = asyncio.run(nlp.classify_and_respond(TEMPLATE.format(protocol="1"), use_gpt=False))
+    assert result.engine == nlp.HEURISTIC_ENGINE
+    assert len(index) == 0
@@ -0,0 +1,103 @@
+import gzip
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import app
+from backend_app.middlewares.compression import CompressionMiddleware
+from backend_app.models.records import ClassificationResult
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_page_links_fingerprinted_assets_served_immutable_and_precompressed(client):
+    page = client.get("/")
+    url = re.search(r'href="(/static/styles/style\.[0-9a-f]{12}\.css)"', page.text).group(1)
+
+    resp = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "immutable" in resp.headers["cache-control"]
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert resp.content == (app.state.assets.root / "styles" / "style.css").read_bytes()
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert client.get(url, headers={"If-None-Match": resp.headers["etag"]}).status_code == 304
+    assert client.get("/static/styles/style.000000000000.css").status_code == 404
+
+
+def test_html_pages_are_compressed(client):
+    resp = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["vary"]
+
+
+def test_process_returns_only_the_result_fragment(client, monkeypatch):
+    async def fake_classify_text(content, route, timeout=None):
+        return ClassificationResult("Financeiro", "Produtivo", 0.9, "Stub", reply="Resposta stub")
+
+    monkeypatch.setattr("backend_app.controllers.web.classify_text", fake_classify_text)
+
+    resp = client.post("/process", data={"email_text": "Segunda via do boleto"}, headers={"X-Partial": "1"})
+    assert resp.status_code == 200
+    assert "<html" not in resp.text
+    assert "Resposta stub" in resp.text
+    assert "Segunda via do boleto" not in resp.text
+
+    full = client.post("/process", data={"email_text": "Segunda via do boleto"})
+    assert "<html" in full.text and "Resposta stub" in full.text
+
+    error = client.post("/process", data={"email_text": " "}, headers={"X-Partial": "1"})
+    assert error.status_code == 400
+    assert error.text.strip().startswith('<div class="alert error">')
+
+
+def test_compression_middleware_thresholds_and_streaming():
+    inner = FastAPI()
+
+    @inner.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+
+    @inner.get("/large")
+    def large():
+        return PlainTextResponse("resposta padrao " * 500)
+
+    @inner.get("/stream")
+    def stream():
+        return StreamingResponse((b"linha %d\n" % i for i in range(500)), media_type="text/plain")
+
+    @inner.get("/binary")
+    def binary():
+        return PlainTextResponse("x" * 5000, media_type="application/octet-stream")
+
+    inner.add_middleware(CompressionMiddleware, minimum_size=100)
+    client = TestClient(inner)
+    headers = {"Accept-Encoding": "gzip"}
+
+    assert "content-encoding" not in client.get("/small", headers=headers).headers
+    assert "content-encoding" not in client.get("/binary", headers=headers).headers
+
+    large = client.get("/large", headers=headers)
+    assert large.headers["content-encoding"] == "gzip"
+    assert int(large.headers["content-length"]) < 8000
+    assert large.text == "resposta padrao " * 500
+
+    streamed = client.get("/stream", headers=headers)
+    assert streamed.headers["content-encoding"] == "gzip"
+    assert streamed.text == "".join("linha %d\n" % i for i in range(500))
+
+
+def test_stream_compressor_output_is_valid_gzip():
+    from backend_app.services.compression import StreamCompressor
+
+    compressor = StreamCompressor("gzip")
+    data = compressor.compress(b"abc" * 100) + compressor.compress(b"def") + compressor.finish()
+    assert gzip.decompress(data) == b"abc" * 100 + b"def"
@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from fastapi.testclient import TestClient
+
+from backend_app.inference_server import create_inference_app
+from backend_app.services.inference_client import InferenceClient
+
+
+def test_concurrent_requests_share_model_batches():
+    batch_sizes = []
+
+    def fake_model(texts):
+        batch_sizes.append(len(texts))
+        return [{"label": "Financeiro", "confidence": 0.9, "engine": "Fake"} for _ in texts]
+
+    server = create_inference_app(classify=fake_model)
+    server.state.batcher.max_wait = 0.05
+    with TestClient(server) as http:
+        client = InferenceClient("http://testserver", client=http)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(client.classify, [f"fatura {i}" for i in range(8)]))
+        health = http.get("/health").json()
+
+    assert all(r["label"] == "Financeiro" for r in results)
+    assert sum(batch_sizes) == 8
+    assert len(batch_sizes) < 8
+    assert health["items"] == 8
+
+
+def test_client_falls_back_while_service_is_down_and_recovers():
+    state = {"up": False, "calls": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        state["calls"] += 1
+        if not state["up"]:
+            return httpx.Response(503)
+        if request.url.path == "/health":
+            return httpx.Response(200, json={"status": "ok"})
+        return httpx.Response(200, json={"results": [{"label": "Acesso/Senha", "confidence": 0.8, "engine": "Remote"}]})
+
+    http = httpx.Client(base_url="http://inference", transport=httpx.MockTransport(handler))
+    client = InferenceClient("http://inference", retry_interval=0, client=http)
+    assert client.classify("senha") is None
+    assert not client.healthy
+
+    state["up"] = True
+    assert client.classify("senha")["label"] == "Acesso/Senha"
+    assert client.healthy
@@ -0,0 +1,78 @@
+import asyncio
+
+from backend_app.services.limits import AIMDLimit
+from backend_app.services.scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    WeightedFairScheduler,
+)
+
+WEIGHTS = {PRIORITY_INTERACTIVE: 4, PRIORITY_BATCH: 1, PRIORITY_BACKGROUND: 1}
+
+
+def test_limit_grows_while_fast_and_backs_off_on_latency_and_errors():
+    limit = AIMDLimit(initial=2, max_limit=8)
+    for _ in range(40):
+        limit.on_sample(0.010, inflight=limit.current)
+    assert limit.current == 8
+
+    grown = limit.limit
+    limit.on_sample(0.050, inflight=limit.current)
+    assert limit.limit < grown
+
+    for _ in range(50):
+        limit.on_sample(0.010, inflight=1, error=True)
+    assert limit.current == 1
+    assert limit.snapshot()["errors"] == 50
+
+
+def test_scheduler_admits_more_waiters_as_the_limit_grows():
+    async def scenario():
+        limiter = AIMDLimit(initial=1, max_limit=4)
+        scheduler = WeightedFairScheduler("inference", 1, WEIGHTS, limiter=limiter)
+        peak = 0
+
+        async def job():
+            nonlocal peak
+            async with scheduler.slot():
+                peak = max(peak, scheduler.in_use)
+                await asyncio.sleep(0.005)
+
+        await asyncio.gather(*[job() for _ in range(40)])
+        return peak, scheduler.snapshot()
+
+    peak, snapshot = asyncio.run(scenario())
+    assert peak > 1
+    assert snapshot["capacity"] <= 4
+    assert snapshot["in_use"] == 0
+
+
+def test_one_fast_outlier_does_not_pin_the_baseline():
+    limit = AIMDLimit(initial=4, max_limit=8)
+    limit.on_sample(0.0002, inflight=1)
+    for _ in range(100):
+        limit.on_sample(0.250, inflight=limit.current)
+    assert limit.baseline == 0.250
+    assert limit.current == 8
+
+
+def test_heuristic_fallbacks_are_not_latency_samples(monkeypatch):
+    from backend_app.services import nlp
+
+    limiter = AIMDLimit(initial=2, max_limit=8)
+    stage = WeightedFairScheduler("inference", 2, WEIGHTS, limiter=limiter)
+    monkeypatch.setattr(nlp, "get_scheduler", lambda name: stage)
+    monkeypatch.setattr(
+        nlp, "_predict_category_sync",
+        lambda text: nlp._result_from(nlp.heuristic_multiclass(text)),
+    )
+
+    async def scenario():
+        for _ in range(5):
+            await nlp._predict_within("Preciso do boleto", None)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert limiter.baseline == 0.0
+    assert stage.in_use == 0
@@ -0,0 +1,80 @@
+import io
+import zipfile
+from email.message import EmailMessage
+
+from backend_app.services import processing
+from backend_app.services.mailbox import iter_mailbox_entries, iter_mbox_messages
+from backend_app.services.nlp import extract_text_from_bytes
+
+
+def _latin1_message() -> bytes:
+    return (
+        "From: cliente@example.com\n"
+        "Subject: =?iso-8859-1?q?Cobran=E7a?=\n"
+        "Content-Type: text/plain; charset=iso-8859-1\n"
+        "Content-Transfer-Encoding: 8bit\n"
+        "\n"
+        "Preciso da segunda via da fatura de mar\xe7o.\n"
+        ">From the desk of finance\n"
+    ).encode("latin-1")
+
+
+def _html_message() -> bytes:
+    msg = EmailMessage()
+    msg["Subject"] = "Senha"
+    msg.set_content(
+        "<html><style>p{color:red}</style><body><p>Minha senha foi <b>bloqueada</b></p></body></html>",
+        subtype="html",
+    )
+    return msg.as_bytes()
+
+
+def _mbox(*messages: bytes) -> bytes:
+    parts = []
+    for raw in messages:
+        parts.append(b"From sender@example.com Mon Jan  1 00:00:00 2024\n" + raw.rstrip(b"\n") + b"\n\n")
+    return b"".join(parts)
+
+
+def test_mbox_is_split_message_by_message():
+    stream = io.BytesIO(_mbox(_latin1_message(), _html_message()))
+    messages = list(iter_mbox_messages(stream))
+    assert len(messages) == 2
+    assert b"\nFrom the desk of finance" in messages[0]
+
+
+def test_mailbox_entries_decode_charsets_and_strip_html():
+    stream = io.BytesIO(_mbox(_latin1_message(), _html_message()))
+    entries = list(iter_mailbox_entries("caixa.mbox", stream))
+
+    assert [source for source, _ in entries] == ["caixa.mbox#1", "caixa.mbox#2"]
+    assert entries[0][1].startswith("Cobrança")
+    assert "fatura de março" in entries[0][1]
+    assert "Minha senha foi bloqueada" in entries[1][1]
+    assert "color" not in entries[1][1]
+
+
+def test_extract_text_handles_eml_and_legacy_encodings():
+    assert "Minha senha" in extract_text_from_bytes("mensagem.eml", _html_message())
+    assert extract_text_from_bytes("nota.txt", "Atenção".encode("cp1252")) == "Atenção"
+    assert extract_text_from_bytes("nota.txt", "﻿Olá".encode("utf-8")) == "Olá"
+
+
+def test_oversized_mbox_messages_are_skipped_without_buffering():
+    huge = b"Subject: Anexo\n\n" + b"A" * 300_000
+    stream = io.BytesIO(_mbox(_latin1_message(), huge, _html_message()))
+    messages = list(iter_mbox_messages(stream, max_message_bytes=10_000))
+    assert len(messages) == 2
+    assert b"Senha" in messages[1]
+
+
+def test_zip_mbox_members_respect_the_size_limit(monkeypatch):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("grande.mbox", _mbox(b"Subject: x\n\n" + b"0" * 50_000))
+        zf.writestr("pequena.mbox", _mbox(_html_message()))
+    monkeypatch.setattr(processing, "MAX_UPLOAD_BYTES", 10_000)
+
+    with zipfile.ZipFile(buffer) as zf:
+        sources = [source for source, _ in processing._iter_zip_entries(zf)]
+    assert sources == ["pequena.mbox#1"]
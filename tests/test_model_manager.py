@@ -0,0 +1,41 @@
+import time
+
+from backend_app.services import model_manager
+from backend_app.services.model_manager import ModelManager
+
+
+def _slow_loader(calls):
+    def load():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    return load
+
+
+def test_requests_during_load_get_none_then_idle_model_is_unloaded():
+    calls = []
+    manager = ModelManager(_slow_loader(calls), idle_seconds=0.01)
+    assert manager.get() is None
+    assert manager.state == model_manager.STATE_LOADING
+    assert manager.get(wait=True) is not None
+    assert len(calls) == 1
+
+    time.sleep(0.02)
+    assert manager.enforce() == "idle"
+    assert manager.state == model_manager.STATE_UNLOADED
+    assert manager.get(wait=True) is not None
+    snapshot = manager.snapshot()
+    assert (snapshot["loads"], snapshot["unloads"]) == (2, 1)
+    assert [e["event"] for e in snapshot["events"]] == ["loaded", "unloaded", "loaded"]
+
+
+def test_rss_budget_unloads_and_blocks_reload(monkeypatch):
+    manager = ModelManager(_slow_loader([]), rss_budget_bytes=1000)
+    monkeypatch.setattr(model_manager, "rss_bytes", lambda: 10)
+    assert manager.get(wait=True) is not None
+
+    monkeypatch.setattr(model_manager, "rss_bytes", lambda: 5000)
+    assert manager.enforce() == "rss_budget"
+    assert manager.get(wait=True) is None
+    assert manager.state == model_manager.STATE_UNLOADED
@@ -0,0 +1,70 @@
+import os
+import sys
+import types
+
+import pytest
+
+from backend_app import cli
+from backend_app.services import model_store
+from backend_app.services.model_store import ArtifactError, verify_artifact, write_manifest
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    directory = tmp_path / "model"
+    directory.mkdir()
+    (directory / "model.safetensors").write_bytes(b"\x00" * 64)
+    (directory / "config.json").write_text('{"model_type": "bart"}', encoding="utf-8")
+    (directory / "tokenizer.json").write_text("{}", encoding="utf-8")
+    write_manifest(directory, "facebook/bart-large-mnli", "abc123")
+    return directory
+
+
+def test_verify_accepts_matching_artifact(artifact):
+    manifest = verify_artifact(artifact, full=True)
+    assert manifest["revision"] == "abc123"
+    assert set(manifest["files"]) == {"model.safetensors", "config.json", "tokenizer.json"}
+
+
+def test_verify_rejects_changed_or_missing_files(artifact):
+    (artifact / "model.safetensors").write_bytes(b"\x01" * 64)
+    verify_artifact(artifact)  # same size: only the full check notices
+    with pytest.raises(ArtifactError):
+        verify_artifact(artifact, full=True)
+
+    (artifact / "tokenizer.json").unlink()
+    with pytest.raises(ArtifactError):
+        verify_artifact(artifact)
+
+
+def test_verify_requires_safetensors(tmp_path):
+    (tmp_path / "pytorch_model.bin").write_bytes(b"\x00")
+    write_manifest(tmp_path, "m", "r")
+    with pytest.raises(ArtifactError):
+        verify_artifact(tmp_path)
+
+
+def test_verify_model_command(artifact, tmp_path):
+    assert cli.main(["verify-model", str(artifact)]) == 0
+    assert cli.main(["verify-model", str(tmp_path / "missing")]) == 1
+
+
+def test_artifact_load_stays_on_local_files(artifact, monkeypatch):
+    calls = []
+
+    class _Auto:
+        @staticmethod
+        def from_pretrained(path, **kwargs):
+            calls.append(kwargs)
+            return object()
+
+    fake = types.ModuleType("transformers")
+    fake.AutoTokenizer = fake.AutoModelForSequenceClassification = _Auto
+    fake.pipeline = lambda task, model, tokenizer: (task, model, tokenizer)
+    monkeypatch.setitem(sys.modules, "transformers", fake)
+    monkeypatch.setattr(model_store.get_settings(), "zero_shot_model_dir", artifact)
+    monkeypatch.delenv("HF_HUB_OFFLINE", raising=False)
+
+    assert model_store.load_pipeline()[0] == "zero-shot-classification"
+    assert all(kwargs.get("local_files_only") for kwargs in calls) and len(calls) == 2
+    assert "HF_HUB_OFFLINE" not in os.environ
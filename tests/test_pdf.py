@@ -0,0 +1,72 @@
+import pytest
+
+from backend_app.config.settings import get_settings
+from backend_app.services import pdf
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "pdf_workers", 1)
+    monkeypatch.setattr(settings, "pdf_max_pages", 30)
+    pdf.get_text_cache.cache_clear()
+    yield
+    pdf.get_text_cache.cache_clear()
+
+
+def test_text_is_cached_by_content_hash(monkeypatch):
+    calls = []
+
+    def fake_range(data, backend, start, stop, layout=False):
+        calls.append((backend, start, stop))
+        return f"pagina {start}-{stop}"
+
+    monkeypatch.setattr(pdf, "probe", lambda data: (pdf.BACKEND_PYPDF, 3, "primeira"))
+    monkeypatch.setattr(pdf, "extract_range", fake_range)
+
+    assert pdf.extract_pdf_text(b"%PDF-1 a") == "primeira\npagina 1-3"
+    assert pdf.extract_pdf_text(b"%PDF-1 a") == "primeira\npagina 1-3"
+    assert calls == [(pdf.BACKEND_PYPDF, 1, 3)]
+    assert pdf.get_text_cache().snapshot() == {"items": 1, "hits": 1, "misses": 1}
+
+    pdf.extract_pdf_text(b"%PDF-1 b")
+    assert len(calls) == 2
+
+
+def test_pages_are_capped(monkeypatch):
+    calls = []
+    monkeypatch.setattr(pdf, "probe", lambda data: (pdf.BACKEND_PDFMINER, 400, None))
+    monkeypatch.setattr(
+        pdf, "extract_range", lambda data, backend, start, stop, layout=False: calls.append((start, stop)) or "x"
+    )
+    pdf.extract_pdf_text(b"%PDF-1 long")
+    assert calls == [(0, 30)]
+
+
+def test_layout_mode_always_uses_pdfminer(monkeypatch):
+    calls = []
+    monkeypatch.setattr(get_settings(), "pdf_extraction_mode", "layout")
+    monkeypatch.setattr(pdf, "probe", lambda data: (pdf.BACKEND_PYPDF, 3, "primeira"))
+    monkeypatch.setattr(
+        pdf,
+        "extract_range",
+        lambda data, backend, start, stop, layout=False: calls.append((backend, start, stop, layout)) or "x",
+    )
+    assert pdf.extract_pdf_text(b"%PDF-1 layout") == "x"
+    assert calls == [(pdf.BACKEND_PDFMINER, 0, 3, True)]
+
+
+def test_failed_range_falls_back_to_the_other_backend(monkeypatch):
+    def broken(*_args):
+        raise ValueError("bad xref")
+
+    monkeypatch.setattr(pdf, "_pypdf_range", broken)
+    monkeypatch.setattr(pdf, "_pdfminer_range", lambda data, start, stop, layout=False: "texto")
+    assert pdf.extract_range(b"", pdf.BACKEND_PYPDF, 0, 5) == "texto"
+
+    monkeypatch.setattr(pdf, "_pdfminer_range", broken)
+    assert pdf.extract_range(b"", pdf.BACKEND_PYPDF, 0, 5) == ""
+
+
+def test_page_ranges_cover_the_document():
+    assert pdf._page_ranges(1, 20, 8) == [(1, 9), (9, 17), (17, 20)]
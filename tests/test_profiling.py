@@ -0,0 +1,92 @@
+import asyncio
+import pstats
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend_app.controllers import admin
+from backend_app.middlewares.profiling import ProfilingMiddleware
+from backend_app.services.profiling import profiled, sample_stacks
+from backend_app.services.security import get_settings
+
+TOKEN = "segredo"
+
+
+@profiled
+def busy_extraction(n: int) -> int:
+    return sum(len(str(i) * 10) for i in range(n))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(get_settings(), "admin_token", TOKEN)
+    app = FastAPI()
+
+    @app.post("/api/process")
+    async def process():
+        return {"total": await asyncio.to_thread(busy_extraction, 20000)}
+
+    app.include_router(admin.router)
+    app.add_middleware(ProfilingMiddleware)
+    return TestClient(app)
+
+
+def test_profile_header_covers_worker_threads(client):
+    plain = client.post("/api/process", headers={"X-Profile": "1"})
+    assert "x-profile-id" not in plain.headers
+
+    resp = client.post("/api/process", headers={"X-Profile": "1", "X-Admin-Token": TOKEN})
+    assert resp.status_code == 200
+    assert float(resp.headers["x-profile-peak-kb"]) > 0
+
+    report = client.get(f"/admin/profiles/{resp.headers['x-profile-id']}", headers={"X-Admin-Token": TOKEN})
+    assert report.status_code == 200
+    assert "busy_extraction" in report.text
+
+
+def test_sampling_endpoint_requires_admin_token(client):
+    assert client.post("/admin/profile?seconds=0.05").status_code == 403
+    resp = client.post("/admin/profile?seconds=0.05", headers={"X-Admin-Token": TOKEN})
+    assert resp.status_code == 200
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in resp.text.splitlines())
+
+
+def test_collapsed_stacks_include_running_threads():
+    import threading
+
+    stop = threading.Event()
+    worker = threading.Thread(target=stop.wait, name="waiter")
+    worker.start()
+    try:
+        stacks = sample_stacks(0.05, interval=0.01)
+    finally:
+        stop.set()
+        worker.join()
+    assert any(line.startswith("waiter;") for line in stacks.splitlines())
+
+
+def test_batch_report_writing_is_profiled(tmp_path, monkeypatch):
+    from backend_app.models.records import ClassificationResult
+    from backend_app.services import processing
+    from backend_app.services.profiling import RequestProfile
+    from backend_app.services.report_store import ReportStore
+
+    async def fake_classify(text):
+        return ClassificationResult("Financeiro", "Produtivo", 0.9, "Stub", reply="ok")
+
+    monkeypatch.setattr(processing, "_classify", fake_classify)
+    monkeypatch.setattr(processing, "get_report_store", lambda: ReportStore(tmp_path))
+    entries = [{"arquivo": f"e{i}.txt", "conteudo": "boleto"} for i in range(10)]
+
+    async def scenario():
+        profile = RequestProfile("/batch_upload").start()
+        try:
+            await processing._classify_entries(entries, "txt", False)
+        finally:
+            profile.stop()
+        return profile
+
+    profile = asyncio.run(scenario())
+    functions = {func[2] for p in profile.profiles for func in pstats.Stats(p).stats}
+    assert {"_write_report_rows", "_commit_report"} <= functions
@@ -0,0 +1,98 @@
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from backend_app.services.report_store import ReportStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReportStore(tmp_path)
+
+
+def _write(store: ReportStore, content: str) -> "os.PathLike":
+    path = store.new_report_path().with_suffix(".txt")
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+def test_report_paths_are_unique(store):
+    names = {store.new_report_path().name for _ in range(100)}
+    assert len(names) == 100
+
+
+def test_identical_reports_are_deduplicated(store):
+    first = store.register(_write(store, "a\tb\n"))
+    second_path = _write(store, "a\tb\n")
+    assert store.register(second_path) == first
+    assert not second_path.exists()
+    assert store.register(_write(store, "c\td\n")) != first
+
+
+def test_retention_drops_expired_then_oldest_reports(tmp_path):
+    store = ReportStore(tmp_path, max_bytes=10, max_age_seconds=3600)
+    now = time.time()
+    expired = _write(store, "x" * 4)
+    os.utime(expired, (now - 7200, now - 7200))
+    oldest = _write(store, "y" * 8)
+    os.utime(oldest, (now - 60, now - 60))
+    newest = _write(store, "z" * 8)
+    store.register(newest)
+
+    assert store.enforce_retention() == 2
+    assert [p.name for p in tmp_path.iterdir() if p.is_file()] == [newest.name]
+
+
+def test_report_download_supports_etag_and_ranges(store, monkeypatch):
+    monkeypatch.setattr(
+        "backend_app.controllers.reports.get_report_store", lambda: store
+    )
+    name = store.register(_write(store, "0123456789"))
+    client = TestClient(app)
+
+    resp = client.get(f"/reports/{name}")
+    assert resp.status_code == 200
+    assert "immutable" in resp.headers["cache-control"]
+
+    cached = client.get(f"/reports/{name}", headers={"If-None-Match": resp.headers["etag"]})
+    assert cached.status_code == 304
+
+    partial = client.get(f"/reports/{name}", headers={"Range": "bytes=2-4"})
+    assert partial.status_code == 206
+    assert partial.content == b"234"
+
+    assert client.get("/reports/.index").status_code == 404
+
+
+def test_register_keeps_new_report_when_dedup_target_was_swept(store, monkeypatch):
+    first = store.register(_write(store, "a\tb\n"))
+    swept = store.root / first
+    resolve = store.resolve
+
+    def resolve_then_sweep(name):
+        # Retention deletes the target between resolve() and utime().
+        found = resolve(name)
+        swept.unlink()
+        return found
+
+    monkeypatch.setattr(store, "resolve", resolve_then_sweep)
+
+    second = _write(store, "a\tb\n")
+    assert store.register(second) == second.name
+    assert second.exists()
+    monkeypatch.undo()
+    assert store.register(_write(store, "a\tb\n")) == second.name
+
+
+def test_if_none_match_compares_whole_entity_tags():
+    from backend_app.services.http_cache import etag_matches
+
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches('"xabc", "ab"', '"abc"')
+    assert not etag_matches(None, '"abc"')
@@ -0,0 +1,106 @@
+import csv
+import gzip
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from backend_app.services.reports import open_report_writer
+
+ROW = {
+    "arquivo": "email1.txt",
+    "overall_category": "Produtivo",
+    "primary_category": "Status de chamado",
+    "confidence": 0.91234,
+    "engine": "MockEngine",
+    "text_hash": "abc",
+    "reply": "Ola!\n\tLinha dois",
+}
+
+
+def test_report_is_only_visible_after_commit(tmp_path):
+    writer = open_report_writer(tmp_path / "report_1", "txt")
+    writer.write_row(ROW)
+    assert not writer.path.exists()
+    writer.commit()
+
+    lines = writer.path.read_text(encoding="utf-8").splitlines()
+    assert writer.name == "report_1.txt"
+    assert lines[0].startswith("Arquivo\tCategoria binaria")
+    assert lines[1].split("\t")[3] == "0.912"
+    assert lines[1].endswith("Ola!  Linha dois")
+    assert [p.name for p in tmp_path.iterdir()] == ["report_1.txt"]
+
+
+def test_abort_discards_partial_report(tmp_path):
+    writer = open_report_writer(tmp_path / "report_2", "csv")
+    writer.write_row(ROW)
+    writer.abort()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_gzipped_csv_and_jsonl_round_trip(tmp_path):
+    csv_writer = open_report_writer(tmp_path / "report_3", "csv", compress=True)
+    jsonl_writer = open_report_writer(tmp_path / "report_3", "jsonl", compress=True)
+    for writer in (csv_writer, jsonl_writer):
+        writer.write_row(ROW)
+        writer.commit()
+
+    assert csv_writer.name == "report_3.csv.gz"
+    with gzip.open(csv_writer.path, "rt", encoding="utf-8", newline="") as handle:
+        rows = list(csv.reader(handle))
+    assert rows[1][6] == ROW["reply"]
+
+    with gzip.open(jsonl_writer.path, "rt", encoding="utf-8") as handle:
+        record = json.loads(handle.readline())
+    assert record["confidence"] == ROW["confidence"]
+
+
+def test_unknown_report_format_is_rejected(tmp_path):
+    with pytest.raises(HTTPException) as exc:
+        open_report_writer(tmp_path / "report_4", "xlsx")
+    assert exc.value.status_code == 400
+
+
+def test_report_writer_base_is_abstract(tmp_path):
+    from backend_app.services.reports import ReportWriter
+
+    with pytest.raises(TypeError):
+        ReportWriter(tmp_path / "report_5.txt")
+
+
+def test_batch_rows_are_written_off_the_event_loop(tmp_path, monkeypatch):
+    import asyncio
+    import threading
+
+    from backend_app.models.records import ClassificationResult
+    from backend_app.services import processing
+    from backend_app.services.report_store import ReportStore
+    from backend_app.services.reports import TsvReportWriter
+
+    store = ReportStore(tmp_path)
+    writer_threads = set()
+    original = TsvReportWriter.write_row
+
+    def tracking_write_row(self, row):
+        writer_threads.add(threading.get_ident())
+        original(self, row)
+
+    async def fake_classify(text):
+        return ClassificationResult("Financeiro", "Produtivo", 0.9, "Stub", reply="ok")
+
+    monkeypatch.setattr(TsvReportWriter, "write_row", tracking_write_row)
+    monkeypatch.setattr(processing, "_classify", fake_classify)
+    monkeypatch.setattr(processing, "get_report_store", lambda: store)
+
+    entries = [{"arquivo": f"e{i}.txt", "conteudo": "boleto"} for i in range(250)]
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        result = await processing._classify_entries(entries, "txt", False)
+        return loop_thread, result
+
+    loop_thread, (_, report_name, summary) = asyncio.run(scenario())
+    assert summary == {"Produtivo": 250}
+    assert loop_thread not in writer_threads
+    assert len((tmp_path / report_name).read_text(encoding="utf-8").splitlines()) == 251
@@ -0,0 +1,61 @@
+import asyncio
+
+from backend_app.services.scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    WeightedFairScheduler,
+    request_priority,
+)
+
+WEIGHTS = {PRIORITY_INTERACTIVE: 4, PRIORITY_BATCH: 1, PRIORITY_BACKGROUND: 1}
+
+
+def test_interactive_work_overtakes_queued_batch():
+    async def scenario():
+        scheduler = WeightedFairScheduler("inference", capacity=1, weights=WEIGHTS)
+        order = []
+        gate = asyncio.Event()
+
+        async def job(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await gate.wait()
+
+        holder = asyncio.create_task(job("holder", PRIORITY_BATCH))
+        await asyncio.sleep(0)
+        batch = [asyncio.create_task(job(f"b{i}", PRIORITY_BATCH)) for i in range(4)]
+        await asyncio.sleep(0)
+        interactive = [asyncio.create_task(job(f"i{i}", PRIORITY_INTERACTIVE)) for i in range(2)]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(holder, *batch, *interactive)
+        return order, scheduler.snapshot()
+
+    order, snapshot = asyncio.run(scenario())
+    assert order[0] == "holder"
+    # Both interactive jobs run before most of the earlier-queued batch work,
+    # yet batch work is not starved.
+    assert order.index("i1") < order.index("b2")
+    assert set(order) == {"holder", "b0", "b1", "b2", "b3", "i0", "i1"}
+    assert snapshot["classes"][PRIORITY_INTERACTIVE]["admitted"] == 2
+    assert snapshot["in_use"] == 0
+
+
+def test_priority_comes_from_context_and_cancelled_waiters_leave_queue():
+    async def scenario():
+        scheduler = WeightedFairScheduler("reply", capacity=1, weights=WEIGHTS)
+        await scheduler.acquire()
+        with request_priority(PRIORITY_BACKGROUND):
+            waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        queued = scheduler.snapshot()["classes"][PRIORITY_BACKGROUND]["queued"]
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler.release()
+        return queued, scheduler.snapshot()
+
+    queued, snapshot = asyncio.run(scenario())
+    assert queued == 1
+    assert snapshot["in_use"] == 0
+    assert snapshot["classes"][PRIORITY_BACKGROUND]["queued"] == 0
@@ -0,0 +1,34 @@
+import time
+
+from backend_app.services.shadow import ShadowEvaluator
+
+
+def _wait_idle(shadow):
+    for _ in range(200):
+        if not shadow.pending:
+            return
+        time.sleep(0.01)
+
+
+def test_shadow_records_agreement_confusion_and_persists(tmp_path):
+    def candidate(text):
+        label = "Financeiro" if "boleto" in text else "Suporte tecnico"
+        return {"label": label, "confidence": 0.7, "engine": "Candidate"}
+
+    store = tmp_path / "shadow.json"
+    shadow = ShadowEvaluator(candidate, "tests:candidate", sample_rate=1.0, store_path=store)
+    assert shadow.maybe_submit("segunda via do boleto", "Financeiro", "Primary", 0.2)
+    assert shadow.maybe_submit("erro no login", "Acesso/Senha", "Primary", 0.2)
+    _wait_idle(shadow)
+    shadow.close()
+
+    report = shadow.report()["pairs"]["Primary -> Candidate"]
+    assert report["samples"] == 2
+    assert report["agreement"] == 0.5
+    assert report["confusion"]["Acesso/Senha"] == {"Suporte tecnico": 1}
+    assert report["per_category"]["Financeiro"]["agreement"] == 1.0
+    assert report["delta_ms"]["mean"] < 0
+
+    reloaded = ShadowEvaluator(candidate, "tests:candidate", sample_rate=0.0, store_path=store)
+    assert reloaded.report()["pairs"]["Primary -> Candidate"]["samples"] == 2
+    assert not reloaded.maybe_submit("boleto", "Financeiro", "Primary", 0.1)
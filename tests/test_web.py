@@ -17,7 +17,7 @@ def test_index_route_renders_page(client):
 
 
 def test_batch_upload_uses_template(client, monkeypatch):
-    async def fake_handle_zip_payload(_data: bytes):
+    async def fake_handle_zip_payload(_data: bytes, **_options):
         rows = [
             {
                 "arquivo": "email1.txt",